@@ -14,12 +14,94 @@ class Config:
     BIGQUERY_DATASET = os.getenv("BIGQUERY_DATASET", "promozone")
     BIGQUERY_TABLE = os.getenv("BIGQUERY_TABLE", "promotions")
     BIGQUERY_LOG_TABLE = os.getenv("BIGQUERY_LOG_TABLE", "execution_logs")
+    BIGQUERY_ROLLUP_TABLE = os.getenv("BIGQUERY_ROLLUP_TABLE", "promotions_hourly")
+    # Rollup horário atualizado a cada MERGE e origem dos dados de /stats ("rollup" ou "raw")
+    STATS_ROLLUP_ENABLED = os.getenv("STATS_ROLLUP_ENABLED", "True").lower() == "true"
+    STATS_SOURCE = os.getenv("STATS_SOURCE", "rollup")
+    # Janela (dias) em que o MERGE procura duplicatas; 0 compara com todo o histórico
+    MERGE_DEDUPE_WINDOW_DAYS = int(os.getenv("MERGE_DEDUPE_WINDOW_DAYS", "30"))
+    # Índice local de dedupe_keys já gravadas (vazio em KNOWN_KEYS_PATH mantém só em memória)
+    KNOWN_KEYS_ENABLED = os.getenv("KNOWN_KEYS_ENABLED", "True").lower() == "true"
+    KNOWN_KEYS_PATH = os.getenv("KNOWN_KEYS_PATH", "/tmp/promozone-known-keys.bin")
+    KNOWN_KEYS_WARM_DAYS = int(os.getenv("KNOWN_KEYS_WARM_DAYS", "30"))
+    # Backend de gravação: "merge" (tabela temporária + MERGE) ou "storage_write" (append)
+    BIGQUERY_SINK = os.getenv("BIGQUERY_SINK", "merge")
+    # Modo da Storage Write API: "pending" (lote atômico) ou "committed" (stream padrão)
+    STORAGE_WRITE_MODE = os.getenv("STORAGE_WRITE_MODE", "pending")
+    # Formato da carga na tabela temporária do MERGE: "parquet" (requer pyarrow) ou "json"
+    BIGQUERY_LOAD_FORMAT = os.getenv("BIGQUERY_LOAD_FORMAT", "parquet")
+    # Spool local dos lotes antes do BigQuery (vazio desativa)
+    SPOOL_DIR = os.getenv("SPOOL_DIR", "/tmp/promozone-spool")
+    SPOOL_FLUSH_INTERVAL = float(os.getenv("SPOOL_FLUSH_INTERVAL", "30"))
+    SPOOL_REPLAY_BATCH_SIZE = int(os.getenv("SPOOL_REPLAY_BATCH_SIZE", "5000"))
     
     # Scraper
     REQUEST_TIMEOUT = int(os.getenv("REQUEST_TIMEOUT", "30"))
     MAX_RETRIES = int(os.getenv("MAX_RETRIES", "3"))
     BACKOFF_FACTOR = float(os.getenv("BACKOFF_FACTOR", "1.5"))
+    RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "30"))
+    RETRY_BUDGET = int(os.getenv("RETRY_BUDGET", "10"))
     ITEMS_PER_SOURCE = int(os.getenv("ITEMS_PER_SOURCE", "25"))
+    MAX_PAGES_PER_SOURCE = int(os.getenv("MAX_PAGES_PER_SOURCE", "1"))
+    PAGE_FETCH_WINDOW = int(os.getenv("PAGE_FETCH_WINDOW", "3"))
+    
+    # Parsing de HTML: "none" (no event loop), "thread" ou "process"
+    PARSER_EXECUTOR = os.getenv("PARSER_EXECUTOR", "none")
+    PARSER_WORKERS = int(os.getenv("PARSER_WORKERS", "0"))
+    # Motor de extração: "bs4" (BeautifulSoup) ou "lxml" (XPath compilado)
+    PARSER_ENGINE = os.getenv("PARSER_ENGINE", "bs4")
+    # Origem dos dados: "dom" (cards HTML) ou "json" (estado embutido, com fallback para o DOM)
+    EXTRACTION_MODE = os.getenv("EXTRACTION_MODE", "dom")
+    # Normalização de lotes: "columnar" (NumPy, mesma saída) ou "item"
+    NORMALIZER_ENGINE = os.getenv("NORMALIZER_ENGINE", "columnar")
+    
+    # Pool de conexões do cliente HTTP compartilhado
+    HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+    HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "10"))
+    HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "300"))
+    HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "True").lower() == "true"
+    
+    # Rate limit adaptativo por host ("local" por processo ou "file" entre workers)
+    RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "True").lower() == "true"
+    RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "local")
+    RATE_LIMIT_DIR = os.getenv("RATE_LIMIT_DIR", "/tmp/promozone-ratelimit")
+    RATE_LIMIT_INITIAL_RPS = float(os.getenv("RATE_LIMIT_INITIAL_RPS", "2"))
+    RATE_LIMIT_MIN_RPS = float(os.getenv("RATE_LIMIT_MIN_RPS", "0.2"))
+    RATE_LIMIT_MAX_RPS = float(os.getenv("RATE_LIMIT_MAX_RPS", "10"))
+    RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "4"))
+    RATE_LIMIT_TARGET_LATENCY = float(os.getenv("RATE_LIMIT_TARGET_LATENCY", "2.0"))
+    
+    # Cache HTTP em disco (vazio desativa)
+    HTTP_CACHE_DIR = os.getenv("HTTP_CACHE_DIR", "")
+    HTTP_CACHE_MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+    
+    # Coleta concorrente
+    SCRAPE_CONCURRENT = os.getenv("SCRAPE_CONCURRENT", "True").lower() == "true"
+    MAX_CONCURRENCY_PER_HOST = int(os.getenv("MAX_CONCURRENCY_PER_HOST", "4"))
+    COLLECT_DEADLINE = float(os.getenv("COLLECT_DEADLINE", "90"))
+    
+    # Pipeline em streaming (páginas em espera entre estágios e tamanho dos lotes de carga)
+    PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "8"))
+    LOAD_BATCH_SIZE = int(os.getenv("LOAD_BATCH_SIZE", "500"))
+    
+    # Coletas assíncronas (POST /collect?async=1)
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "1"))
+    JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "4"))
+    JOB_STATE_DIR = os.getenv("JOB_STATE_DIR", "/tmp/promozone-jobs")
+    
+    # Cache de /stats (segundos em que é atual e segundos extras servindo valor vencido)
+    STATS_CACHE_TTL = float(os.getenv("STATS_CACHE_TTL", "60"))
+    STATS_STALE_TTL = float(os.getenv("STATS_STALE_TTL", "600"))
+    
+    # Métricas Prometheus: diretório compartilhado entre os workers do gunicorn
+    # (vazio mantém as métricas só no processo)
+    METRICS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR", "")
+    
+    # Logging: nível mínimo e amostragem dos registros DEBUG repetidos (registros
+    # por ponto do código a cada janela de LOG_SAMPLE_INTERVAL segundos; 0 desativa)
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_SAMPLE_BURST = int(os.getenv("LOG_SAMPLE_BURST", "20"))
+    LOG_SAMPLE_INTERVAL = float(os.getenv("LOG_SAMPLE_INTERVAL", "60"))
     
     # Flask
     DEBUG = os.getenv("FLASK_DEBUG", "False").lower() == "true"
@@ -1,10 +1,83 @@
-import logging
-from datetime import datetime
-from typing import List, Dict, Tuple, Optional
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Iterator, Tuple, Optional
+from google.api_core.exceptions import NotFound
 from google.cloud import bigquery
 from app.config import Config
+from app.database import parquet_batch
+from app.database.known_keys import get_known_keys
+from app.database.storage_write import StorageWriteSink
+from app.models.promotion import Promotion
+from app.utils.logger import setup_logger
+from app.utils.metrics import BIGQUERY_JOB_SECONDS, timed
+from app.utils.retry import full_jitter_delay
+
+logger = setup_logger(__name__)
+
+# Tentativas do MERGE do rollup quando o BigQuery rejeita DML concorrente
+ROLLUP_MAX_ATTEMPTS = 4
+
+
+# Schema completo da tabela temporária do MERGE, para evitar erros de
+# 'No such field' na carga
+TEMP_TABLE_SCHEMA = [
+    bigquery.SchemaField("marketplace", "STRING"),
+    bigquery.SchemaField("item_id", "STRING"),
+    bigquery.SchemaField("url", "STRING"),
+    bigquery.SchemaField("title", "STRING"),
+    bigquery.SchemaField("price", "NUMERIC"),
+    bigquery.SchemaField("original_price", "NUMERIC", mode="NULLABLE"),
+    bigquery.SchemaField("discount_percent", "FLOAT64", mode="NULLABLE"),
+    bigquery.SchemaField("seller", "STRING", mode="NULLABLE"),
+    bigquery.SchemaField("image_url", "STRING", mode="NULLABLE"),
+    bigquery.SchemaField("source", "STRING", mode="NULLABLE"),
+    bigquery.SchemaField("dedupe_key", "STRING"),
+    bigquery.SchemaField("execution_id", "STRING"),
+    bigquery.SchemaField("collected_at", "TIMESTAMP"),
+]
+
+
+def _is_concurrent_update(error: Exception) -> bool:
+    """Indica se o BigQuery rejeitou o DML por conflito com outra atualização."""
+    message = str(error).lower()
+    return "concurrent update" in message or "serialize access" in message
+
+
+def format_promotion_rows(rows: List[Dict], execution_id: str) -> List[Dict]:
+    """Formata promoções normalizadas como linhas da tabela promotions."""
+    formatted_rows = []
+    default_collected_at = datetime.utcnow().isoformat()
+    for r in rows:
+        if isinstance(r, Promotion):
+            # Registro normalizado: tipos conhecidos, sem buscas por chave
+            formatted_rows.append(r.to_load_row(execution_id, default_collected_at))
+            continue
+        
+        price = r.get('price')
+        original_price = r.get('original_price')
+        discount = r.get('discount_percent')
+
+        # Formata os dados garantindo que tipos numéricos não sejam None
+        formatted_rows.append({
+            "marketplace": str(r.get('marketplace', 'mercadolivre')),
+            "item_id": str(r.get('item_id', '')),
+            "url": str(r.get('url', '')),
+            "title": str(r.get('title', '')),
+            "price": float(price) if price is not None else 0.0,
+            "original_price": float(original_price) if original_price is not None else None,
+            "discount_percent": float(discount) if discount is not None else 0.0,
+            "seller": str(r.get('seller', 'Mercado Livre')),
+            "image_url": str(r.get('image_url', '')),
+            "source": str(r.get('source', '')),
+            "dedupe_key": str(r.get('dedupe_key', '')),
+            "execution_id": str(execution_id),
+            "collected_at": str(r.get('collected_at', default_collected_at))
+        })
+    return formatted_rows
 
-logger = logging.getLogger(__name__)
 
 class BigQueryClient:
     """Client para operações no BigQuery."""
@@ -15,6 +88,9 @@ class BigQueryClient:
         self.dataset_id = Config.BIGQUERY_DATASET
         self.table_id = Config.BIGQUERY_TABLE
         self.log_table_id = Config.BIGQUERY_LOG_TABLE
+        self.rollup_table_id = Config.BIGQUERY_ROLLUP_TABLE
+        self.known_keys = get_known_keys()
+        self.storage_sink: Optional[StorageWriteSink] = None
         
         try:
             # Inicializa o cliente oficial do Google Cloud BigQuery
@@ -32,87 +108,363 @@ class BigQueryClient:
         """
         return True
 
+    def write_promotions(self, rows_to_insert: List[Dict], execution_id: str) -> Tuple[int, int]:
+        """
+        Grava um lote de promoções pelo backend de Config.BIGQUERY_SINK.
+        
+        Returns:
+            Tupla (inseridos, duplicados)
+        """
+        if Config.BIGQUERY_SINK == "storage_write":
+            return self.append_promotions(rows_to_insert, execution_id)
+        return self.merge_promotions(rows_to_insert, execution_id)
+    
+    def append_promotions(self, rows_to_insert: List[Dict], execution_id: str) -> Tuple[int, int]:
+        """
+        Grava as promoções pela Storage Write API, sem job de carga nem MERGE.
+        
+        A tabela fica append-only; duplicatas que passarem pelo índice de
+        chaves conhecidas são resolvidas pela view de deduplicação.
+        """
+        if not rows_to_insert:
+            return 0, 0
+        
+        total_rows = len(rows_to_insert)
+        if self.known_keys is not None:
+            rows_to_insert = self.known_keys.filter_new(rows_to_insert)
+            if not rows_to_insert:
+                return 0, total_rows
+        
+        if self.storage_sink is None:
+            self.storage_sink = StorageWriteSink(
+                f"projects/{self.project_id}/datasets/{self.dataset_id}/tables/{self.table_id}",
+                mode=Config.STORAGE_WRITE_MODE,
+            )
+        
+        formatted_rows = format_promotion_rows(rows_to_insert, execution_id)
+        try:
+            with timed(BIGQUERY_JOB_SECONDS, operation="storage_write"):
+                written = self.storage_sink.write(formatted_rows, datetime.now(timezone.utc))
+        except Exception as e:
+            logger.error(f"Erro na Storage Write API: {str(e)}")
+            raise
+        
+        if self.known_keys is not None:
+            self.known_keys.add(row["dedupe_key"] for row in formatted_rows)
+        
+        return written, total_rows - written
+    
     def merge_promotions(self, rows_to_insert: List[Dict], execution_id: str) -> Tuple[int, int]:
-        """Realiza o MERGE dos dados usando uma tabela temporária para garantir deduplicação."""
+        """
+        Realiza o MERGE dos dados usando uma tabela temporária para garantir deduplicação.
+        
+        Linhas cuja dedupe_key já está no índice local de chaves conhecidas são
+        descartadas antes do upload; se nada restar, a carga e o MERGE não rodam.
+        """
         if not rows_to_insert:
             return 0, 0
+        
+        total_rows = len(rows_to_insert)
+        if self.known_keys is not None:
+            rows_to_insert = self.known_keys.filter_new(rows_to_insert)
+            if not rows_to_insert:
+                return 0, total_rows
 
-        formatted_rows = []
-        for r in rows_to_insert:
-            price = r.get('price')
-            original_price = r.get('original_price')
-            discount = r.get('discount_percent')
-
-            # Formata os dados garantindo que tipos numéricos não sejam None
-            formatted_rows.append({
-                "marketplace": str(r.get('marketplace', 'mercadolivre')),
-                "item_id": str(r.get('item_id', '')),
-                "url": str(r.get('url', '')),
-                "title": str(r.get('title', '')),
-                "price": float(price) if price is not None else 0.0,
-                "original_price": float(original_price) if original_price is not None else None,
-                "discount_percent": float(discount) if discount is not None else 0.0,
-                "seller": str(r.get('seller', 'Mercado Livre')),
-                "image_url": str(r.get('image_url', '')),
-                "source": str(r.get('source', '')),
-                "dedupe_key": str(r.get('dedupe_key', '')),
-                "execution_id": str(execution_id),
-                "collected_at": str(r.get('collected_at', datetime.utcnow().isoformat()))
-            })
-
-        temp_table_id = f"{self.project_id}.{self.dataset_id}.temp_{execution_id.replace('-', '_')}"
-        
-        # Schema completo para evitar erros de 'No such field' na carga do JSON
-        schema = [
-            bigquery.SchemaField("marketplace", "STRING"),
-            bigquery.SchemaField("item_id", "STRING"),
-            bigquery.SchemaField("url", "STRING"),
-            bigquery.SchemaField("title", "STRING"),
-            bigquery.SchemaField("price", "NUMERIC"),
-            bigquery.SchemaField("original_price", "NUMERIC", mode="NULLABLE"),
-            bigquery.SchemaField("discount_percent", "FLOAT64", mode="NULLABLE"),
-            bigquery.SchemaField("seller", "STRING", mode="NULLABLE"),
-            bigquery.SchemaField("image_url", "STRING", mode="NULLABLE"),
-            bigquery.SchemaField("source", "STRING", mode="NULLABLE"),
-            bigquery.SchemaField("dedupe_key", "STRING"),
-            bigquery.SchemaField("execution_id", "STRING"),
-            bigquery.SchemaField("collected_at", "TIMESTAMP"),
-        ]
+        # Tabela temporária exclusiva desta chamada: réplicas do spool em
+        # workers diferentes podem gravar lotes da mesma execução ao mesmo tempo
+        temp_table_id = (
+            f"{self.project_id}.{self.dataset_id}."
+            f"temp_{execution_id.replace('-', '_')}_{uuid.uuid4().hex}"
+        )
 
         try:
             # Carrega dados para tabela temporária
-            job_config = bigquery.LoadJobConfig(
-                write_disposition="WRITE_TRUNCATE",
-                schema=schema
+            dedupe_keys, min_collected_at = self._load_temp_table(
+                rows_to_insert, execution_id, temp_table_id
             )
-            load_job = self.client.load_table_from_json(formatted_rows, temp_table_id, job_config=job_config)
-            load_job.result()
 
-            # Executa o MERGE atômico
+            # Executa o MERGE atômico; inserted_at identifica as linhas deste lote
+            inserted_at = datetime.now(timezone.utc)
+            query_parameters = [
+                bigquery.ScalarQueryParameter("inserted_at", "TIMESTAMP", inserted_at),
+            ]
+            
+            # Restringe a comparação às partições recentes e aos blocos de
+            # marketplace/item_id (a dedupe_key é derivada deles)
+            match_condition = (
+                "T.dedupe_key = S.dedupe_key "
+                "AND T.marketplace = S.marketplace AND T.item_id = S.item_id"
+            )
+            if Config.MERGE_DEDUPE_WINDOW_DAYS > 0:
+                match_condition += " AND T.collected_at >= @dedupe_since"
+                query_parameters.append(bigquery.ScalarQueryParameter(
+                    "dedupe_since", "TIMESTAMP",
+                    inserted_at - timedelta(days=Config.MERGE_DEDUPE_WINDOW_DAYS)
+                ))
+            
             sql = f"""
-                MERGE `{self.project_id}.{self.dataset_id}.promotions` T
+                MERGE `{self.project_id}.{self.dataset_id}.{self.table_id}` T
                 USING `{temp_table_id}` S
-                ON T.dedupe_key = S.dedupe_key
+                ON {match_condition}
                 WHEN NOT MATCHED THEN
                     INSERT (marketplace, item_id, url, title, price, original_price, 
                             discount_percent, seller, image_url, source, dedupe_key, 
                             execution_id, collected_at, inserted_at)
                     VALUES (S.marketplace, S.item_id, S.url, S.title, S.price, S.original_price, 
                             S.discount_percent, S.seller, S.image_url, S.source, S.dedupe_key, 
-                            S.execution_id, S.collected_at, CURRENT_TIMESTAMP())
+                            S.execution_id, S.collected_at, @inserted_at)
             """
-            query_job = self.client.query(sql)
-            query_job.result()
+            query_job = self.client.query(sql, job_config=bigquery.QueryJobConfig(
+                query_parameters=query_parameters
+            ))
+            with timed(BIGQUERY_JOB_SECONDS, operation="merge"):
+                query_job.result()
             
             inserted = query_job.num_dml_affected_rows or 0
             self.client.delete_table(temp_table_id, not_found_ok=True)
-            return inserted, len(rows_to_insert) - inserted
+            
+            if inserted and Config.STATS_ROLLUP_ENABLED:
+                self.update_stats_rollup(execution_id, inserted_at, min_collected_at)
+            
+            # Após o MERGE, todas as chaves do lote estão na tabela
+            if self.known_keys is not None:
+                self.known_keys.add(dedupe_keys)
+            
+            return inserted, total_rows - inserted
             
         except Exception as e:
             logger.error(f"Erro no fluxo de merge: {str(e)}")
             self.client.delete_table(temp_table_id, not_found_ok=True)
             raise
 
+    def _load_temp_table(self, rows: List[Dict], execution_id: str,
+                         temp_table_id: str) -> Tuple[List[str], object]:
+        """
+        Carrega o lote na tabela temporária do MERGE.
+        
+        Com Config.BIGQUERY_LOAD_FORMAT = "parquet" (e pyarrow instalado), o
+        lote é montado em colunas e enviado como Parquet; caso contrário, como
+        JSON delimitado por linhas.
+        
+        Returns:
+            Tupla (dedupe_keys do lote, menor collected_at)
+        """
+        if Config.BIGQUERY_LOAD_FORMAT == "parquet" and parquet_batch.is_available():
+            table = parquet_batch.build_promotions_table(rows, execution_id)
+            job_config = bigquery.LoadJobConfig(
+                source_format=bigquery.SourceFormat.PARQUET,
+                write_disposition="WRITE_TRUNCATE",
+                schema=TEMP_TABLE_SCHEMA
+            )
+            with timed(BIGQUERY_JOB_SECONDS, operation="load"):
+                self.client.load_table_from_file(
+                    parquet_batch.to_parquet(table), temp_table_id, job_config=job_config
+                ).result()
+            return table.column("dedupe_key").to_pylist(), parquet_batch.min_collected_at(table)
+        
+        formatted_rows = format_promotion_rows(rows, execution_id)
+        job_config = bigquery.LoadJobConfig(
+            write_disposition="WRITE_TRUNCATE",
+            schema=TEMP_TABLE_SCHEMA
+        )
+        with timed(BIGQUERY_JOB_SECONDS, operation="load"):
+            self.client.load_table_from_json(
+                formatted_rows, temp_table_id, job_config=job_config
+            ).result()
+        return (
+            [row["dedupe_key"] for row in formatted_rows],
+            min(row["collected_at"] for row in formatted_rows),
+        )
+    
+    def query_recent_dedupe_keys(self, days: int) -> Iterator[Tuple[str, int]]:
+        """
+        Lista as dedupe_keys coletadas nos últimos dias.
+        
+        Args:
+            days: Tamanho da janela em dias
+        
+        Returns:
+            Pares (dedupe_key, dia desde a época da coleta mais recente)
+        """
+        query = f"""
+        SELECT dedupe_key, UNIX_DATE(DATE(MAX(collected_at))) as day
+        FROM `{self.project_id}.{self.dataset_id}.{self.table_id}`
+        WHERE collected_at >= TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL @days DAY)
+        GROUP BY dedupe_key
+        """
+        job = self.client.query(query, job_config=bigquery.QueryJobConfig(
+            query_parameters=[bigquery.ScalarQueryParameter("days", "INT64", days)]
+        ))
+        with timed(BIGQUERY_JOB_SECONDS, operation="known_keys"):
+            rows = job.result(page_size=50000)
+        for row in rows:
+            yield row.dedupe_key, row.day
+    
+    def update_stats_rollup(self, execution_id: str, inserted_at: datetime, min_collected_at: str):
+        """
+        Recalcula no rollup horário as horas que receberam linhas de um MERGE.
+        
+        A tabela guarda, por hora, fonte e marketplace, a contagem de itens,
+        sketches HLL de item_id e execution_id e a soma/contagem de descontos.
+        Cada hora tocada pelo lote é recalculada a partir da tabela de
+        promoções e substitui a linha do rollup, então repetir a atualização
+        não duplica contagens e a próxima atualização da mesma hora corrige
+        uma que tenha falhado. Conflitos de DML concorrente (outros workers ou
+        o spool atualizando a mesma partição) são tentados de novo; demais
+        falhas são registradas sem propagar, pois o MERGE principal já foi feito.
+        
+        Args:
+            execution_id: ID da execução
+            inserted_at: Valor de inserted_at usado no MERGE do lote
+            min_collected_at: Menor collected_at do lote (limita a leitura)
+        """
+        promotions_table = f"{self.project_id}.{self.dataset_id}.{self.table_id}"
+        rollup_table = f"{self.project_id}.{self.dataset_id}.{self.rollup_table_id}"
+        sql = f"""
+            MERGE `{rollup_table}` R
+            USING (
+                WITH batch_hours AS (
+                    SELECT DISTINCT TIMESTAMP_TRUNC(collected_at, HOUR) AS hour
+                    FROM `{promotions_table}`
+                    WHERE execution_id = @execution_id
+                        AND inserted_at = @inserted_at
+                        AND collected_at >= @min_collected_at
+                )
+                SELECT
+                    TIMESTAMP_TRUNC(collected_at, HOUR) AS hour,
+                    IFNULL(source, '') AS source,
+                    marketplace,
+                    COUNT(*) AS item_count,
+                    HLL_COUNT.INIT(item_id) AS items_sketch,
+                    HLL_COUNT.INIT(execution_id) AS executions_sketch,
+                    IFNULL(SUM(discount_percent), 0) AS discount_sum,
+                    COUNT(discount_percent) AS discount_count
+                FROM `{promotions_table}`
+                WHERE collected_at >= TIMESTAMP_TRUNC(@min_collected_at, HOUR)
+                    AND TIMESTAMP_TRUNC(collected_at, HOUR) IN (SELECT hour FROM batch_hours)
+                GROUP BY hour, source, marketplace
+            ) S
+            ON R.hour = S.hour AND R.source = S.source AND R.marketplace = S.marketplace
+            WHEN MATCHED THEN
+                UPDATE SET
+                    item_count = S.item_count,
+                    items_sketch = S.items_sketch,
+                    executions_sketch = S.executions_sketch,
+                    discount_sum = S.discount_sum,
+                    discount_count = S.discount_count,
+                    updated_at = CURRENT_TIMESTAMP()
+            WHEN NOT MATCHED THEN
+                INSERT (hour, source, marketplace, item_count, items_sketch, executions_sketch,
+                        discount_sum, discount_count, updated_at)
+                VALUES (S.hour, S.source, S.marketplace, S.item_count, S.items_sketch,
+                        S.executions_sketch, S.discount_sum, S.discount_count, CURRENT_TIMESTAMP())
+        """
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[
+                bigquery.ScalarQueryParameter("execution_id", "STRING", execution_id),
+                bigquery.ScalarQueryParameter("inserted_at", "TIMESTAMP", inserted_at),
+                bigquery.ScalarQueryParameter("min_collected_at", "TIMESTAMP", min_collected_at),
+            ]
+        )
+        
+        for attempt in range(ROLLUP_MAX_ATTEMPTS):
+            try:
+                with timed(BIGQUERY_JOB_SECONDS, operation="rollup"):
+                    self.client.query(sql, job_config=job_config).result()
+                return
+            except Exception as e:
+                if _is_concurrent_update(e) and attempt < ROLLUP_MAX_ATTEMPTS - 1:
+                    logger.warning(
+                        "Rollup em conflito com outra atualização; nova tentativa %s", attempt + 2
+                    )
+                    time.sleep(full_jitter_delay(attempt))
+                    continue
+                logger.error(f"Erro ao atualizar rollup de estatísticas: {str(e)}")
+                return
+    
+    def query_stats(self) -> Dict:
+        """
+        Consulta os agregados das últimas 24h.
+        
+        Com Config.STATS_SOURCE = "rollup", lê a tabela de rollup horário
+        (custo constante; janela arredondada para a hora e contagens distintas
+        aproximadas por HLL). Se o rollup não existir, com "raw" ou com o
+        backend storage_write, consulta a tabela de promoções.
+        
+        Returns:
+            Dicionário com executions, total_items, unique_items, by_source,
+            discount_sum e discount_count
+        """
+        # O rollup só é mantido pelo MERGE; no modo append lê-se a tabela deduplicada
+        if Config.STATS_SOURCE == "rollup" and Config.BIGQUERY_SINK == "merge":
+            try:
+                return self._query_stats_rollup()
+            except NotFound:
+                logger.warning("Tabela de rollup não encontrada; consultando a tabela de promoções")
+        
+        return self._query_stats_raw()
+    
+    def _query_stats_rollup(self) -> Dict:
+        query = f"""
+        SELECT
+            IFNULL(HLL_COUNT.MERGE(executions_sketch), 0) as executions,
+            IFNULL(SUM(item_count), 0) as total_items,
+            IFNULL(HLL_COUNT.MERGE(items_sketch), 0) as unique_items,
+            SUM(IF(source = 'daily_offers', item_count, 0)) as daily_offers,
+            SUM(IF(source = 'technology', item_count, 0)) as technology,
+            SUM(IF(source = 'electronics', item_count, 0)) as electronics,
+            SUM(discount_sum) as discount_sum,
+            SUM(discount_count) as discount_count
+        FROM `{self.project_id}.{self.dataset_id}.{self.rollup_table_id}`
+        WHERE hour >= TIMESTAMP_TRUNC(TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL 24 HOUR), HOUR)
+        """
+        with timed(BIGQUERY_JOB_SECONDS, operation="stats"):
+            rows = self.client.query(query).result()
+        return self._stats_from_row(next(iter(rows)))
+    
+    def _query_stats_raw(self) -> Dict:
+        source = f"`{self.project_id}.{self.dataset_id}.{self.table_id}`"
+        if Config.BIGQUERY_SINK == "storage_write":
+            # Tabela append-only: mantém a primeira gravação de cada dedupe_key
+            source = f"""(
+            SELECT * FROM {source}
+            WHERE collected_at >= TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL 24 HOUR)
+            QUALIFY ROW_NUMBER() OVER (PARTITION BY dedupe_key ORDER BY inserted_at) = 1
+        )"""
+        
+        query = f"""
+        SELECT
+            COUNT(DISTINCT execution_id) as executions,
+            COUNT(*) as total_items,
+            COUNT(DISTINCT item_id) as unique_items,
+            SUM(CASE WHEN source = 'daily_offers' THEN 1 ELSE 0 END) as daily_offers,
+            SUM(CASE WHEN source = 'technology' THEN 1 ELSE 0 END) as technology,
+            SUM(CASE WHEN source = 'electronics' THEN 1 ELSE 0 END) as electronics,
+            SUM(discount_percent) as discount_sum,
+            COUNT(discount_percent) as discount_count
+        FROM {source}
+        WHERE collected_at >= TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL 24 HOUR)
+        """
+        
+        with timed(BIGQUERY_JOB_SECONDS, operation="stats"):
+            rows = self.client.query(query).result()
+        return self._stats_from_row(next(iter(rows)))
+    
+    @staticmethod
+    def _stats_from_row(row) -> Dict:
+        return {
+            "executions": row.executions or 0,
+            "total_items": row.total_items or 0,
+            "unique_items": row.unique_items or 0,
+            "by_source": {
+                "daily_offers": row.daily_offers or 0,
+                "technology": row.technology or 0,
+                "electronics": row.electronics or 0,
+            },
+            "discount_sum": float(row.discount_sum or 0),
+            "discount_count": row.discount_count or 0,
+        }
+    
     def log_execution(self, execution_id: str, start_time: datetime, end_time: datetime,
                       items_collected: int, items_inserted: int, items_deduplicated: int,
                       status: str, error_message: str = None):
@@ -132,8 +484,41 @@ class BigQueryClient:
         
         try:
             # Inserção direta via JSON para logs rápidos
-            errors = self.client.insert_rows_json(table_id, [row])
+            with timed(BIGQUERY_JOB_SECONDS, operation="log_execution"):
+                errors = self.client.insert_rows_json(table_id, [row])
             if errors:
                 logger.error(f"Erro ao inserir log: {errors}")
         except Exception as e:
             logger.error(f"Erro ao registrar log: {str(e)}")
+
+
+_client: Optional[BigQueryClient] = None
+_client_lock = threading.Lock()
+
+
+def get_bigquery_client() -> BigQueryClient:
+    """
+    Retorna o BigQueryClient do processo, criando-o na primeira chamada.
+    
+    O `bigquery.Client` é thread-safe, então a mesma instância (com sua sessão
+    HTTP e credenciais) é compartilhada por todas as rotas e threads. Se a
+    criação falhar, a próxima chamada tenta novamente.
+    """
+    global _client
+    
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = BigQueryClient()
+    return _client
+
+
+def reset_bigquery_client():
+    """Descarta o cliente do processo (usado após fork e em testes)."""
+    global _client, _client_lock
+    _client = None
+    _client_lock = threading.Lock()
+
+
+# Conexões e locks herdados do processo pai não são seguros no filho
+os.register_at_fork(after_in_child=reset_bigquery_client)
@@ -0,0 +1,274 @@
+"""
+Índice local das dedupe_keys já gravadas no BigQuery.
+"""
+import fcntl
+import hashlib
+import os
+import struct
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from app.config import Config
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+# Cabeçalho de cada bloco do arquivo: dia (desde a época) e quantidade de chaves
+_BLOCK_HEADER = struct.Struct("<iI")
+
+# Blocos anexados por um worker entre duas compactações do arquivo
+COMPACT_AFTER_APPENDS = 256
+
+
+def key_digest(dedupe_key: str) -> int:
+    """Reduz a dedupe_key a um inteiro de 64 bits (blake2b)."""
+    return int.from_bytes(
+        hashlib.blake2b(dedupe_key.encode("utf-8"), digest_size=8).digest(), "little"
+    )
+
+
+def today() -> int:
+    return int(time.time() // SECONDS_PER_DAY)
+
+
+class KnownKeys:
+    """
+    Conjunto compacto de digests de 64 bits das dedupe_keys já inseridas.
+    
+    As chaves ficam agrupadas pelo dia em que foram vistas; dias mais antigos
+    que `retention_days` são descartados. Com 64 bits, a chance de um falso
+    positivo (descartar uma linha nova) é desprezível para o volume de itens
+    do projeto, ao contrário de um filtro de Bloom.
+    
+    O arquivo é compartilhado pelos workers: cada `add` só anexa um bloco
+    com os digests novos, e a compactação (`save`) une os blocos de todos
+    os workers, descarta os dias vencidos e regrava o arquivo de forma
+    atômica (arquivo temporário + os.replace). Um flock em `<path>.lock`
+    impede que um anexo caia no arquivo substituído pela compactação. O
+    índice é recarregado na inicialização do worker; o aquecimento a partir
+    do BigQuery acontece em segundo plano.
+    """
+    
+    def __init__(self, path: str, retention_days: int):
+        """
+        Args:
+            path: Arquivo de persistência
+            retention_days: Dias em que uma chave é mantida no índice
+        """
+        self.path = path
+        self.retention_days = retention_days
+        self._days: Dict[int, Set[int]] = {}
+        self._appends = 0
+        self._lock = threading.Lock()
+        self._load()
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(keys) for keys in self._days.values())
+    
+    def __contains__(self, dedupe_key: str) -> bool:
+        digest = key_digest(dedupe_key)
+        with self._lock:
+            return any(digest in keys for keys in self._days.values())
+    
+    def filter_new(self, rows: List[Dict]) -> List[Dict]:
+        """Remove as linhas cuja dedupe_key já está no índice."""
+        with self._lock:
+            days = list(self._days.values())
+        
+        return [
+            row for row in rows
+            if not row.get("dedupe_key")
+            or not any(key_digest(str(row["dedupe_key"])) in keys for keys in days)
+        ]
+    
+    def add(self, dedupe_keys: Iterable[str], day: Optional[int] = None):
+        """Registra chaves gravadas no BigQuery e anexa as novas ao arquivo."""
+        digests = {key_digest(key) for key in dedupe_keys if key}
+        if not digests:
+            return
+        
+        day = day if day is not None else today()
+        with self._lock:
+            known = self._days.setdefault(day, set())
+            digests -= known
+            known.update(digests)
+            self._expire()
+        if digests:
+            self._append(day, digests)
+    
+    def warm(self, loader: Callable[[int], Iterable[Tuple[str, int]]]):
+        """
+        Carrega as chaves recentes do BigQuery.
+        
+        Args:
+            loader: Função que recebe o número de dias e retorna pares
+                (dedupe_key, dia desde a época)
+        """
+        days: Dict[int, Set[int]] = {}
+        for dedupe_key, day in loader(self.retention_days):
+            days.setdefault(day, set()).add(key_digest(dedupe_key))
+        
+        with self._lock:
+            for day, keys in days.items():
+                self._days.setdefault(day, set()).update(keys)
+            self._expire()
+        self.save()
+        logger.info(f"Índice de chaves conhecidas aquecido com {len(self)} chaves")
+    
+    def warm_in_background(self, loader: Callable[[int], Iterable[Tuple[str, int]]]):
+        """Executa `warm` em uma thread daemon, registrando falhas no log."""
+        def run():
+            try:
+                self.warm(loader)
+            except Exception as e:
+                logger.warning(f"Erro ao aquecer índice de chaves conhecidas: {str(e)}")
+        
+        threading.Thread(target=run, name="known-keys-warm", daemon=True).start()
+    
+    def save(self):
+        """
+        Compacta o arquivo: une os blocos gravados por todos os workers às
+        chaves em memória, descarta os dias vencidos e regrava o arquivo de
+        forma atômica.
+        """
+        if not self.path:
+            return
+        
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with self._file_lock(fcntl.LOCK_EX):
+                on_disk = self._read_blocks()
+                with self._lock:
+                    for day, keys in on_disk.items():
+                        self._days.setdefault(day, set()).update(keys)
+                    self._expire()
+                    blocks = [(day, array("Q", keys)) for day, keys in self._days.items()]
+                    self._appends = 0
+                
+                with open(tmp_path, "wb") as f:
+                    for day, keys in blocks:
+                        f.write(_BLOCK_HEADER.pack(day, len(keys)))
+                        keys.tofile(f)
+                os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Erro ao gravar índice de chaves conhecidas: {str(e)}")
+    
+    def _append(self, day: int, digests: Set[int]):
+        """Anexa um bloco ao arquivo, compactando-o a cada COMPACT_AFTER_APPENDS blocos."""
+        if not self.path:
+            return
+        
+        keys = array("Q", digests)
+        try:
+            with self._file_lock(fcntl.LOCK_SH):
+                # Um único write com O_APPEND: blocos de workers diferentes
+                # não se misturam
+                fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    os.write(fd, _BLOCK_HEADER.pack(day, len(keys)) + keys.tobytes())
+                finally:
+                    os.close(fd)
+        except OSError as e:
+            logger.warning(f"Erro ao gravar índice de chaves conhecidas: {str(e)}")
+            return
+        
+        with self._lock:
+            self._appends += 1
+            compact = self._appends >= COMPACT_AFTER_APPENDS
+        if compact:
+            self.save()
+    
+    @contextmanager
+    def _file_lock(self, operation: int):
+        """flock em `<path>.lock`: compartilhado nos anexos, exclusivo na compactação."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(f"{self.path}.lock", "a") as lock:
+            fcntl.flock(lock, operation)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+    
+    def _read_blocks(self) -> Dict[int, Set[int]]:
+        """
+        Lê os blocos do arquivo. Um bloco final incompleto (worker
+        interrompido no meio de um anexo) é ignorado.
+        """
+        days: Dict[int, Set[int]] = {}
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return days
+        
+        offset = 0
+        itemsize = array("Q").itemsize
+        while offset + _BLOCK_HEADER.size <= len(data):
+            day, count = _BLOCK_HEADER.unpack_from(data, offset)
+            end = offset + _BLOCK_HEADER.size + count * itemsize
+            if end > len(data):
+                break
+            keys = array("Q")
+            keys.frombytes(data[offset + _BLOCK_HEADER.size:end])
+            days.setdefault(day, set()).update(keys)
+            offset = end
+        
+        if offset < len(data):
+            logger.warning(
+                f"Índice de chaves conhecidas com bloco incompleto; "
+                f"{len(data) - offset} bytes ignorados"
+            )
+        return days
+    
+    def _load(self):
+        if not self.path:
+            return
+        
+        try:
+            with self._file_lock(fcntl.LOCK_SH):
+                self._days = self._read_blocks()
+        except OSError:
+            return
+        self._expire()
+    
+    def _expire(self):
+        oldest = today() - self.retention_days
+        for day in [day for day in self._days if day < oldest]:
+            del self._days[day]
+
+
+_index: Optional[KnownKeys] = None
+_index_lock = threading.Lock()
+
+
+def get_known_keys() -> Optional[KnownKeys]:
+    """
+    Retorna o índice de chaves conhecidas do processo, ou None se desativado.
+    
+    Ativado por Config.KNOWN_KEYS_ENABLED; sem KNOWN_KEYS_PATH o índice fica
+    só em memória.
+    """
+    global _index
+    
+    if not Config.KNOWN_KEYS_ENABLED:
+        return None
+    
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = KnownKeys(Config.KNOWN_KEYS_PATH, Config.KNOWN_KEYS_WARM_DAYS)
+    return _index
+
+
+def _reset_after_fork():
+    global _index, _index_lock
+    _index = None
+    _index_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,137 @@
+"""
+Montagem colunar (Arrow/Parquet) dos lotes enviados ao BigQuery.
+"""
+import io
+from datetime import datetime, timezone
+from decimal import Decimal
+from operator import attrgetter
+from typing import Dict, List, Optional
+from app.models.promotion import Promotion
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - depende do ambiente
+    pa = None
+
+
+def is_available() -> bool:
+    """Indica se o pyarrow está instalado."""
+    return pa is not None
+
+
+def arrow_schema():
+    """Schema Arrow equivalente a TEMP_TABLE_SCHEMA (NUMERIC como decimal128(38, 9))."""
+    numeric = pa.decimal128(38, 9)
+    return pa.schema([
+        pa.field("marketplace", pa.string()),
+        pa.field("item_id", pa.string()),
+        pa.field("url", pa.string()),
+        pa.field("title", pa.string()),
+        pa.field("price", numeric),
+        pa.field("original_price", numeric),
+        pa.field("discount_percent", pa.float64()),
+        pa.field("seller", pa.string()),
+        pa.field("image_url", pa.string()),
+        pa.field("source", pa.string()),
+        pa.field("dedupe_key", pa.string()),
+        pa.field("execution_id", pa.string()),
+        pa.field("collected_at", pa.timestamp("us", tz="UTC")),
+    ])
+
+
+def _to_utc(value) -> datetime:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _values(rows: List[Dict], name: str, default=None) -> List:
+    """Valores de uma coluna; lotes só de Promotion são lidos por atributo."""
+    if {type(r) for r in rows} == {Promotion}:
+        return list(map(attrgetter(name), rows))
+    return [r.get(name, default) for r in rows]
+
+
+def _numeric_column(values: List, default: Optional[float], numeric):
+    """
+    Coluna NUMERIC montada a partir do texto do float (`repr`), como no JSON.
+    
+    Converter o float64 direto para decimal128 preservaria o erro binário
+    (99999999.99 viraria 99999999.989999995); o texto mais curto do float é o
+    mesmo valor que o BigQuery lê do JSON.
+    """
+    scale = Decimal(1).scaleb(-numeric.scale)
+    column = []
+    for value in values:
+        if value is None:
+            value = default
+        column.append(None if value is None else Decimal(repr(float(value))).quantize(scale))
+    return pa.array(column, numeric)
+
+
+def _string_column(rows: List[Dict], name: str, default: str) -> List[Optional[str]]:
+    return [str(value) for value in _values(rows, name, default)]
+
+
+def build_promotions_table(rows: List[Dict], execution_id: str):
+    """
+    Monta o lote como uma pa.Table, coluna a coluna, com os mesmos valores
+    padrão de `format_promotion_rows`.
+    
+    Args:
+        rows: Promoções normalizadas
+        execution_id: ID da execução
+    
+    Returns:
+        pa.Table com o schema de `arrow_schema()`
+    """
+    schema = arrow_schema()
+    numeric = schema.field("price").type
+    default_collected_at = datetime.now(timezone.utc)
+    
+    prices = _values(rows, "price")
+    original_prices = _values(rows, "original_price")
+    discounts = _values(rows, "discount_percent")
+    
+    columns = [
+        _string_column(rows, "marketplace", "mercadolivre"),
+        _string_column(rows, "item_id", ""),
+        _string_column(rows, "url", ""),
+        _string_column(rows, "title", ""),
+        _numeric_column(prices, 0.0, numeric),
+        _numeric_column(original_prices, None, numeric),
+        pa.array([0.0 if d is None else float(d) for d in discounts], pa.float64()),
+        _string_column(rows, "seller", "Mercado Livre"),
+        _string_column(rows, "image_url", ""),
+        _string_column(rows, "source", ""),
+        _string_column(rows, "dedupe_key", ""),
+        pa.repeat(pa.scalar(str(execution_id)), len(rows)) if rows else pa.array([], pa.string()),
+        pa.array(
+            [_to_utc(r["collected_at"]) if r.get("collected_at") else default_collected_at
+             for r in rows],
+            schema.field("collected_at").type,
+        ),
+    ]
+    
+    return pa.Table.from_arrays(
+        [column if isinstance(column, pa.Array) else pa.array(column, pa.string())
+         for column in columns],
+        schema=schema,
+    )
+
+
+def min_collected_at(table) -> datetime:
+    """Menor collected_at do lote."""
+    return pc.min(table.column("collected_at")).as_py()
+
+
+def to_parquet(table) -> io.BytesIO:
+    """Serializa a tabela em Parquet (Snappy) em memória, pronto para upload."""
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer, compression="snappy")
+    buffer.seek(0)
+    return buffer
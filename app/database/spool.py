@@ -0,0 +1,351 @@
+"""
+Spool local (write-ahead) dos lotes gravados no BigQuery.
+"""
+import gzip
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+from app.config import Config
+from app.models.promotion import to_json_dict
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+PENDING_SUFFIX = ".jsonl.gz"
+INFLIGHT_SUFFIX = ".jsonl.gz.inflight"
+
+
+class Spool:
+    """
+    Segmentos append-only de lotes normalizados, em JSONL comprimido.
+    
+    Cada lote vira um segmento `<timestamp>-<pid>-<id>.jsonl.gz`, com o
+    execution_id e o horário da coleta na primeira linha, gravado com fsync
+    antes de seguir para o BigQuery. O segmento só é removido (`ack`) depois de uma gravação
+    bem-sucedida.
+    
+    Um segmento em uso é renomeado para `.inflight`; como o rename é
+    atômico, só um worker processa cada segmento. Se a gravação falhar,
+    `release` devolve o segmento à fila, e segmentos `.inflight` de workers
+    que morreram voltam à fila após `stale_after` segundos.
+    """
+    
+    def __init__(self, directory: str, stale_after: float = 600):
+        """
+        Args:
+            directory: Diretório do spool (criado se não existir)
+            stale_after: Segundos após os quais um segmento em uso é considerado abandonado
+        """
+        self.directory = directory
+        self.stale_after = stale_after
+        os.makedirs(directory, exist_ok=True)
+    
+    def write(self, rows: List[Dict], execution_id: str,
+              collected_at: Optional[str] = None) -> str:
+        """
+        Grava um lote em um novo segmento já reservado (`.inflight`).
+        
+        Args:
+            rows: Promoções normalizadas
+            execution_id: ID da execução
+            collected_at: Horário da coleta (ISO 8601, UTC); padrão é o atual
+        
+        Returns:
+            Caminho do segmento reservado
+        """
+        name = f"{time.time_ns()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        path = os.path.join(self.directory, name + INFLIGHT_SUFFIX)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        
+        with open(tmp_path, "wb") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=1) as f:
+                header = {
+                    "execution_id": execution_id,
+                    "rows": len(rows),
+                    "collected_at": collected_at or datetime.utcnow().isoformat(),
+                }
+                f.write(json.dumps(header).encode("utf-8") + b"\n")
+                for row in rows:
+                    f.write(json.dumps(to_json_dict(row), ensure_ascii=False).encode("utf-8"))
+                    f.write(b"\n")
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(tmp_path, path)
+        self._fsync_directory()
+        return path
+    
+    def read(self, path: str) -> Tuple[str, List[Dict]]:
+        """
+        Retorna o execution_id e as linhas de um segmento.
+        
+        As linhas recebem o collected_at do segmento, para que a regravação
+        mantenha o horário da coleta e não o da nova tentativa.
+        """
+        with gzip.open(path, "rb") as f:
+            header = json.loads(f.readline())
+            rows = [json.loads(line) for line in f if line.strip()]
+        if len(rows) != header["rows"]:
+            raise ValueError(f"segmento incompleto ({len(rows)} de {header['rows']} linhas)")
+        collected_at = header.get("collected_at")
+        if collected_at:
+            for row in rows:
+                row.setdefault("collected_at", collected_at)
+        return header["execution_id"], rows
+    
+    def pending(self) -> List[str]:
+        """Segmentos à espera de gravação, do mais antigo ao mais novo."""
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        return [
+            os.path.join(self.directory, name)
+            for name in sorted(names)
+            if name.endswith(PENDING_SUFFIX)
+        ]
+    
+    def claim(self, path: str) -> Optional[str]:
+        """Reserva um segmento pendente; retorna None se outro worker o pegou."""
+        inflight = path[:-len(PENDING_SUFFIX)] + INFLIGHT_SUFFIX
+        try:
+            os.rename(path, inflight)
+            # O mtime marca o início da reserva (ver recover_stale)
+            os.utime(inflight)
+        except FileNotFoundError:
+            return None
+        return inflight
+    
+    def release(self, inflight: str):
+        """Devolve um segmento reservado à fila de pendentes."""
+        try:
+            os.rename(inflight, inflight[:-len(INFLIGHT_SUFFIX)] + PENDING_SUFFIX)
+        except FileNotFoundError:
+            pass
+    
+    def ack(self, inflight: str):
+        """Remove um segmento cuja gravação foi confirmada."""
+        try:
+            os.remove(inflight)
+        except FileNotFoundError:
+            pass
+    
+    def quarantine(self, inflight: str):
+        """Tira da fila um segmento ilegível, mantendo-o para análise."""
+        try:
+            os.rename(inflight, inflight[:-len(INFLIGHT_SUFFIX)] + ".corrupt")
+        except FileNotFoundError:
+            pass
+    
+    def recover_stale(self):
+        """Devolve à fila os segmentos reservados há mais de `stale_after` segundos."""
+        limit = time.time() - self.stale_after
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            if not name.endswith(INFLIGHT_SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                if os.path.getmtime(path) < limit:
+                    logger.warning(f"Segmento abandonado devolvido ao spool: {name}")
+                    self.release(path)
+            except OSError:
+                continue
+    
+    def _fsync_directory(self):
+        try:
+            fd = os.open(self.directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+
+class SpoolFlusher:
+    """
+    Thread de fundo que regrava no BigQuery os segmentos pendentes do spool.
+    
+    Segmentos da mesma execução são agrupados em lotes de até `batch_size`
+    linhas, com no máximo 4 lotes reservados por varredura. Em caso de erro, os segmentos voltam à fila e a próxima
+    tentativa espera o dobro do intervalo (até 10x).
+    """
+    
+    def __init__(self, spool: Spool, write: Callable[[List[Dict], str], Tuple[int, int]],
+                 interval: float, batch_size: int,
+                 on_replayed: Optional[Callable[[], None]] = None):
+        """
+        Args:
+            spool: Spool de origem
+            write: Função (linhas, execution_id) -> (inseridos, duplicados)
+            interval: Segundos entre varreduras do spool
+            batch_size: Máximo de linhas por gravação
+            on_replayed: Callback chamado após gravar algum segmento
+        """
+        self.spool = spool
+        self.write = write
+        self.interval = interval
+        self.batch_size = max(1, batch_size)
+        self.on_replayed = on_replayed
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self):
+        """Inicia a thread de fundo (idempotente)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="spool-flusher", daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: float = 5):
+        """Sinaliza a parada e aguarda a thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+    
+    def flush_once(self) -> int:
+        """
+        Grava os segmentos pendentes uma vez.
+        
+        Returns:
+            Número de linhas regravadas
+        
+        Raises:
+            Exception: Erro de gravação (os segmentos do lote voltam à fila)
+        """
+        self.spool.recover_stale()
+        
+        groups: Dict[str, List[Tuple[str, List[Dict]]]] = {}
+        claimed_rows = 0
+        for path in self.spool.pending():
+            if claimed_rows >= self.batch_size * 4:
+                break
+            inflight = self.spool.claim(path)
+            if inflight is None:
+                continue
+            try:
+                execution_id, rows = self.spool.read(inflight)
+            except (OSError, ValueError, KeyError, EOFError) as e:
+                logger.error(f"Segmento do spool ilegível, mantido para análise: {inflight} ({str(e)})")
+                self.spool.quarantine(inflight)
+                continue
+            groups.setdefault(execution_id, []).append((inflight, rows))
+            claimed_rows += len(rows)
+        
+        replayed = 0
+        try:
+            for execution_id, segments in groups.items():
+                while segments:
+                    batch_segments = [segments.pop(0)]
+                    rows = list(batch_segments[0][1])
+                    while segments and len(rows) + len(segments[0][1]) <= self.batch_size:
+                        segment = segments.pop(0)
+                        batch_segments.append(segment)
+                        rows.extend(segment[1])
+                    
+                    try:
+                        inserted, deduplicated = self.write(rows, execution_id)
+                    except Exception:
+                        for inflight, _ in batch_segments:
+                            self.spool.release(inflight)
+                        raise
+                    
+                    for inflight, _ in batch_segments:
+                        self.spool.ack(inflight)
+                    replayed += len(rows)
+                    logger.info(
+                        f"Spool regravado para {execution_id}: {len(rows)} itens, "
+                        f"{inserted} inseridos, {deduplicated} duplicados"
+                    )
+        finally:
+            # Segmentos não processados após um erro voltam à fila
+            for segments in groups.values():
+                for inflight, _ in segments:
+                    self.spool.release(inflight)
+        
+        if replayed and self.on_replayed is not None:
+            self.on_replayed()
+        return replayed
+    
+    def _run(self):
+        delay = self.interval
+        while not self._stop.wait(delay):
+            try:
+                self.flush_once()
+                delay = self.interval
+            except Exception as e:
+                delay = min(delay * 2, self.interval * 10)
+                logger.warning(f"Erro ao regravar spool, nova tentativa em {delay:.0f}s: {str(e)}")
+
+
+_spool: Optional[Spool] = None
+_flusher: Optional[SpoolFlusher] = None
+_spool_lock = threading.Lock()
+
+
+def get_spool() -> Optional[Spool]:
+    """
+    Retorna o spool do processo, ou None se desativado.
+    
+    Ativado quando Config.SPOOL_DIR está definido.
+    """
+    global _spool
+    
+    if not Config.SPOOL_DIR:
+        return None
+    
+    if _spool is None or _spool.directory != Config.SPOOL_DIR:
+        with _spool_lock:
+            if _spool is None or _spool.directory != Config.SPOOL_DIR:
+                _spool = Spool(Config.SPOOL_DIR)
+    return _spool
+
+
+def start_spool_flusher() -> Optional[SpoolFlusher]:
+    """Inicia o flusher do spool do processo, se o spool estiver ativo."""
+    global _flusher
+    
+    spool = get_spool()
+    if spool is None:
+        return None
+    
+    with _spool_lock:
+        if _flusher is None:
+            from app.database.bigquery_client import get_bigquery_client
+            from app.database.stats_cache import get_stats_cache
+            
+            _flusher = SpoolFlusher(
+                spool,
+                write=lambda rows, execution_id: get_bigquery_client().write_promotions(rows, execution_id),
+                interval=Config.SPOOL_FLUSH_INTERVAL,
+                batch_size=Config.SPOOL_REPLAY_BATCH_SIZE,
+                on_replayed=lambda: get_stats_cache().invalidate(),
+            )
+        _flusher.start()
+    return _flusher
+
+
+def stop_spool_flusher():
+    """Para o flusher do spool do processo, se estiver rodando."""
+    if _flusher is not None:
+        _flusher.stop()
+
+
+def _reset_after_fork():
+    global _spool, _flusher, _spool_lock
+    _spool = None
+    _flusher = None
+    _spool_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
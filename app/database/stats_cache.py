@@ -0,0 +1,169 @@
+"""
+Cache das estatísticas de /stats com TTL e stale-while-revalidate.
+"""
+import copy
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+from app.config import Config
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def format_stats(aggregates: Dict) -> Dict:
+    """Converte os agregados no formato de resposta de /stats."""
+    discount_count = aggregates.get("discount_count") or 0
+    avg_discount = aggregates["discount_sum"] / discount_count if discount_count else 0
+    
+    return {
+        "executions": aggregates["executions"],
+        "total_items": aggregates["total_items"],
+        "unique_items": aggregates["unique_items"],
+        "by_source": dict(aggregates["by_source"]),
+        "avg_discount_percent": float(avg_discount),
+    }
+
+
+class StatsCache:
+    """
+    Mantém os agregados de /stats em memória.
+    
+    - Dentro do TTL, responde direto do cache.
+    - Vencido há menos de `stale_ttl`, responde o valor antigo e dispara a
+      atualização em segundo plano (stale-while-revalidate).
+    - Sem valor utilizável, consulta o BigQuery na própria requisição, com
+      uma única consulta em andamento por vez.
+    
+    Ao fim de cada coleta, `apply_run` soma os contadores da execução aos
+    agregados e marca o valor como vencido para revalidação.
+    """
+    
+    def __init__(self, loader: Callable[[], Dict], ttl: float, stale_ttl: float):
+        """
+        Args:
+            loader: Função que consulta os agregados no BigQuery
+            ttl: Segundos em que o valor é considerado atual
+            stale_ttl: Segundos adicionais em que o valor vencido ainda é servido
+        """
+        self.loader = loader
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._aggregates: Optional[Dict] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._refreshing = False
+    
+    def get(self) -> Dict:
+        """Retorna as estatísticas no formato de /stats."""
+        with self._lock:
+            aggregates = self._aggregates
+            age = time.monotonic() - self._loaded_at
+        
+        if aggregates is not None and age < self.ttl:
+            return format_stats(aggregates)
+        
+        if aggregates is not None and age < self.ttl + self.stale_ttl:
+            self._refresh_in_background()
+            return format_stats(aggregates)
+        
+        return format_stats(self._load())
+    
+    def invalidate(self):
+        """Marca o valor atual como vencido; a próxima leitura o revalida."""
+        with self._lock:
+            self._loaded_at = min(self._loaded_at, time.monotonic() - self.ttl)
+    
+    def apply_run(self, run: Dict):
+        """
+        Incorpora os contadores de uma coleta aos agregados em cache.
+        
+        Só execuções que inseriram linhas entram nos contadores: uma coleta sem
+        inserções não aparece em COUNT(DISTINCT execution_id) no BigQuery, então
+        nesse caso o cache apenas é marcado como vencido. Execuções e itens
+        inseridos são somados sempre. Contagem por fonte e
+        desconto médio só são somados quando todos os itens normalizados da
+        execução foram inseridos (sem duplicados nem lotes no spool), pois
+        só então os valores são exatos. Itens
+        únicos dependem do histórico e ficam para a revalidação.
+        
+        Args:
+            run: Contadores da execução (ver CollectionPipeline.summary)
+        """
+        with self._lock:
+            if self._aggregates is not None and run.get("items_inserted", 0) > 0:
+                aggregates = copy.deepcopy(self._aggregates)
+                aggregates["executions"] += 1
+                aggregates["total_items"] += run.get("items_inserted", 0)
+                
+                if run.get("items_deduplicated", 0) == 0 and not run.get("items_spooled"):
+                    by_source = aggregates["by_source"]
+                    for source, count in (run.get("normalized_by_source") or {}).items():
+                        by_source[source] = by_source.get(source, 0) + count
+                    aggregates["discount_sum"] += run.get("discount_sum", 0.0)
+                    aggregates["discount_count"] += run.get("discount_count", 0)
+                
+                self._aggregates = aggregates
+        
+        self.invalidate()
+    
+    def _load(self) -> Dict:
+        """Consulta os agregados, evitando consultas simultâneas duplicadas."""
+        with self._load_lock:
+            with self._lock:
+                if self._aggregates is not None and time.monotonic() - self._loaded_at < self.ttl:
+                    return self._aggregates
+            
+            aggregates = self.loader()
+            with self._lock:
+                self._aggregates = aggregates
+                self._loaded_at = time.monotonic()
+            return aggregates
+    
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        
+        def refresh():
+            try:
+                self._load()
+            except Exception as e:
+                logger.warning(f"Erro ao revalidar estatísticas: {str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing = False
+        
+        threading.Thread(target=refresh, name="stats-refresh", daemon=True).start()
+
+
+_cache: Optional[StatsCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_stats_cache() -> StatsCache:
+    """Retorna o cache de estatísticas do processo."""
+    global _cache
+    
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                from app.database.bigquery_client import get_bigquery_client
+                _cache = StatsCache(
+                    loader=lambda: get_bigquery_client().query_stats(),
+                    ttl=Config.STATS_CACHE_TTL,
+                    stale_ttl=Config.STATS_STALE_TTL,
+                )
+    return _cache
+
+
+def _reset_after_fork():
+    global _cache, _cache_lock
+    _cache = None
+    _cache_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
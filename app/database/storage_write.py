@@ -0,0 +1,244 @@
+"""
+Gravação de promoções pela BigQuery Storage Write API.
+"""
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+from google.protobuf import descriptor_pb2, descriptor_pool, message_factory
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+_FIELD = descriptor_pb2.FieldDescriptorProto
+
+# Colunas da tabela promotions e o tipo proto usado na Storage Write API.
+# NUMERIC é enviado como texto e TIMESTAMP como microssegundos desde a época.
+PROTO_FIELDS = [
+    ("marketplace", _FIELD.TYPE_STRING),
+    ("item_id", _FIELD.TYPE_STRING),
+    ("url", _FIELD.TYPE_STRING),
+    ("title", _FIELD.TYPE_STRING),
+    ("price", _FIELD.TYPE_STRING),
+    ("original_price", _FIELD.TYPE_STRING),
+    ("discount_percent", _FIELD.TYPE_DOUBLE),
+    ("seller", _FIELD.TYPE_STRING),
+    ("image_url", _FIELD.TYPE_STRING),
+    ("source", _FIELD.TYPE_STRING),
+    ("dedupe_key", _FIELD.TYPE_STRING),
+    ("execution_id", _FIELD.TYPE_STRING),
+    ("collected_at", _FIELD.TYPE_INT64),
+    ("inserted_at", _FIELD.TYPE_INT64),
+]
+
+# Linhas por AppendRows (bem abaixo do limite de 10 MB por requisição)
+MAX_ROWS_PER_APPEND = 500
+
+
+def build_descriptor() -> descriptor_pb2.DescriptorProto:
+    """Monta o descritor proto2 da linha de promoção."""
+    descriptor = descriptor_pb2.DescriptorProto(name="PromotionRow")
+    for number, (name, field_type) in enumerate(PROTO_FIELDS, start=1):
+        descriptor.field.add(
+            name=name,
+            number=number,
+            type=field_type,
+            label=_FIELD.LABEL_OPTIONAL,
+        )
+    return descriptor
+
+
+def build_message_class(descriptor: descriptor_pb2.DescriptorProto):
+    """Cria a classe de mensagem a partir do descritor, em um pool isolado."""
+    file_proto = descriptor_pb2.FileDescriptorProto(
+        name="promotion_row.proto", package="promozone", syntax="proto2"
+    )
+    file_proto.message_type.add().CopyFrom(descriptor)
+    
+    pool = descriptor_pool.DescriptorPool()
+    pool.Add(file_proto)
+    return message_factory.GetMessageClass(pool.FindMessageTypeByName("promozone.PromotionRow"))
+
+
+def to_micros(value) -> int:
+    """Converte datetime ou texto ISO 8601 em microssegundos UTC desde a época."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * 1_000_000)
+
+
+def to_numeric(value) -> Optional[str]:
+    """Formata um preço como texto decimal aceito pela coluna NUMERIC."""
+    return None if value is None else f"{float(value):.9f}"
+
+
+class BigQueryWriteStream:
+    """
+    Adaptador de um write stream da Storage Write API.
+    
+    - `pending`: cria um stream por lote; as linhas só ficam visíveis no
+      `commit` (finalize + batch commit), então o lote entra inteiro ou não entra.
+    - `committed`: usa o stream `_default`; cada append fica visível na hora,
+      com semântica at-least-once.
+    """
+    
+    def __init__(self, client, table_path: str, mode: str,
+                 descriptor: descriptor_pb2.DescriptorProto):
+        from google.cloud.bigquery_storage_v1 import types, writer
+        
+        self._types = types
+        self.client = client
+        self.table_path = table_path
+        self.mode = mode
+        self.offset = 0
+        self._futures = []
+        
+        if mode == "pending":
+            stream = client.create_write_stream(
+                parent=table_path,
+                write_stream=types.WriteStream(type_=types.WriteStream.Type.PENDING),
+            )
+            self.stream_name = stream.name
+        else:
+            self.stream_name = f"{table_path}/streams/_default"
+        
+        template = types.AppendRowsRequest(
+            write_stream=self.stream_name,
+            proto_rows=types.AppendRowsRequest.ProtoData(
+                writer_schema=types.ProtoSchema(proto_descriptor=descriptor)
+            ),
+        )
+        self._append_stream = writer.AppendRowsStream(client, template)
+    
+    def append(self, serialized_rows: List[bytes]):
+        """Envia um bloco de linhas serializadas sem esperar a confirmação."""
+        request = self._types.AppendRowsRequest(
+            proto_rows=self._types.AppendRowsRequest.ProtoData(
+                rows=self._types.ProtoRows(serialized_rows=serialized_rows)
+            )
+        )
+        if self.mode == "pending":
+            # Offsets explícitos fazem o servidor rejeitar reenvios duplicados
+            request.offset = self.offset
+        self.offset += len(serialized_rows)
+        self._futures.append(self._append_stream.send(request))
+    
+    def commit(self):
+        """Aguarda os appends e, no modo pending, efetiva o stream."""
+        for future in self._futures:
+            future.result()
+        self._futures = []
+        self._append_stream.close()
+        
+        if self.mode == "pending":
+            self.client.finalize_write_stream(name=self.stream_name)
+            response = self.client.batch_commit_write_streams(
+                self._types.BatchCommitWriteStreamsRequest(
+                    parent=self.table_path, write_streams=[self.stream_name]
+                )
+            )
+            if response.stream_errors:
+                raise RuntimeError(f"Falha no commit do write stream: {response.stream_errors}")
+    
+    def close(self):
+        """Fecha a conexão; um stream pending não efetivado é descartado."""
+        self._append_stream.close()
+
+
+StreamFactory = Callable[[str, str, descriptor_pb2.DescriptorProto], object]
+
+
+class StorageWriteSink:
+    """
+    Grava promoções com appends na Storage Write API, sem tabela temporária,
+    job de carga ou MERGE.
+    
+    A tabela passa a ser append-only: a deduplicação por dedupe_key fica na
+    view `promotions_dedup` (ver infra/create_tables.py) e nas consultas de
+    estatísticas.
+    """
+    
+    def __init__(self, table_path: str, mode: str = "pending",
+                 stream_factory: Optional[StreamFactory] = None):
+        """
+        Args:
+            table_path: projects/<projeto>/datasets/<dataset>/tables/<tabela>
+            mode: "pending" (lote atômico) ou "committed" (stream padrão)
+            stream_factory: Função (table_path, mode, descriptor) que abre um
+                write stream; padrão: BigQueryWriteStream com o cliente do processo
+        """
+        self.table_path = table_path
+        self.mode = mode
+        self.descriptor = build_descriptor()
+        self.message_class = build_message_class(self.descriptor)
+        self.stream_factory = stream_factory or _open_bigquery_stream
+    
+    def serialize(self, row: Dict, inserted_at: datetime) -> bytes:
+        """Serializa uma linha já formatada para o merge como mensagem proto."""
+        message = self.message_class()
+        for name, _ in PROTO_FIELDS:
+            if name == "inserted_at":
+                message.inserted_at = to_micros(inserted_at)
+                continue
+            value = row.get(name)
+            if value is None:
+                continue
+            if name in ("price", "original_price"):
+                value = to_numeric(value)
+            elif name == "collected_at":
+                value = to_micros(value)
+            setattr(message, name, value)
+        return message.SerializeToString()
+    
+    def write(self, rows: List[Dict], inserted_at: datetime) -> int:
+        """
+        Envia as linhas em um write stream e o efetiva.
+        
+        Args:
+            rows: Linhas no formato de `format_promotion_rows`
+            inserted_at: Valor de inserted_at das linhas
+        
+        Returns:
+            Número de linhas gravadas
+        """
+        if not rows:
+            return 0
+        
+        serialized = [self.serialize(row, inserted_at) for row in rows]
+        stream = self.stream_factory(self.table_path, self.mode, self.descriptor)
+        try:
+            for start in range(0, len(serialized), MAX_ROWS_PER_APPEND):
+                stream.append(serialized[start:start + MAX_ROWS_PER_APPEND])
+            stream.commit()
+        finally:
+            stream.close()
+        
+        return len(serialized)
+
+
+_write_client = None
+_write_client_lock = threading.Lock()
+
+
+def _open_bigquery_stream(table_path: str, mode: str,
+                          descriptor: descriptor_pb2.DescriptorProto) -> BigQueryWriteStream:
+    global _write_client
+    
+    if _write_client is None:
+        with _write_client_lock:
+            if _write_client is None:
+                from google.cloud import bigquery_storage_v1
+                _write_client = bigquery_storage_v1.BigQueryWriteClient()
+    return BigQueryWriteStream(_write_client, table_path, mode, descriptor)
+
+
+def _reset_after_fork():
+    global _write_client, _write_client_lock
+    _write_client = None
+    _write_client_lock = threading.Lock()
+
+
+# Canais gRPC herdados do processo pai não são seguros no filho
+os.register_at_fork(after_in_child=_reset_after_fork)
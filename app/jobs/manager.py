@@ -0,0 +1,218 @@
+"""
+Execução de coletas em segundo plano com acompanhamento de status.
+"""
+import json
+import os
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Optional
+from app.config import Config
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class JobStore:
+    """
+    Status das coletas em arquivos JSON, um por execution_id.
+    
+    Os arquivos ficam em um diretório local compartilhado pelos workers do
+    gunicorn, então qualquer worker responde ao GET de uma coleta iniciada
+    por outro. As gravações são atômicas (arquivo temporário + os.replace).
+    """
+    
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+    
+    def _path(self, execution_id: str) -> str:
+        # Aceita apenas UUIDs para não montar caminhos a partir da URL
+        return os.path.join(self.directory, f"{uuid.UUID(execution_id)}.json")
+    
+    def get(self, execution_id: str) -> Optional[Dict]:
+        """Retorna o status da coleta ou None se não existir."""
+        try:
+            with open(self._path(execution_id), "rb") as f:
+                return json.loads(f.read())
+        except (ValueError, OSError):
+            return None
+    
+    def save(self, job: Dict):
+        """Grava o status completo da coleta."""
+        path = self._path(job["execution_id"])
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(job, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    
+    def update(self, execution_id: str, **fields) -> Dict:
+        """Atualiza campos do status da coleta."""
+        job = self.get(execution_id) or {"execution_id": execution_id}
+        job.update(fields)
+        job["updated_at"] = datetime.utcnow().isoformat()
+        self.save(job)
+        return job
+
+
+class JobManager:
+    """
+    Fila limitada de coletas executadas por um pool de threads.
+    
+    Até `max_workers` coletas rodam ao mesmo tempo e até `max_pending`
+    ficam aguardando; acima disso novas coletas são recusadas.
+    """
+    
+    def __init__(self, run: Callable, store: JobStore, max_workers: int, max_pending: int):
+        """
+        Args:
+            run: Função `run(execution_id, on_progress) -> resultado`
+            store: Armazenamento de status
+            max_workers: Coletas simultâneas
+            max_pending: Coletas na fila, incluindo as em execução
+        """
+        self.run = run
+        self.store = store
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, max_workers),
+            thread_name_prefix="collect-job"
+        )
+        self._pending = 0
+        # Futures ainda não concluídos, por execution_id
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+    
+    def submit(self, execution_id: str) -> Optional[Dict]:
+        """
+        Enfileira uma coleta.
+        
+        Returns:
+            Status inicial da coleta ou None se a fila estiver cheia
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                return None
+            self._pending += 1
+        
+        job = self.store.update(
+            execution_id,
+            status="queued",
+            created_at=datetime.utcnow().isoformat(),
+            progress={},
+        )
+        
+        try:
+            future = self._executor.submit(self._execute, execution_id)
+        except RuntimeError:
+            with self._lock:
+                self._pending -= 1
+            raise
+        
+        with self._lock:
+            self._futures[execution_id] = future
+        future.add_done_callback(lambda f: self._on_done(execution_id, f))
+        return job
+    
+    def _on_done(self, execution_id: str, future: Future):
+        with self._lock:
+            self._futures.pop(execution_id, None)
+            if not future.cancelled():
+                return
+            # Cancelada na fila: _execute não rodou
+            self._pending -= 1
+        
+        self.store.update(
+            execution_id,
+            status="cancelled",
+            finished_at=datetime.utcnow().isoformat(),
+            result={"execution_id": execution_id, "status": "cancelled",
+                    "error": "Coleta cancelada no encerramento do worker"}
+        )
+    
+    def _execute(self, execution_id: str):
+        try:
+            self.store.update(
+                execution_id,
+                status="running",
+                started_at=datetime.utcnow().isoformat()
+            )
+            
+            def on_progress(progress: Dict):
+                self.store.update(execution_id, progress=progress)
+            
+            result = self.run(execution_id, on_progress)
+            self.store.update(
+                execution_id,
+                status=result.get("status", "success"),
+                finished_at=datetime.utcnow().isoformat(),
+                result=result
+            )
+        except Exception as e:
+            logger.error(f"Erro na coleta em segundo plano {execution_id}: {str(e)}", exc_info=True)
+            self.store.update(
+                execution_id,
+                status="error",
+                finished_at=datetime.utcnow().isoformat(),
+                result={"execution_id": execution_id, "status": "error", "error": str(e)}
+            )
+        finally:
+            with self._lock:
+                self._pending -= 1
+    
+    def shutdown(self, wait: bool = False):
+        """
+        Encerra o pool de threads.
+        
+        Coletas ainda na fila são canceladas e ficam com status "cancelled".
+        Sem `wait`, as que estão rodando são marcadas como erro: se o worker
+        for morto antes do fim, o status não fica preso em "running"; se
+        terminarem, o resultado final sobrescreve a marcação.
+        """
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        
+        if not wait:
+            with self._lock:
+                running = [eid for eid, future in self._futures.items() if not future.done()]
+            for execution_id in running:
+                self.store.update(
+                    execution_id,
+                    status="error",
+                    finished_at=datetime.utcnow().isoformat(),
+                    result={"execution_id": execution_id, "status": "error",
+                            "error": "Coleta interrompida pelo encerramento do worker"}
+                )
+            return
+        
+        self._executor.shutdown(wait=True)
+
+
+_manager: Optional[JobManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    """Retorna o gerenciador de coletas do processo, criando-o na primeira chamada."""
+    global _manager
+    
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                from app.pipeline.collection import run_collection
+                _manager = JobManager(
+                    run=run_collection,
+                    store=JobStore(Config.JOB_STATE_DIR),
+                    max_workers=Config.JOB_WORKERS,
+                    max_pending=Config.JOB_QUEUE_SIZE,
+                )
+    return _manager
+
+
+def _reset_after_fork():
+    global _manager, _manager_lock
+    _manager = None
+    _manager_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
@@ -1,15 +1,16 @@
 """
 Aplicação Flask principal.
 """
-from flask import Flask, jsonify, request
-from datetime import datetime
+from flask import Flask, Response, jsonify, request
 import uuid
-import asyncio
 from app.config import Config
-from app.scrapers.mercadolivre import MercadoLivreScraper
-from app.normalizers.promotion_normalizer import PromotionNormalizer
-from app.database.bigquery_client import BigQueryClient
+from app.database.bigquery_client import get_bigquery_client
+from app.database.spool import start_spool_flusher
+from app.database.stats_cache import get_stats_cache
+from app.jobs.manager import get_job_manager
+from app.pipeline.collection import run_collection
 from app.utils.logger import setup_logger
+from app.utils.metrics import render_metrics
 
 logger = setup_logger(__name__)
 
@@ -21,11 +22,16 @@ def create_app():
     
     # Inicializa BigQuery
     try:
-        bq_client = BigQueryClient()
+        bq_client = get_bigquery_client()
         bq_client.ensure_tables_exist()
+        if bq_client.known_keys is not None:
+            bq_client.known_keys.warm_in_background(bq_client.query_recent_dedupe_keys)
     except Exception as e:
         logger.error(f"Erro ao inicializar BigQuery: {str(e)}")
     
+    # Regrava em segundo plano os lotes que ficaram no spool
+    start_spool_flusher()
+    
     @app.route("/health", methods=["GET"])
     def health():
         """Endpoint de health check."""
@@ -36,146 +42,58 @@ def create_app():
         """
         Endpoint para coletar promoções.
         
-        Realiza o ciclo completo:
-        1. Scraping de múltiplas fontes
-        2. Normalização de dados
-        3. MERGE no BigQuery
-        4. Registro de logs
+        Por padrão executa a coleta completa dentro da requisição. Com
+        `?async=1`, enfileira a coleta em segundo plano e responde 202 com o
+        `execution_id`, cujo andamento é consultado em GET /collect/<id>.
         """
         execution_id = str(uuid.uuid4())
-        start_time = datetime.utcnow()
-        
-        logger.info(f"Iniciando coleta com execution_id: {execution_id}")
         
-        try:
-            # Scraping
-            scraper = MercadoLivreScraper()
-            scrape_results = asyncio.run(scraper.scrape_all())
-            
-            # Combina resultados de todas as fontes
-            all_items = []
-            items_collected = 0
-            
-            for source_name, items in scrape_results.items():
-                all_items.extend(items)
-                items_collected += len(items)
-            
-            logger.info(f"Coletados {items_collected} itens de {len(scrape_results)} fontes")
-            
-            # Normalização
-            normalized_items = PromotionNormalizer.normalize_items(all_items)
-            
-            # Persistência no BigQuery
-            bq_client = BigQueryClient()
-            items_inserted, items_deduplicated = bq_client.merge_promotions(
-                normalized_items,
-                execution_id
-            )
-            
-            # Logs
-            end_time = datetime.utcnow()
-            duration_seconds = (end_time - start_time).total_seconds()
-            
-            bq_client.log_execution(
-                execution_id=execution_id,
-                start_time=start_time,
-                end_time=end_time,
-                items_collected=items_collected,
-                items_inserted=items_inserted,
-                items_deduplicated=items_deduplicated,
-                status="success"
-            )
-            
-            logger.info(
-                f"Coleta finalizada com sucesso. "
-                f"Coletados: {items_collected}, "
-                f"Inseridos: {items_inserted}, "
-                f"Duplicados: {items_deduplicated}, "
-                f"Duração: {duration_seconds:.2f}s"
-            )
+        if request.args.get("async", "").lower() in ("1", "true"):
+            job = get_job_manager().submit(execution_id)
+            if job is None:
+                return jsonify({
+                    "status": "error",
+                    "error": "Fila de coletas cheia, tente novamente mais tarde",
+                }), 503
             
             return jsonify({
                 "execution_id": execution_id,
-                "status": "success",
-                "items_collected": items_collected,
-                "items_normalized": len(normalized_items),
-                "items_inserted": items_inserted,
-                "items_deduplicated": items_deduplicated,
-                "duration_seconds": duration_seconds,
-                "start_time": start_time.isoformat(),
-                "end_time": end_time.isoformat(),
-            }), 200
+                "status": job["status"],
+                "status_url": f"/collect/{execution_id}",
+            }), 202
         
-        except Exception as e:
-            end_time = datetime.utcnow()
-            duration_seconds = (end_time - start_time).total_seconds()
-            
-            logger.error(f"Erro durante coleta: {str(e)}", exc_info=True)
-            
-            # Registra erro nos logs
-            try:
-                bq_client = BigQueryClient()
-                bq_client.log_execution(
-                    execution_id=execution_id,
-                    start_time=start_time,
-                    end_time=end_time,
-                    items_collected=0,
-                    items_inserted=0,
-                    items_deduplicated=0,
-                    status="error",
-                    error_message=str(e)
-                )
-            except Exception as log_error:
-                logger.error(f"Erro ao registrar log de erro: {str(log_error)}")
-            
-            return jsonify({
-                "execution_id": execution_id,
-                "status": "error",
-                "error": str(e),
-                "duration_seconds": duration_seconds,
-            }), 500
+        result = run_collection(execution_id)
+        return jsonify(result), 200 if result["status"] == "success" else 500
+    
+    @app.route("/collect/<execution_id>", methods=["GET"])
+    def collect_status(execution_id):
+        """Endpoint para consultar o andamento de uma coleta assíncrona."""
+        job = get_job_manager().store.get(execution_id)
+        if job is None:
+            return jsonify({"error": "Coleta não encontrada"}), 404
+        return jsonify(job), 200
     
     @app.route("/stats", methods=["GET"])
     def stats():
         """Endpoint para obter estatísticas."""
         try:
-            bq_client = BigQueryClient()
-            
-            # Query para últimas 24h
-            query = f"""
-            SELECT
-                COUNT(DISTINCT execution_id) as executions,
-                COUNT(*) as total_items,
-                COUNT(DISTINCT item_id) as unique_items,
-                SUM(CASE WHEN source = 'daily_offers' THEN 1 ELSE 0 END) as daily_offers,
-                SUM(CASE WHEN source = 'technology' THEN 1 ELSE 0 END) as technology,
-                SUM(CASE WHEN source = 'electronics' THEN 1 ELSE 0 END) as electronics,
-                AVG(discount_percent) as avg_discount
-            FROM `{Config.GCP_PROJECT_ID}.{Config.BIGQUERY_DATASET}.{Config.BIGQUERY_TABLE}`
-            WHERE collected_at >= TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL 24 HOUR)
-            """
-            
-            query_job = bq_client.client.query(query)
-            results = query_job.result()
-            
-            row = next(results)
-            
-            return jsonify({
-                "executions": row.executions,
-                "total_items": row.total_items,
-                "unique_items": row.unique_items,
-                "by_source": {
-                    "daily_offers": row.daily_offers,
-                    "technology": row.technology,
-                    "electronics": row.electronics,
-                },
-                "avg_discount_percent": float(row.avg_discount) if row.avg_discount else 0,
-            }), 200
+            # Últimas 24h, servidas do cache com revalidação em segundo plano
+            return jsonify(get_stats_cache().get()), 200
         
         except Exception as e:
             logger.error(f"Erro ao obter estatísticas: {str(e)}")
             return jsonify({"error": str(e)}), 500
     
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        """Endpoint de métricas no formato do Prometheus, agregando todos os workers."""
+        exposition = render_metrics()
+        if exposition is None:
+            return jsonify({"error": "prometheus_client não instalado"}), 503
+        
+        body, content_type = exposition
+        return Response(body, content_type=content_type)
+    
     return app
 
 
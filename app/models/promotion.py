@@ -0,0 +1,184 @@
+"""
+Registros compactos das promoções que atravessam o pipeline.
+"""
+import sys
+from collections.abc import Mapping
+from dataclasses import dataclass, replace
+from typing import Dict, Iterator, List, Optional, Union
+
+RAW_FIELDS = (
+    "marketplace", "item_id", "url", "title", "price", "original_price",
+    "seller", "image_url", "source",
+)
+
+PROMOTION_FIELDS = (
+    "marketplace", "item_id", "url", "title", "price", "original_price",
+    "discount_percent", "seller", "image_url", "source", "dedupe_key",
+)
+
+
+def _intern(value):
+    """Interna textos muito repetidos (marketplace, fonte, vendedor)."""
+    return sys.intern(value) if type(value) is str else value
+
+
+class _RecordMapping(Mapping):
+    """
+    Acesso de leitura no estilo dict (`item["price"]`, `item.get(...)`,
+    `{**item}`, comparação com dicts) para os registros com __slots__.
+    """
+
+    __slots__ = ()
+    _fields: tuple = ()
+
+    def __getitem__(self, key: str):
+        if key in self._fields:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key: str, default=None):
+        if key in self._fields:
+            return getattr(self, key)
+        return default
+
+    def __contains__(self, key) -> bool:
+        return key in self._fields
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._fields)
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    def to_dict(self) -> Dict:
+        """Cópia como dict, para serializar em JSON."""
+        return {name: getattr(self, name) for name in self._fields}
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class RawPromotion(_RecordMapping):
+    """Item extraído de um card, antes da normalização."""
+
+    marketplace: str
+    item_id: Optional[str]
+    url: str
+    title: str
+    price: Optional[float]
+    original_price: Optional[float]
+    seller: Optional[str]
+    image_url: Optional[str]
+    source: str
+
+    _fields = RAW_FIELDS
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "RawPromotion":
+        """Reconstrói o registro a partir de `to_dict` (campos ausentes viram None)."""
+        return cls(**{name: data.get(name) for name in RAW_FIELDS})
+
+    def __post_init__(self):
+        object.__setattr__(self, "marketplace", _intern(self.marketplace))
+        object.__setattr__(self, "seller", _intern(self.seller))
+        object.__setattr__(self, "source", _intern(self.source))
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class Promotion(_RecordMapping):
+    """
+    Promoção normalizada, pronta para o BigQuery.
+
+    `sources` (fontes em que a promoção apareceu) só aparece nas chaves
+    quando definido; a normalização o preenche com a fonte do item, e a
+    deduplicação une as fontes das ocorrências repetidas.
+    """
+
+    marketplace: str
+    item_id: str
+    url: str
+    title: str
+    price: float
+    original_price: Optional[float]
+    discount_percent: Optional[float]
+    seller: str
+    image_url: Optional[str]
+    source: Optional[str]
+    dedupe_key: str
+    sources: Optional[List[str]] = None
+
+    _fields = PROMOTION_FIELDS
+
+    def __post_init__(self):
+        object.__setattr__(self, "marketplace", _intern(self.marketplace))
+        object.__setattr__(self, "seller", _intern(self.seller))
+        object.__setattr__(self, "source", _intern(self.source))
+
+    def __getitem__(self, key: str):
+        if key in PROMOTION_FIELDS or (key == "sources" and self.sources is not None):
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key: str, default=None):
+        if key in PROMOTION_FIELDS or (key == "sources" and self.sources is not None):
+            return getattr(self, key)
+        return default
+
+    def __contains__(self, key) -> bool:
+        return key in PROMOTION_FIELDS or (key == "sources" and self.sources is not None)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from PROMOTION_FIELDS
+        if self.sources is not None:
+            yield "sources"
+
+    def __len__(self) -> int:
+        return len(PROMOTION_FIELDS) + (self.sources is not None)
+
+    def to_dict(self) -> Dict:
+        row = {name: getattr(self, name) for name in PROMOTION_FIELDS}
+        if self.sources is not None:
+            row["sources"] = self.sources
+        return row
+
+    def to_load_row(self, execution_id: str, collected_at: str) -> Dict:
+        """
+        Linha da tabela promotions, com os mesmos valores de
+        `format_promotion_rows` para um dict com estes campos.
+        """
+        price = self.price
+        original_price = self.original_price
+        discount = self.discount_percent
+        return {
+            "marketplace": str(self.marketplace),
+            "item_id": str(self.item_id),
+            "url": str(self.url),
+            "title": str(self.title),
+            "price": float(price) if price is not None else 0.0,
+            "original_price": float(original_price) if original_price is not None else None,
+            "discount_percent": float(discount) if discount is not None else 0.0,
+            "seller": str(self.seller),
+            "image_url": str(self.image_url),
+            "source": str(self.source),
+            "dedupe_key": str(self.dedupe_key),
+            "execution_id": str(execution_id),
+            "collected_at": collected_at,
+        }
+
+
+PromotionLike = Union[Mapping, Dict]
+
+
+def source_list(source: Optional[str]) -> List[str]:
+    """Lista `sources` de uma única ocorrência."""
+    return [] if source is None else [source]
+
+
+def with_sources(item: PromotionLike, sources: List[str]) -> PromotionLike:
+    """Cópia do item com a lista `sources`, preservando o tipo (Promotion ou dict)."""
+    if isinstance(item, Promotion):
+        return replace(item, sources=sources)
+    return {**item, "sources": sources}
+
+
+def to_json_dict(item: PromotionLike) -> Dict:
+    """Converte registros em dict para serialização; dicts passam como estão."""
+    return item.to_dict() if isinstance(item, _RecordMapping) else item
@@ -0,0 +1,267 @@
+"""
+Normalização colunar (NumPy e pyarrow) de lotes de itens coletados.
+"""
+from collections import Counter
+from collections.abc import Mapping
+from operator import attrgetter
+from typing import List, Optional
+from app.models.promotion import Promotion, RawPromotion, source_list
+from app.utils.logger import setup_logger
+from app.utils.metrics import ITEMS_DROPPED
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depende do ambiente
+    np = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pragma: no cover - depende do ambiente
+    pa = None
+
+logger = setup_logger(__name__)
+
+REQUIRED_FIELDS = ("marketplace", "item_id", "url", "title", "price")
+
+# Maior inteiro convertido para float64 sem perda
+MAX_EXACT_INT = 2 ** 53
+
+# Faixa em que str(float) do Python não usa expoente
+PLAIN_FLOAT_MIN = 1e-4
+PLAIN_FLOAT_MAX = 1e16
+
+
+def is_available() -> bool:
+    """Indica se o NumPy está instalado."""
+    return np is not None
+
+
+def _as_number(value):
+    """Mesma conversão de normalize_item: texto vira float, números ficam como estão."""
+    kind = type(value)
+    if kind is str:
+        return float(value)
+    if kind is float or (kind is int and -MAX_EXACT_INT <= value <= MAX_EXACT_INT):
+        return value
+    raise TypeError(f"tipo fora do caminho colunar: {kind.__name__}")
+
+
+def _parse_floats(values: List[str]) -> List[float]:
+    """
+    float() de cada texto, com o cast do pyarrow quando disponível.
+    
+    O pyarrow recusa alguns textos que o float() aceita (espaços, "1_000",
+    dígitos não ASCII), mas não aceita nenhum que o float() recuse e lê os
+    demais com o mesmo valor; se o cast falhar, a conversão é refeita com
+    float().
+    """
+    if pa is not None:
+        try:
+            return pc.cast(pa.array(values, pa.string()), pa.float64()).to_numpy().tolist()
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            pass
+    return list(map(float, values))
+
+
+def _number_column(values: List) -> List:
+    """
+    Aplica `_as_number` aos valores preenchidos de uma coluna; valores vazios
+    ficam como estão. Colunas só de texto ou só de números são convertidas
+    em bloco.
+    """
+    kinds = set(map(type, values))
+    if kinds == {str} and all(values):
+        return _parse_floats(values)
+    if kinds <= {str, type(None)}:
+        parsed = iter(_parse_floats([value for value in values if value]))
+        return [next(parsed) if value else value for value in values]
+    if kinds <= {int, float, type(None)} and (
+        int not in kinds or all(-MAX_EXACT_INT <= v <= MAX_EXACT_INT for v in values if type(v) is int)
+    ):
+        return values
+    return [_as_number(value) if value else value for value in values]
+
+
+def _column(items: List[Mapping], field: str, records: bool) -> List:
+    """Valores de um campo; lotes só de RawPromotion são lidos por atributo."""
+    if records:
+        return list(map(attrgetter(field), items))
+    return [item.get(field) for item in items]
+
+
+def _object_array(values: List):
+    """Array de objetos que guarda cada valor como está (sem desempacotar sequências)."""
+    return np.fromiter(values, dtype=object, count=len(values))
+
+
+def dedupe_keys(marketplaces: List, item_ids: List, prices: List, price_values) -> List[str]:
+    """
+    Chaves no formato de calculate_dedupe_key (`marketplace#item_id#preço`),
+    concatenadas em bloco pelo pyarrow.
+    
+    O pyarrow escreve floats com os mesmos dígitos do str() do Python, mas
+    sem o ".0" dos valores inteiros e com outra regra para usar expoente:
+    o ".0" é acrescentado em bloco, e as linhas com expoente em qualquer dos
+    dois formatos (raras para preços) são refeitas com f-string.
+    
+    Args:
+        marketplaces: Coluna marketplace
+        item_ids: Coluna item_id
+        prices: Preços já convertidos (int ou float)
+        price_values: Os mesmos preços em um array float64
+    """
+    count = len(prices)
+    if pa is None or count == 0 or set(map(type, marketplaces)) != {str} \
+            or set(map(type, item_ids)) != {str}:
+        return [f"{m}#{i}#{p}" for m, i, p in zip(marketplaces, item_ids, prices)]
+    
+    kinds = set(map(type, prices))
+    if kinds == {float}:
+        is_float = np.ones(count, dtype=bool)
+    elif kinds == {int}:
+        is_float = np.zeros(count, dtype=bool)
+    else:
+        is_float = np.fromiter((type(p) is float for p in prices), dtype=bool, count=count)
+    
+    text = pc.cast(pa.array(price_values, pa.float64()), pa.string())
+    magnitude = np.abs(price_values)
+    # Comparações com nan são falsas, então nan e inf também são refeitos
+    redo = is_float & ~((magnitude >= PLAIN_FLOAT_MIN) & (magnitude < PLAIN_FLOAT_MAX))
+    redo |= pc.match_substring(text, "e").to_numpy(zero_copy_only=False)
+    suffix = is_float & ~redo & ~pc.match_substring(text, ".").to_numpy(zero_copy_only=False)
+    if suffix.any():
+        text = pc.if_else(pa.array(suffix), pc.binary_join_element_wise(text, ".0", ""), text)
+    
+    # to_numpy().tolist() cria os objetos Python bem mais rápido que to_pylist()
+    keys = pc.binary_join_element_wise(
+        pa.array(marketplaces, pa.string()), pa.array(item_ids, pa.string()), text, "#"
+    ).to_numpy(zero_copy_only=False).tolist()
+    for index in np.flatnonzero(redo).tolist():
+        keys[index] = f"{marketplaces[index]}#{item_ids[index]}#{prices[index]}"
+    return keys
+
+
+def round_percent(values):
+    """
+    Arredonda para 2 casas com o mesmo resultado do round() do Python.
+    
+    np.round multiplica por 100 antes de arredondar, o que pode mudar o lado
+    do arredondamento quando o valor está a um erro de representação de uma
+    meia casa; esses casos raros são refeitos com round().
+    """
+    rounded = np.round(values, 2)
+    scaled = values * 100
+    with np.errstate(invalid="ignore"):
+        distance = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5)
+        ambiguous = distance <= np.maximum(np.abs(scaled), 1.0) * 1e-12
+    for index in np.flatnonzero(ambiguous):
+        rounded[index] = round(float(values[index]), 2)
+    return rounded
+
+
+def normalize_batch(items: List[Mapping]) -> Optional[List[Promotion]]:
+    """
+    Normaliza um lote coluna a coluna, com a mesma saída de aplicar
+    `PromotionNormalizer.normalize_item` a cada item (ordem, tipos e valores).
+    
+    A validação dos campos obrigatórios, a conversão de preços, o desconto e
+    as chaves de deduplicação são calculados sobre colunas inteiras.
+    
+    Args:
+        items: Itens brutos do scraper
+    
+    Returns:
+        Itens normalizados (sem os inválidos) ou None se o lote tiver valores
+        fora do caminho colunar (preços que não são texto, int ou float, ou
+        texto que não é número); nesse caso use o caminho item a item
+    """
+    count = len(items)
+    if count == 0:
+        return []
+    
+    # Campos obrigatórios, na mesma ordem de verificação do caminho item a item
+    dropped: Counter = Counter()
+    valid = np.ones(count, dtype=bool)
+    records = set(map(type, items)) == {RawPromotion}
+    try:
+        columns = {field: _column(items, field, records) for field in REQUIRED_FIELDS}
+        original_column = _column(items, "original_price", records)
+        for field in REQUIRED_FIELDS:
+            present = np.fromiter(map(bool, columns[field]), dtype=bool, count=count)
+            missing = int(np.count_nonzero(valid & ~present))
+            if missing:
+                dropped[f"missing_{field}"] += missing
+            valid &= present
+    except (AttributeError, TypeError, ValueError):
+        return None
+    
+    indexes = np.flatnonzero(valid).tolist()
+    price_column = columns["price"]
+    raw_originals = [original_column[i] for i in indexes]
+    try:
+        prices = _number_column([price_column[i] for i in indexes])
+        originals = _number_column(raw_originals)
+    except (TypeError, ValueError):
+        return None
+    
+    price_values = np.array(prices, dtype=np.float64)
+    positive = ~(price_values <= 0)
+    invalid = int(np.count_nonzero(~positive))
+    if invalid:
+        dropped["invalid_price"] += invalid
+    
+    # Preço original presente e não positivo vira None; ausente fica como veio
+    has_original = np.fromiter(map(bool, raw_originals), dtype=bool, count=len(indexes))
+    original_values = np.array(
+        [value if present else np.nan for value, present in zip(originals, has_original.tolist())],
+        dtype=np.float64,
+    )
+    not_positive = has_original & (original_values <= 0)
+    with_discount = has_original & ~not_positive
+    
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        discounts = round_percent((original_values - price_values) / original_values * 100)
+    
+    for reason, total in dropped.items():
+        ITEMS_DROPPED.labels(reason=reason).inc(total)
+        logger.debug("%s itens descartados: %s", total, reason)
+    
+    # Seleção em bloco das linhas válidas: `keep` indexa as colunas já
+    # filtradas pelos campos obrigatórios e `rows` as colunas completas
+    keep = np.flatnonzero(positive)
+    rows = np.asarray(indexes, dtype=np.intp)[keep]
+    
+    kept_prices = _object_array(prices)[keep].tolist()
+    kept_originals = np.where(not_positive, None, _object_array(originals))[keep].tolist()
+    kept_discounts = np.where(with_discount, discounts.astype(object), None)[keep].tolist()
+    marketplaces, item_ids, urls, titles = (
+        _object_array(columns[field])[rows].tolist() for field in REQUIRED_FIELDS[:4]
+    )
+    sellers, image_urls, sources = (
+        _object_array(_column(items, field, records))[rows].tolist()
+        for field in ("seller", "image_url", "source")
+    )
+    keys = dedupe_keys(marketplaces, item_ids, kept_prices, price_values[keep])
+    
+    return [
+        Promotion(
+            marketplace,
+            item_id,
+            url,
+            title,
+            price,
+            original_price,
+            discount_percent,
+            seller or "N/A",
+            image_url,
+            source,
+            key,
+            source_list(source),
+        )
+        for (marketplace, item_id, url, title, price, original_price, discount_percent,
+             seller, image_url, source, key) in zip(
+            marketplaces, item_ids, urls, titles, kept_prices, kept_originals, kept_discounts,
+            sellers, image_urls, sources, keys,
+        )
+    ]
@@ -1,9 +1,14 @@
 """
 Normalizador de dados de promoções.
 """
-from typing import List, Dict, Optional
+from collections.abc import Mapping
+from typing import List, Dict, Optional, Set
+from app.config import Config
+from app.models.promotion import Promotion, source_list, with_sources
+from app.normalizers import columnar
 from app.utils.normalizers import extract_discount_percent, calculate_dedupe_key
 from app.utils.logger import setup_logger
+from app.utils.metrics import ITEMS_DROPPED
 
 logger = setup_logger(__name__)
 
@@ -11,51 +16,153 @@ logger = setup_logger(__name__)
 class PromotionNormalizer:
     """Normalizador para dados de promoções."""
     
+    # Fonte preferida quando o mesmo item aparece em mais de uma listagem
+    SOURCE_PRIORITY = ("daily_offers", "technology", "electronics")
+    
+    # Abaixo deste tamanho o caminho item a item é mais rápido que o colunar
+    COLUMNAR_MIN_ITEMS = 128
+    
     @staticmethod
     def normalize_items(items: List[Dict]) -> List[Dict]:
         """
         Normaliza lista de itens coletados.
         
+        Com Config.NORMALIZER_ENGINE = "columnar" (e NumPy instalado), lotes
+        com pelo menos COLUMNAR_MIN_ITEMS itens são normalizados coluna a
+        coluna; lotes com valores fora desse caminho voltam ao item a item.
+        
         Args:
             items: Lista de itens brutos do scraper
         
         Returns:
             Lista de itens normalizados
         """
-        normalized = []
+        normalized = None
+        if (Config.NORMALIZER_ENGINE == "columnar" and columnar.is_available()
+                and len(items) >= PromotionNormalizer.COLUMNAR_MIN_ITEMS):
+            normalized = columnar.normalize_batch(items)
+        
+        if normalized is None:
+            normalized = []
+            for item in items:
+                try:
+                    normalized_item = PromotionNormalizer.normalize_item(item)
+                    if normalized_item:
+                        normalized.append(normalized_item)
+                except Exception as e:
+                    ITEMS_DROPPED.labels(reason="error").inc()
+                    logger.warning("Erro ao normalizar item: %s", e)
+        
+        deduplicated = PromotionNormalizer.deduplicate_items(normalized)
+        if len(deduplicated) < len(normalized):
+            ITEMS_DROPPED.labels(reason="duplicate").inc(len(normalized) - len(deduplicated))
+        
+        logger.info(
+            f"Normalizados {len(normalized)} de {len(items)} itens "
+            f"({len(normalized) - len(deduplicated)} repetidos no lote)"
+        )
+        return deduplicated
+    
+    @staticmethod
+    def deduplicate_items(items: List[Dict]) -> List[Dict]:
+        """
+        Remove itens normalizados com a mesma dedupe_key, mantendo a ordem
+        da primeira ocorrência.
+        
+        Args:
+            items: Itens normalizados
+        
+        Returns:
+            Um item por dedupe_key, com a lista `sources` das fontes em que apareceu
+        """
+        winners: Dict[str, Dict] = {}
+        # Fontes unidas, só para as chaves que tiveram mais de uma ocorrência
+        merged: Dict[str, Set[Optional[str]]] = {}
+        winner_key = PromotionNormalizer._winner_key
         
+        # Mesmo resultado de aplicar merge_duplicates em sequência, sem copiar
+        # o item a cada ocorrência
         for item in items:
-            try:
-                normalized_item = PromotionNormalizer.normalize_item(item)
-                if normalized_item:
-                    normalized.append(normalized_item)
-            except Exception as e:
-                logger.warning(f"Erro ao normalizar item: {str(e)}")
-        
-        logger.info(f"Normalizados {len(normalized)} de {len(items)} itens")
-        return normalized
+            key = item["dedupe_key"]
+            current = winners.get(key)
+            if current is None:
+                winners[key] = item
+                continue
+            
+            sources = merged.get(key)
+            if sources is None:
+                sources = merged[key] = set(current.get("sources") or [current.get("source")])
+            sources.update(item.get("sources") or [item.get("source")])
+            
+            # No empate, a primeira ocorrência continua vencendo
+            if winner_key(item) < winner_key(current):
+                winners[key] = item
+        
+        # Itens sem repetição que já trazem `sources` (caso das Promotion
+        # normalizadas) seguem sem ser recriados
+        result = []
+        for key, item in winners.items():
+            sources = merged.get(key)
+            if sources is not None:
+                item = with_sources(item, sorted(sources - {None}))
+            elif item.get("sources") is None:
+                item = with_sources(item, source_list(item.get("source")))
+            result.append(item)
+        return result
+    
+    @staticmethod
+    def merge_duplicates(current: Dict, candidate: Dict) -> Dict:
+        """
+        Escolhe o item mantido entre duas ocorrências da mesma dedupe_key.
+        
+        Vence a fonte de maior prioridade (SOURCE_PRIORITY) e, no empate,
+        o menor (title, url), de modo que o resultado não depende da ordem
+        de chegada. As fontes das duas ocorrências são unidas em `sources`.
+        
+        Args:
+            current: Item já indexado
+            candidate: Nova ocorrência
+        
+        Returns:
+            Cópia do item vencedor com `sources` atualizado
+        """
+        sources = set(current.get("sources") or [current.get("source")])
+        sources.update(candidate.get("sources") or [candidate.get("source")])
+        sources.discard(None)
+        
+        winner = min(current, candidate, key=PromotionNormalizer._winner_key)
+        return with_sources(winner, sorted(sources))
     
     @staticmethod
-    def normalize_item(item: Dict) -> Optional[Dict]:
+    def _winner_key(item: Dict):
+        source = item.get("source")
+        priority = PromotionNormalizer.SOURCE_PRIORITY
+        rank = priority.index(source) if source in priority else len(priority)
+        return rank, item.get("title") or "", item.get("url") or ""
+    
+    @staticmethod
+    def normalize_item(item: Mapping) -> Optional[Promotion]:
         """
         Normaliza um único item.
         
         Args:
-            item: Item a normalizar
+            item: Item a normalizar (RawPromotion ou dict)
         
         Returns:
-            Item normalizado ou None se inválido
+            Promotion ou None se inválido
         """
         # Valida campos obrigatórios
         required_fields = ["marketplace", "item_id", "url", "title", "price"]
         for field in required_fields:
             if not item.get(field):
-                logger.debug(f"Item sem campo obrigatório {field}")
+                ITEMS_DROPPED.labels(reason=f"missing_{field}").inc()
+                logger.debug("Item sem campo obrigatório %s", field)
                 return None
         
         # Normaliza e valida preços
         price = float(item["price"]) if isinstance(item["price"], str) else item["price"]
         if price <= 0:
+            ITEMS_DROPPED.labels(reason="invalid_price").inc()
             logger.debug("Item com preço inválido")
             return None
         
@@ -75,16 +182,18 @@ class PromotionNormalizer:
             price
         )
         
-        return {
-            "marketplace": item["marketplace"],
-            "item_id": item["item_id"],
-            "url": item["url"],
-            "title": item["title"],
-            "price": price,
-            "original_price": original_price,
-            "discount_percent": discount_percent,
-            "seller": item.get("seller") or "N/A",
-            "image_url": item.get("image_url"),
-            "source": item.get("source"),
-            "dedupe_key": dedupe_key,
-        }
+        source = item.get("source")
+        return Promotion(
+            marketplace=item["marketplace"],
+            item_id=item["item_id"],
+            url=item["url"],
+            title=item["title"],
+            price=price,
+            original_price=original_price,
+            discount_percent=discount_percent,
+            seller=item.get("seller") or "N/A",
+            image_url=item.get("image_url"),
+            source=source,
+            dedupe_key=dedupe_key,
+            sources=source_list(source),
+        )
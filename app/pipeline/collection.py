@@ -0,0 +1,135 @@
+"""
+Execução completa de uma coleta: pipeline, log de execução e resultado.
+"""
+from datetime import datetime
+from typing import Callable, Dict, Optional
+from app.database.bigquery_client import get_bigquery_client
+from app.database.spool import get_spool
+from app.database.stats_cache import get_stats_cache
+from app.pipeline.streaming import CollectionPipeline
+from app.scrapers.http_client import run_coroutine
+from app.scrapers.mercadolivre import MercadoLivreScraper
+from app.utils.logger import setup_logger
+from app.utils.metrics import COLLECT_SECONDS
+
+logger = setup_logger(__name__)
+
+
+def run_collection(
+    execution_id: str,
+    on_progress: Optional[Callable[[Dict], None]] = None
+) -> Dict:
+    """
+    Realiza o ciclo completo de coleta em streaming:
+    1. Scraping de múltiplas fontes
+    2. Normalização de dados
+    3. Gravação no BigQuery em micro-lotes, via spool local
+    4. Registro de logs
+    
+    Se o BigQuery falhar, os lotes ficam no spool e são regravados em
+    segundo plano; a coleta termina com `items_spooled` > 0.
+    
+    Args:
+        execution_id: ID da execução
+        on_progress: Callback opcional chamado com os contadores parciais
+    
+    Returns:
+        Resultado da execução, com `status` "success" ou "error"
+    """
+    start_time = datetime.utcnow()
+    pipeline = None
+    
+    logger.info(f"Iniciando coleta com execution_id: {execution_id}")
+    
+    try:
+        # Scraping, normalização e persistência sobrepostos
+        scraper = MercadoLivreScraper()
+        bq_client = get_bigquery_client()
+        pipeline = CollectionPipeline(
+            scraper, bq_client, execution_id, on_progress=on_progress, spool=get_spool()
+        )
+        summary = run_coroutine(pipeline.run())
+        
+        items_collected = summary["items_collected"]
+        items_inserted = summary["items_inserted"]
+        items_deduplicated = summary["items_deduplicated"]
+        items_spooled = summary["items_spooled"]
+        
+        logger.info(
+            f"Coletados {items_collected} itens de {len(summary['by_source'])} fontes"
+        )
+        
+        # Logs
+        end_time = datetime.utcnow()
+        duration_seconds = (end_time - start_time).total_seconds()
+        
+        bq_client.log_execution(
+            execution_id=execution_id,
+            start_time=start_time,
+            end_time=end_time,
+            items_collected=items_collected,
+            items_inserted=items_inserted,
+            items_deduplicated=items_deduplicated,
+            status="spooled" if items_spooled else "success"
+        )
+        
+        COLLECT_SECONDS.labels(status="spooled" if items_spooled else "success").observe(duration_seconds)
+        
+        # Atualiza /stats com os contadores desta execução
+        get_stats_cache().apply_run(summary)
+        
+        logger.info(
+            f"Coleta finalizada com sucesso. "
+            f"Coletados: {items_collected}, "
+            f"Inseridos: {items_inserted}, "
+            f"Duplicados: {items_deduplicated}, "
+            f"No spool: {items_spooled}, "
+            f"Duração: {duration_seconds:.2f}s"
+        )
+        
+        return {
+            "execution_id": execution_id,
+            "status": "success",
+            "items_collected": items_collected,
+            "items_normalized": summary["items_normalized"],
+            "items_inserted": items_inserted,
+            "items_deduplicated": items_deduplicated,
+            "items_spooled": items_spooled,
+            "duration_seconds": duration_seconds,
+            "start_time": start_time.isoformat(),
+            "end_time": end_time.isoformat(),
+        }
+    
+    except Exception as e:
+        end_time = datetime.utcnow()
+        duration_seconds = (end_time - start_time).total_seconds()
+        
+        logger.error(f"Erro durante coleta: {str(e)}", exc_info=True)
+        COLLECT_SECONDS.labels(status="error").observe(duration_seconds)
+        
+        # Lotes carregados antes do erro já contam em /stats
+        get_stats_cache().invalidate()
+        
+        # Registra erro nos logs, com o que foi feito antes da falha
+        partial = pipeline.summary() if pipeline is not None else {}
+        try:
+            bq_client = get_bigquery_client()
+            bq_client.log_execution(
+                execution_id=execution_id,
+                start_time=start_time,
+                end_time=end_time,
+                items_collected=partial.get("items_collected", 0),
+                items_inserted=partial.get("items_inserted", 0),
+                items_deduplicated=partial.get("items_deduplicated", 0),
+                status="error",
+                error_message=str(e)
+            )
+        except Exception as log_error:
+            logger.error(f"Erro ao registrar log de erro: {str(log_error)}")
+        
+        return {
+            "execution_id": execution_id,
+            "status": "error",
+            "error": str(e),
+            "duration_seconds": duration_seconds,
+        }
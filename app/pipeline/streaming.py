@@ -0,0 +1,233 @@
+"""
+Pipeline em streaming: scraping → normalização → carga no BigQuery.
+"""
+import asyncio
+import time
+from typing import Callable, Dict, List, Optional
+from app.config import Config
+from app.normalizers.promotion_normalizer import PromotionNormalizer
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Marca o fim de um estágio na fila
+_DONE = object()
+
+
+class CollectionPipeline:
+    """
+    Executa a coleta como três estágios concorrentes ligados por filas limitadas.
+    
+    As páginas coletadas são normalizadas assim que chegam e carregadas no
+    BigQuery em micro-lotes de Config.LOAD_BATCH_SIZE itens. Como as filas têm
+    tamanho fixo, um estágio lento segura os anteriores e a memória fica
+    limitada, independentemente do número de páginas.
+    """
+    
+    # Intervalo mínimo entre notificações de progresso, em segundos
+    PROGRESS_INTERVAL = 1.0
+    
+    def __init__(self, scraper, bq_client, execution_id: str,
+                 batch_size: int = None, queue_size: int = None,
+                 on_progress: Optional[Callable[[Dict], None]] = None,
+                 spool=None):
+        """
+        Args:
+            scraper: Scraper com o método `stream_all`
+            bq_client: Cliente com o método `write_promotions`
+            execution_id: ID da execução
+            batch_size: Itens por carga (padrão: Config.LOAD_BATCH_SIZE)
+            queue_size: Capacidade das filas (padrão: Config.PIPELINE_QUEUE_SIZE)
+            on_progress: Callback chamado com `summary()` conforme a coleta avança
+            spool: Spool local; com ele, uma falha de gravação deixa os lotes
+                em disco em vez de interromper a coleta
+        """
+        self.scraper = scraper
+        self.bq_client = bq_client
+        self.execution_id = execution_id
+        self.batch_size = max(1, batch_size or Config.LOAD_BATCH_SIZE)
+        self.queue_size = max(1, queue_size or Config.PIPELINE_QUEUE_SIZE)
+        self.spool = spool
+        
+        self.items_collected = 0
+        self.items_normalized = 0
+        self.items_inserted = 0
+        self.items_deduplicated = 0
+        self.items_merged = 0
+        self.items_spooled = 0
+        self.batches_loaded = 0
+        self.batches_spooled = 0
+        self.sink_failed = False
+        self.by_source: Dict[str, int] = {}
+        self.normalized_by_source: Dict[str, int] = {}
+        self.discount_sum = 0.0
+        self.discount_count = 0
+        
+        self.on_progress = on_progress
+        self._last_progress = 0.0
+    
+    def summary(self) -> Dict:
+        """Retorna os contadores da execução."""
+        return {
+            "items_collected": self.items_collected,
+            "items_normalized": self.items_normalized,
+            "items_inserted": self.items_inserted,
+            "items_deduplicated": self.items_deduplicated,
+            "items_merged": self.items_merged,
+            "items_spooled": self.items_spooled,
+            "batches_loaded": self.batches_loaded,
+            "batches_spooled": self.batches_spooled,
+            "by_source": dict(self.by_source),
+            "normalized_by_source": dict(self.normalized_by_source),
+            "discount_sum": self.discount_sum,
+            "discount_count": self.discount_count,
+        }
+    
+    async def _report_progress(self, force: bool = False):
+        """
+        Notifica o progresso, no máximo uma vez por PROGRESS_INTERVAL.
+        
+        O callback roda em uma thread (ele pode gravar o status em disco),
+        com o resumo montado no event loop.
+        """
+        if self.on_progress is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_progress < self.PROGRESS_INTERVAL:
+            return
+        self._last_progress = now
+        try:
+            await asyncio.to_thread(self.on_progress, self.summary())
+        except Exception as e:
+            logger.warning(f"Erro ao reportar progresso: {str(e)}")
+    
+    async def run(self) -> Dict:
+        """
+        Executa o pipeline até o fim da coleta.
+        
+        Returns:
+            Contadores da execução (ver `summary`)
+        
+        Raises:
+            Exception: Primeiro erro de normalização ou carga (sem spool);
+                os demais estágios são cancelados
+        """
+        raw_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        normalized_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        
+        tasks = [
+            asyncio.create_task(self._scrape(raw_queue)),
+            asyncio.create_task(self._normalize(raw_queue, normalized_queue)),
+            asyncio.create_task(self._load(normalized_queue)),
+        ]
+        
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            await self.scraper.close()
+        
+        await self._report_progress(force=True)
+        return self.summary()
+    
+    async def _scrape(self, out_queue: asyncio.Queue):
+        """Estágio 1: entrega as páginas coletadas."""
+        async for source, items in self.scraper.stream_all():
+            self.items_collected += len(items)
+            self.by_source[source] = self.by_source.get(source, 0) + len(items)
+            await self._report_progress()
+            await out_queue.put(items)
+        await out_queue.put(_DONE)
+    
+    async def _normalize(self, in_queue: asyncio.Queue, out_queue: asyncio.Queue):
+        """Estágio 2: normaliza cada página."""
+        while True:
+            items = await in_queue.get()
+            if items is _DONE:
+                break
+            normalized = PromotionNormalizer.normalize_items(items)
+            self.items_normalized += len(normalized)
+            if normalized:
+                await out_queue.put(normalized)
+        await out_queue.put(_DONE)
+    
+    async def _load(self, in_queue: asyncio.Queue):
+        """
+        Estágio 3: agrupa itens em micro-lotes e faz o MERGE de cada um.
+        
+        O lote é indexado por dedupe_key, então um item repetido entre fontes
+        ou páginas é enviado uma só vez por lote. Repetições de itens de lotes
+        já carregados ficam para o índice de chaves conhecidas e o MERGE, sem
+        manter em memória as chaves de toda a execução.
+        """
+        batch: Dict[str, Dict] = {}
+        while True:
+            items = await in_queue.get()
+            if items is _DONE:
+                break
+            for item in items:
+                key = item["dedupe_key"]
+                current = batch.get(key)
+                if current is not None:
+                    self.items_merged += 1
+                    batch[key] = PromotionNormalizer.merge_duplicates(current, item)
+                else:
+                    batch[key] = item
+                if len(batch) >= self.batch_size:
+                    await self._flush(list(batch.values()))
+                    batch = {}
+        
+        if batch:
+            await self._flush(list(batch.values()))
+    
+    async def _spool_batch(self, batch: List[Dict], segment: str):
+        """Deixa o lote no spool para o flusher de fundo regravar."""
+        await asyncio.to_thread(self.spool.release, segment)
+        self.items_spooled += len(batch)
+        self.batches_spooled += 1
+        await self._report_progress()
+    
+    async def _flush(self, batch: List[Dict]):
+        """Carrega um micro-lote sem bloquear o event loop."""
+        for item in batch:
+            source = item.get("source")
+            self.normalized_by_source[source] = self.normalized_by_source.get(source, 0) + 1
+            # Descontos ausentes são gravados como 0.0 no MERGE
+            self.discount_sum += item.get("discount_percent") or 0.0
+            self.discount_count += 1
+        
+        segment = None
+        if self.spool is not None:
+            # Write-ahead: o lote fica em disco até a gravação ser confirmada
+            segment = await asyncio.to_thread(self.spool.write, batch, self.execution_id)
+            if self.sink_failed:
+                await self._spool_batch(batch, segment)
+                return
+        
+        try:
+            inserted, deduplicated = await asyncio.to_thread(
+                self.bq_client.write_promotions, batch, self.execution_id
+            )
+        except Exception as e:
+            if segment is None:
+                raise
+            # Sem BigQuery, os lotes seguintes vão direto para o spool
+            self.sink_failed = True
+            logger.warning(f"Falha ao gravar lote, mantido no spool: {str(e)}")
+            await self._spool_batch(batch, segment)
+            return
+        
+        if segment is not None:
+            await asyncio.to_thread(self.spool.ack, segment)
+        self.items_inserted += inserted
+        self.items_deduplicated += deduplicated
+        self.batches_loaded += 1
+        await self._report_progress()
+        logger.info(
+            f"Lote {self.batches_loaded} carregado: {len(batch)} itens, "
+            f"{inserted} inseridos, {deduplicated} duplicados"
+        )
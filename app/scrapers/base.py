@@ -1,15 +1,28 @@
 """
 Scraper base com lógica comum de requisições.
 """
-import httpx
+import asyncio
 import time
-from typing import Optional
+import httpx
+from typing import Dict, NamedTuple, Optional
+from urllib.parse import urlsplit
+from app.scrapers import http_client
+from app.scrapers.http_cache import get_http_cache
 from app.utils.logger import setup_logger
+from app.utils.metrics import FETCH_BYTES, FETCH_RETRIES, FETCH_SECONDS
+from app.utils.rate_limiter import get_rate_limiter
+from app.utils.retry import RetryBudget, full_jitter_delay, parse_retry_after
 from app.config import Config
 
 logger = setup_logger(__name__)
 
 
+class PageResponse(NamedTuple):
+    """Resposta de uma página; `not_modified` indica corpo vindo do cache após 304."""
+    text: str
+    not_modified: bool = False
+
+
 class BaseScraper:
     """Classe base para scrapers com retry e politesse."""
     
@@ -24,7 +37,7 @@ class BaseScraper:
     HEADERS_BASE = {
         "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
         "Accept-Language": "pt-BR,pt;q=0.9,en;q=0.8",
-        "Accept-Encoding": "gzip, deflate",
+        "Accept-Encoding": http_client.ACCEPT_ENCODING,
         "Connection": "keep-alive",
         "Upgrade-Insecure-Requests": "1",
     }
@@ -32,9 +45,16 @@ class BaseScraper:
     def __init__(self):
         """Inicializa o scraper."""
         self.client = None
+        self._owns_client = False
         self.max_retries = Config.MAX_RETRIES
         self.backoff_factor = Config.BACKOFF_FACTOR
+        self.max_retry_delay = Config.RETRY_MAX_DELAY
+        self.retry_budget: Optional[RetryBudget] = None
+        self.http_cache = get_http_cache()
+        self.rate_limiter = get_rate_limiter()
         self.timeout = Config.REQUEST_TIMEOUT
+        self.max_concurrency_per_host = Config.MAX_CONCURRENCY_PER_HOST
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
     
     def get_headers(self) -> dict:
         """Retorna headers com User-Agent aleatório."""
@@ -43,6 +63,54 @@ class BaseScraper:
         headers["User-Agent"] = random.choice(self.USER_AGENTS)
         return headers
     
+    def _get_host_semaphore(self, url: str) -> asyncio.Semaphore:
+        """Retorna o semáforo que limita requisições simultâneas ao host da URL."""
+        host = urlsplit(url).netloc
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(max(1, self.max_concurrency_per_host))
+            self._host_semaphores[host] = semaphore
+        return semaphore
+    
+    # Status HTTP que valem nova tentativa
+    RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+    
+    def new_retry_budget(self) -> RetryBudget:
+        """Cria o orçamento de retries compartilhado por uma execução."""
+        self.retry_budget = RetryBudget(Config.RETRY_BUDGET, Config.COLLECT_DEADLINE)
+        return self.retry_budget
+    
+    def _retry_delay(self, attempt: int, error: Exception) -> float:
+        """
+        Calcula o delay do próximo retry, respeitando Retry-After em 429/503.
+        
+        O Retry-After é limitado a max_retry_delay mesmo sem orçamento de
+        retries, para um servidor não segurar a chamada indefinidamente.
+        """
+        if isinstance(error, httpx.HTTPStatusError) and error.response.status_code in (429, 503):
+            retry_after = parse_retry_after(error.response.headers.get("Retry-After"))
+            if retry_after is not None:
+                return min(retry_after, self.max_retry_delay)
+        
+        return full_jitter_delay(
+            attempt,
+            backoff_factor=self.backoff_factor,
+            max_delay=self.max_retry_delay
+        )
+    
+    def _is_retryable(self, error: Exception) -> bool:
+        """Indica se o erro é transitório (rede, timeout, 429 ou 5xx)."""
+        if isinstance(error, httpx.HTTPStatusError):
+            return error.response.status_code in self.RETRYABLE_STATUS
+        return isinstance(error, httpx.TransportError)
+    
+    @staticmethod
+    def _retry_reason(error: Exception) -> str:
+        """Motivo do retry para as métricas: status HTTP ou tipo da exceção."""
+        if isinstance(error, httpx.HTTPStatusError):
+            return str(error.response.status_code)
+        return type(error).__name__
+    
     async def fetch(self, url: str) -> Optional[str]:
         """
         Faz requisição HTTP com retry e exponential backoff.
@@ -53,31 +121,131 @@ class BaseScraper:
         Returns:
             Conteúdo HTML ou None se falhar
         """
+        page = await self.fetch_page(url)
+        return page.text
+    
+    async def fetch_page(self, url: str) -> PageResponse:
+        """
+        Faz requisição HTTP com retry, backoff e cache condicional.
+        
+        O backoff usa asyncio.sleep com full jitter (ou o Retry-After do
+        servidor) e consome o orçamento de retries da execução, quando houver.
+        Com o cache HTTP ativo, envia If-None-Match/If-Modified-Since e, em
+        caso de 304, devolve o corpo armazenado com `not_modified=True`.
+        
+        Args:
+            url: URL a requisitar
+        
+        Returns:
+            PageResponse com o HTML da página
+        """
         if not self.client:
-            self.client = httpx.AsyncClient(timeout=self.timeout)
+            self._acquire_client()
         
         last_exception = None
         
         for attempt in range(self.max_retries):
             try:
-                response = await self.client.get(url, headers=self.get_headers())
-                response.raise_for_status()
-                return response.text
+                async with self._get_host_semaphore(url):
+                    return await self._request_page(url)
             
             except Exception as e:
                 last_exception = e
                 logger.warning(
-                    f"Erro ao requisitar {url} (tentativa {attempt + 1}/{self.max_retries}): {str(e)}"
+                    "Erro ao requisitar %s (tentativa %s/%s): %s",
+                    url, attempt + 1, self.max_retries, e,
                 )
                 
-                if attempt < self.max_retries - 1:
-                    delay = 1.0 * (self.backoff_factor ** attempt)
-                    time.sleep(delay)
+                if attempt >= self.max_retries - 1 or not self._is_retryable(e):
+                    break
+                
+                delay = self._retry_delay(attempt, e)
+                if self.retry_budget is not None and not self.retry_budget.try_acquire(delay):
+                    logger.warning(f"Orçamento de retries esgotado ao requisitar {url}")
+                    break
+                
+                FETCH_RETRIES.labels(host=urlsplit(url).netloc, reason=self._retry_reason(e)).inc()
+                await asyncio.sleep(delay)
         
-        logger.error(f"Falha ao requisitar {url} após {self.max_retries} tentativas")
+        logger.error(f"Falha ao requisitar {url} após {attempt + 1} tentativas")
         raise last_exception
     
+    async def _request_page(self, url: str) -> PageResponse:
+        """Executa uma tentativa de requisição, revalidando o cache se houver."""
+        cache = self.http_cache
+        headers = self.get_headers()
+        if cache is not None:
+            headers.update(await asyncio.to_thread(cache.conditional_headers, url))
+        
+        response = await self._get(url, headers)
+        
+        if response.status_code == 304 and cache is not None:
+            body = await asyncio.to_thread(cache.load_body, url)
+            if body is not None:
+                return PageResponse(body, not_modified=True)
+            
+            # Corpo removido do cache entre a revalidação e a leitura
+            await asyncio.to_thread(cache.invalidate, url)
+            response = await self._get(url, self.get_headers())
+        
+        response.raise_for_status()
+        
+        if cache is not None:
+            await asyncio.to_thread(
+                cache.store,
+                url,
+                response.text,
+                response.headers.get("ETag"),
+                response.headers.get("Last-Modified")
+            )
+        
+        return PageResponse(response.text)
+    
+    async def _get(self, url: str, headers: dict) -> httpx.Response:
+        """
+        GET respeitando o rate limit do host e alimentando seu ajuste AIMD.
+        
+        Registra a latência (sem a espera do rate limit) e os bytes baixados.
+        """
+        limiter = self.rate_limiter
+        host = urlsplit(url).netloc
+        if limiter is not None:
+            await limiter.acquire(host)
+        
+        start = time.monotonic()
+        try:
+            response = await self.client.get(url, headers=headers)
+        except httpx.TransportError:
+            elapsed = time.monotonic() - start
+            FETCH_SECONDS.labels(host=host, status="error").observe(elapsed)
+            if limiter is not None:
+                await limiter.record_async(host, elapsed, error=True)
+            raise
+        
+        elapsed = time.monotonic() - start
+        FETCH_SECONDS.labels(host=host, status=str(response.status_code)).observe(elapsed)
+        # Bytes lidos do stream, antes da descompressão; respostas montadas em
+        # memória (sem rede) não contam
+        FETCH_BYTES.labels(host=host).inc(response.num_bytes_downloaded)
+        if limiter is not None:
+            await limiter.record_async(host, elapsed, response.status_code)
+        return response
+    
+    def _acquire_client(self):
+        """
+        Usa o cliente compartilhado do processo quando roda no event loop de
+        fundo; fora dele, cria um cliente próprio, fechado em `close`.
+        """
+        if http_client.in_shared_loop():
+            self.client = http_client.get_http_client()
+            self._owns_client = False
+        else:
+            self.client = http_client.build_client()
+            self._owns_client = True
+    
     async def close(self):
-        """Fecha o cliente HTTP."""
-        if self.client:
+        """Fecha o cliente HTTP, se pertencer a este scraper."""
+        if self.client and self._owns_client:
             await self.client.aclose()
+        self.client = None
+        self._owns_client = False
@@ -0,0 +1,266 @@
+"""
+Cache em disco de respostas HTTP com requisições condicionais.
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+from app.config import Config
+from app.models.promotion import RawPromotion, to_json_dict
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class HttpCache:
+    """
+    Cache de páginas em disco, com validadores HTTP e itens já interpretados.
+    
+    Cada URL gera três arquivos no diretório do cache:
+    - `<chave>.meta.json`: URL, ETag, Last-Modified e data de gravação
+    - `<chave>.body.gz`: corpo da resposta comprimido
+    - `<chave>.items.json.gz`: itens extraídos da página, reaproveitados em 304
+    
+    A data de modificação do arquivo de metadados marca o último acesso; ao
+    passar de `max_bytes`, as entradas menos usadas recentemente são removidas.
+    O tamanho é acompanhado por um contador somado a cada gravação, e o
+    diretório só é percorrido quando o contador passa do limite ou a cada
+    EVICT_INTERVAL segundos (para contar as gravações de outros workers).
+    As gravações são atômicas (arquivo temporário + os.replace), o que permite
+    compartilhar o diretório entre workers.
+    """
+    
+    # Intervalo máximo entre varreduras do diretório, em segundos
+    EVICT_INTERVAL = 60.0
+    
+    def __init__(self, directory: str, max_bytes: int):
+        """
+        Args:
+            directory: Diretório do cache (criado se não existir)
+            max_bytes: Tamanho máximo total em bytes
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Tamanho estimado do diretório (None até a primeira varredura)
+        self._size: Optional[int] = None
+        self._scanned_at = 0.0
+        os.makedirs(directory, exist_ok=True)
+    
+    def _path(self, url: str, suffix: str) -> str:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{key}.{suffix}")
+    
+    def _write(self, path: str, data: bytes):
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    
+    def _read_meta(self, url: str) -> Optional[Dict]:
+        try:
+            with open(self._path(url, "meta.json"), "rb") as f:
+                meta = json.loads(f.read())
+        except (OSError, ValueError):
+            return None
+        return meta if meta.get("url") == url else None
+    
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """
+        Retorna os headers If-None-Match/If-Modified-Since para a URL.
+        
+        Só são enviados se o corpo correspondente estiver no cache.
+        """
+        meta = self._read_meta(url)
+        if not meta or not os.path.exists(self._path(url, "body.gz")):
+            return {}
+        
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+    
+    def load_body(self, url: str) -> Optional[str]:
+        """Retorna o corpo armazenado (após um 304) e marca o acesso."""
+        try:
+            with gzip.open(self._path(url, "body.gz"), "rt", encoding="utf-8") as f:
+                body = f.read()
+        except (OSError, EOFError):
+            return None
+        
+        self._touch(url)
+        return body
+    
+    def store(self, url: str, body: str, etag: Optional[str], last_modified: Optional[str]):
+        """
+        Armazena uma resposta 200.
+        
+        Respostas sem ETag nem Last-Modified não são armazenadas, pois não há
+        como revalidá-las. Os itens da versão anterior são descartados.
+        """
+        if not etag and not last_modified:
+            return
+        
+        meta = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "stored_at": time.time(),
+        }
+        
+        body_data = gzip.compress(body.encode("utf-8"), 6)
+        meta_data = json.dumps(meta).encode("utf-8")
+        try:
+            self._remove(url, "items.json.gz")
+            self._write(self._path(url, "body.gz"), body_data)
+            self._write(self._path(url, "meta.json"), meta_data)
+        except OSError as e:
+            logger.warning(f"Erro ao gravar cache de {url}: {str(e)}")
+            return
+        
+        self._account(len(body_data) + len(meta_data))
+    
+    def load_items(self, url: str, limit: int, variant: str) -> Optional[List[RawPromotion]]:
+        """
+        Retorna os itens já extraídos da página, se compatíveis.
+        
+        Args:
+            url: URL da página
+            limit: Limite de itens da extração atual
+            variant: Identifica o modo de extração (ex.: "dom:bs4")
+        
+        Returns:
+            Itens (truncados em `limit`) como RawPromotion, iguais aos de uma
+            extração nova, ou None se não houver cache utilizável
+        """
+        try:
+            with gzip.open(self._path(url, "items.json.gz"), "rb") as f:
+                cached = json.loads(f.read())
+        except (OSError, EOFError, ValueError):
+            return None
+        
+        if cached.get("url") != url or cached.get("variant") != variant:
+            return None
+        
+        # Uma extração limitada abaixo do pedido atual pode ter omitido itens
+        if cached.get("limit", 0) < limit:
+            return None
+        
+        return [RawPromotion.from_dict(item) for item in (cached.get("items") or [])[:limit]]
+    
+    def store_items(self, url: str, items: List[RawPromotion], limit: int, variant: str):
+        """Armazena os itens extraídos de uma página em cache."""
+        if self._read_meta(url) is None:
+            return
+        
+        payload = {
+            "url": url,
+            "variant": variant,
+            "limit": limit,
+            "items": [to_json_dict(item) for item in items],
+        }
+        try:
+            data = gzip.compress(json.dumps(payload, ensure_ascii=False).encode("utf-8"), 6)
+            self._write(self._path(url, "items.json.gz"), data)
+        except (OSError, TypeError) as e:
+            logger.warning(f"Erro ao gravar itens em cache de {url}: {str(e)}")
+            return
+        
+        self._account(len(data))
+    
+    def invalidate(self, url: str):
+        """Remove a entrada da URL."""
+        for suffix in ("meta.json", "body.gz", "items.json.gz"):
+            self._remove(url, suffix)
+    
+    def _remove(self, url: str, suffix: str):
+        try:
+            os.remove(self._path(url, suffix))
+        except FileNotFoundError:
+            pass
+    
+    def _touch(self, url: str):
+        try:
+            os.utime(self._path(url, "meta.json"))
+        except OSError:
+            pass
+    
+    def _account(self, written: int):
+        """
+        Soma uma gravação ao tamanho estimado e varre o diretório só quando o
+        limite é ultrapassado ou a última varredura tem mais de EVICT_INTERVAL.
+        """
+        with self._lock:
+            if self._size is not None:
+                self._size += written
+            due = (
+                self._size is None
+                or self._size > self.max_bytes
+                or time.monotonic() - self._scanned_at >= self.EVICT_INTERVAL
+            )
+        if due:
+            self._evict()
+    
+    def _evict(self):
+        """Remove as entradas menos usadas até caber em max_bytes."""
+        with self._lock:
+            entries: Dict[str, List] = {}
+            total = 0
+            
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name.endswith(".tmp"):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    key = entry.name.split(".", 1)[0]
+                    info = entries.setdefault(key, [0.0, 0, []])
+                    if entry.name.endswith(".meta.json"):
+                        info[0] = stat.st_mtime
+                    info[1] += stat.st_size
+                    info[2].append(entry.path)
+                    total += stat.st_size
+            
+            if total > self.max_bytes:
+                for _, size, paths in sorted(entries.values(), key=lambda info: info[0]):
+                    for path in paths:
+                        try:
+                            os.remove(path)
+                        except FileNotFoundError:
+                            pass
+                    total -= size
+                    if total <= self.max_bytes:
+                        break
+            
+            self._size = total
+            self._scanned_at = time.monotonic()
+
+
+_cache: Optional[HttpCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> Optional[HttpCache]:
+    """
+    Retorna o cache HTTP do processo, ou None se desativado.
+    
+    Ativado quando Config.HTTP_CACHE_DIR está definido.
+    """
+    global _cache
+    
+    if not Config.HTTP_CACHE_DIR:
+        return None
+    
+    if _cache is None or _cache.directory != Config.HTTP_CACHE_DIR:
+        with _cache_lock:
+            if _cache is None or _cache.directory != Config.HTTP_CACHE_DIR:
+                _cache = HttpCache(Config.HTTP_CACHE_DIR, Config.HTTP_CACHE_MAX_BYTES)
+    
+    return _cache
@@ -0,0 +1,168 @@
+"""
+Cliente HTTP compartilhado pelo processo e event loop de longa duração.
+
+Um `httpx.AsyncClient` fica preso ao event loop em que abriu suas conexões.
+Para manter o keep-alive entre coletas, o processo mantém um único event
+loop em uma thread de fundo; as coletas são submetidas a ele com
+`run_coroutine` e usam o mesmo cliente, com pool configurável, HTTP/2
+opcional e descompressão brotli/zstd quando disponível.
+"""
+import asyncio
+import atexit
+import os
+import threading
+from typing import Awaitable, Optional, TypeVar
+import httpx
+from app.config import Config
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+T = TypeVar("T")
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_thread: Optional[threading.Thread] = None
+_client: Optional[httpx.AsyncClient] = None
+_lock = threading.Lock()
+
+
+def _supported_encodings() -> str:
+    """Monta o Accept-Encoding com os decodificadores disponíveis no httpx."""
+    try:
+        from httpx._decoders import SUPPORTED_DECODERS
+        available = set(SUPPORTED_DECODERS)
+    except ImportError:  # pragma: no cover - API interna do httpx
+        available = {"gzip", "deflate"}
+    
+    preferred = ["zstd", "br", "gzip", "deflate"]
+    return ", ".join(encoding for encoding in preferred if encoding in available)
+
+
+ACCEPT_ENCODING = _supported_encodings()
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Retorna o event loop de fundo do processo, iniciando-o se necessário."""
+    global _loop, _thread
+    
+    if _loop is None:
+        with _lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=loop.run_forever,
+                    name="scraper-event-loop",
+                    daemon=True
+                )
+                thread.start()
+                _loop, _thread = loop, thread
+    
+    return _loop
+
+
+def run_coroutine(coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+    """
+    Executa uma corrotina no event loop de fundo e aguarda o resultado.
+    
+    Args:
+        coro: Corrotina a executar
+        timeout: Tempo máximo de espera em segundos
+    
+    Returns:
+        Resultado da corrotina
+    """
+    future = asyncio.run_coroutine_threadsafe(coro, get_event_loop())
+    try:
+        return future.result(timeout)
+    except BaseException:
+        future.cancel()
+        raise
+
+
+def in_shared_loop() -> bool:
+    """Indica se o código atual roda no event loop de fundo do processo."""
+    try:
+        return asyncio.get_running_loop() is _loop
+    except RuntimeError:
+        return False
+
+
+def build_client() -> httpx.AsyncClient:
+    """Cria um AsyncClient com os limites de pool e protocolo configurados."""
+    http2 = Config.HTTP2_ENABLED
+    if http2 and not _http2_available():
+        logger.warning("HTTP2_ENABLED ativo, mas o pacote 'h2' não está instalado; usando HTTP/1.1")
+        http2 = False
+    
+    limits = httpx.Limits(
+        max_connections=Config.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=Config.HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=Config.HTTP_KEEPALIVE_EXPIRY,
+    )
+    return httpx.AsyncClient(timeout=Config.REQUEST_TIMEOUT, limits=limits, http2=http2)
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Retorna o cliente HTTP compartilhado do processo.
+    
+    Deve ser chamado de dentro do event loop de fundo (ver `in_shared_loop`).
+    """
+    global _client
+    
+    if _client is None or _client.is_closed:
+        _client = build_client()
+    return _client
+
+
+async def _aclose_client():
+    global _client
+    client, _client = _client, None
+    if client is not None and not client.is_closed:
+        await client.aclose()
+
+
+def close_http_client(timeout: float = 5.0):
+    """
+    Fecha o cliente compartilhado e encerra o event loop de fundo.
+    
+    Chamado no encerramento do worker do gunicorn e na saída do processo.
+    """
+    global _loop, _thread
+    
+    with _lock:
+        loop, thread = _loop, _thread
+        _loop, _thread = None, None
+    
+    if loop is None:
+        return
+    
+    try:
+        asyncio.run_coroutine_threadsafe(_aclose_client(), loop).result(timeout)
+    except Exception as e:
+        logger.warning(f"Erro ao fechar cliente HTTP: {str(e)}")
+    
+    loop.call_soon_threadsafe(loop.stop)
+    if thread is not None:
+        thread.join(timeout)
+    if not loop.is_running():
+        loop.close()
+
+
+def _reset_after_fork():
+    """A thread do event loop não existe no processo filho após um fork."""
+    global _loop, _thread, _client, _lock
+    _loop, _thread, _client = None, None, None
+    _lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+atexit.register(close_http_client)
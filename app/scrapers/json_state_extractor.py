@@ -0,0 +1,169 @@
+"""
+Extração de ofertas a partir do estado JSON embutido nas páginas.
+
+As páginas de ofertas do Mercado Livre trazem os dados da listagem em um
+blob `__PRELOADED_STATE__` (em `<script id="__PRELOADED_STATE__">` ou
+atribuído a `window.__PRELOADED_STATE__`). Localizar esse blob por busca
+textual e decodificá-lo evita construir a árvore DOM inteira e não depende
+dos nomes de classes CSS dos cards.
+"""
+import json
+from typing import Any, Dict, Iterator, List, Optional
+from app.models.promotion import RawPromotion
+from app.utils.normalizers import extract_item_id
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson é opcional
+    orjson = None
+
+STATE_NAME = "__PRELOADED_STATE__"
+
+# Imagens dos cards são servidas a partir do ID da foto
+IMAGE_URL_TEMPLATE = "https://http2.mlstatic.com/D_Q_NP_{}-O.webp"
+
+_decoder = json.JSONDecoder()
+
+
+def _loads(text: str) -> Any:
+    """Decodifica JSON com orjson quando disponível."""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def find_state(html: str) -> Optional[Any]:
+    """
+    Localiza e decodifica o blob de estado embutido na página.
+    
+    Args:
+        html: HTML da página
+    
+    Returns:
+        Estado decodificado ou None se ausente/inválido
+    """
+    marker = html.find(STATE_NAME)
+    while marker != -1:
+        try:
+            # Forma <script id="__PRELOADED_STATE__" type="application/json">{...}</script>
+            tag_start = html.rfind("<script", 0, marker)
+            tag_end = html.find(">", marker)
+            if tag_start != -1 and tag_end != -1 and html.rfind(">", tag_start, marker) == -1:
+                body_end = html.find("</script>", tag_end)
+                if body_end != -1:
+                    return _loads(html[tag_end + 1:body_end])
+            
+            # Forma window.__PRELOADED_STATE__ = {...};
+            equals = html.find("=", marker + len(STATE_NAME))
+            if equals != -1 and not html[marker + len(STATE_NAME):equals].strip():
+                start = html.find("{", equals)
+                if start != -1:
+                    state, _ = _decoder.raw_decode(html, start)
+                    return state
+        except ValueError:
+            pass
+        
+        marker = html.find(STATE_NAME, marker + len(STATE_NAME))
+    
+    return None
+
+
+def _iter_cards(node: Any) -> Iterator[Dict]:
+    """Percorre o estado em ordem, entregando os cards de oferta (polycards)."""
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, dict):
+            card = current.get("polycard")
+            if isinstance(card, dict):
+                yield card
+                continue
+            stack.extend(reversed(list(current.values())))
+        elif isinstance(current, list):
+            stack.extend(reversed(current))
+
+
+def _component(card: Dict, component_type: str) -> Dict:
+    """Retorna o conteúdo de um componente do card (título, preço...)."""
+    for component in card.get("components") or []:
+        if isinstance(component, dict) and component.get("type") == component_type:
+            return component.get(component_type) or {}
+    return {}
+
+
+def _price_value(price: Dict, key: str) -> Optional[float]:
+    value = (price.get(key) or {}).get("value")
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return None
+
+
+def _card_to_item(card: Dict, source: str) -> Optional[RawPromotion]:
+    """Converte um card no mesmo formato de item do caminho DOM."""
+    metadata = card.get("metadata") or {}
+    
+    url = metadata.get("url")
+    title = (_component(card, "title").get("text") or "").strip()
+    if not title or not url:
+        return None
+    if not url.startswith(("http://", "https://")):
+        url = f"https://{url.lstrip('/')}"
+    
+    item_id = metadata.get("id")
+    if not isinstance(item_id, str) or extract_item_id(item_id) != item_id:
+        item_id = extract_item_id(url)
+    
+    price_data = _component(card, "price")
+    price = _price_value(price_data, "current_price")
+    original_price = _price_value(price_data, "previous_price")
+    if not price:
+        return None
+    
+    pictures = (card.get("pictures") or {}).get("pictures") or []
+    picture_id = pictures[0].get("id") if pictures and isinstance(pictures[0], dict) else None
+    image_url = IMAGE_URL_TEMPLATE.format(picture_id) if picture_id else None
+    
+    return RawPromotion(
+        marketplace="mercadolivre",
+        item_id=item_id,
+        url=url,
+        title=title,
+        price=price,
+        original_price=original_price,
+        seller="Mercado Livre",
+        image_url=image_url,
+        source=source,
+    )
+
+
+def extract_items(html: str, source: str, limit: int) -> Optional[List[RawPromotion]]:
+    """
+    Extrai os itens de uma página a partir do estado JSON embutido.
+    
+    Args:
+        html: HTML da página
+        source: Nome da fonte
+        limit: Máximo de cards a processar
+    
+    Returns:
+        Lista de itens, ou None se a página não tiver estado com cards
+        (o chamador deve então usar a extração via DOM)
+    """
+    state = find_state(html)
+    if state is None:
+        return None
+    
+    items = []
+    found = False
+    for index, card in enumerate(_iter_cards(state)):
+        found = True
+        if index >= limit:
+            break
+        try:
+            item = _card_to_item(card, source)
+        except (AttributeError, TypeError):
+            item = None
+        if item:
+            items.append(item)
+    
+    return items if found else None
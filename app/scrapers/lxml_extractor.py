@@ -0,0 +1,148 @@
+"""
+Extrator rápido de ofertas baseado em XPath compilado do lxml.
+
+Produz exatamente os mesmos itens que o caminho BeautifulSoup de
+MercadoLivreScraper._parse_items, mas constrói a árvore uma única vez com o
+parser C do lxml e usa expressões XPath pré-compiladas em vez de
+`select_one` repetido em cada card.
+"""
+from typing import List, Optional
+from lxml import etree
+import lxml.html
+from app.models.promotion import RawPromotion
+from app.utils.normalizers import normalize_price, extract_item_id
+
+
+def _has_class(name: str) -> str:
+    """Predicado XPath equivalente ao seletor CSS `.name`."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# Seletores de card, na mesma ordem de fallback do caminho CSS
+_CARD_XPATHS = [
+    etree.XPath(f"//*[{_has_class('poly-card')}]"),
+    etree.XPath(f"//*[{_has_class('promotion-item')}]"),
+    etree.XPath(f"//*[{_has_class('ui-search-result')}]"),
+]
+
+_TITLE_LINK = etree.XPath(f".//a[{_has_class('poly-component__title')}]")
+_ANY_LINK = etree.XPath(".//a")
+_CURRENT_PRICE = etree.XPath(
+    f".//*[{_has_class('andes-money-amount__fraction')}]"
+    f"[ancestor::*[{_has_class('poly-price__current')}]]"
+)
+_COMPARISON_PRICE = etree.XPath(
+    f".//*[{_has_class('andes-money-amount__fraction')}]"
+    f"[ancestor::*[{_has_class('poly-price__comparison')}]]"
+)
+_IMAGE = etree.XPath(".//img")
+
+# Tags cujo texto o BeautifulSoup não inclui em get_text()
+_NON_TEXT_CONTAINERS = frozenset({"script", "style", "template", "rt", "rp"})
+
+
+def _first(xpath: etree.XPath, element) -> Optional[etree._Element]:
+    """Primeiro resultado do XPath em ordem de documento."""
+    result = xpath(element)
+    return result[0] if result else None
+
+
+def _text(element) -> str:
+    """Equivalente a `Tag.get_text(strip=True)` do BeautifulSoup."""
+    for ancestor in element.iterancestors():
+        if ancestor.tag in _NON_TEXT_CONTAINERS:
+            return ""
+    
+    parts: List[str] = []
+    
+    def collect(node):
+        if not isinstance(node.tag, str) or node.tag in _NON_TEXT_CONTAINERS:
+            return
+        if node.text:
+            text = node.text.strip()
+            if text:
+                parts.append(text)
+        for child in node:
+            collect(child)
+            if child.tail:
+                tail = child.tail.strip()
+                if tail:
+                    parts.append(tail)
+    
+    collect(element)
+    return "".join(parts)
+
+
+def _extract_item(element, source: str) -> Optional[RawPromotion]:
+    """Extrai um card; mesmas regras de MercadoLivreScraper._extract_item_data."""
+    try:
+        link_elem = _first(_TITLE_LINK, element)
+        if link_elem is None:
+            link_elem = _first(_ANY_LINK, element)
+        title = _text(link_elem) if link_elem is not None else None
+        url = link_elem.get("href") if link_elem is not None else None
+        
+        if not title or not url:
+            return None
+        item_id = extract_item_id(url)
+        
+        price_elem = _first(_CURRENT_PRICE, element)
+        old_price_elem = _first(_COMPARISON_PRICE, element)
+        
+        price = normalize_price(_text(price_elem)) if price_elem is not None else None
+        original_price = normalize_price(_text(old_price_elem)) if old_price_elem is not None else None
+        
+        if not price:
+            return None
+        
+        # Cards sem imagem são descartados, como no caminho CSS
+        img_elem = _first(_IMAGE, element)
+        if img_elem is None:
+            return None
+        image_url = img_elem.get("src") or img_elem.get("data-src")
+        
+        return RawPromotion(
+            marketplace="mercadolivre",
+            item_id=item_id,
+            url=url,
+            title=title,
+            price=price,
+            original_price=original_price,
+            seller="Mercado Livre",
+            image_url=image_url,
+            source=source,
+        )
+    except Exception:
+        return None
+
+
+def extract_items(html: str, source: str, limit: int) -> List[RawPromotion]:
+    """
+    Extrai os itens de uma página de ofertas.
+    
+    Args:
+        html: HTML da página
+        source: Nome da fonte
+        limit: Máximo de cards a processar
+    
+    Returns:
+        Lista de itens, idêntica à do caminho BeautifulSoup
+    """
+    try:
+        root = lxml.html.document_fromstring(html)
+    except (etree.ParserError, ValueError):
+        return []
+    
+    cards = []
+    for xpath in _CARD_XPATHS:
+        cards = xpath(root)
+        if cards:
+            break
+    
+    items = []
+    for element in cards[:limit]:
+        item = _extract_item(element, source)
+        if item:
+            items.append(item)
+    
+    return items
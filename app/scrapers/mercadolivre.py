@@ -1,10 +1,16 @@
 """
 Scraper específico para Mercado Livre.
 """
+import asyncio
 from bs4 import BeautifulSoup
-from typing import List, Dict, Optional
+from typing import AsyncIterator, List, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from app.models.promotion import RawPromotion
+from app.scrapers import json_state_extractor, lxml_extractor
 from app.scrapers.base import BaseScraper
+from app.scrapers.parser_pool import get_parser_executor
 from app.utils.logger import setup_logger
+from app.utils.metrics import PARSE_SECONDS, timed
 from app.utils.normalizers import (
     normalize_price,
     extract_item_id,
@@ -24,32 +30,148 @@ class MercadoLivreScraper(BaseScraper):
         "electronics": "https://www.mercadolivre.com.br/ofertas?container_id=MLB271545-1",
     }
     
-    async def scrape_all(self) -> Dict[str, List[Dict]]:
+    async def scrape_all(self, concurrent: Optional[bool] = None) -> Dict[str, List[RawPromotion]]:
         """
         Coleta dados de todas as fontes.
         
+        No modo concorrente as fontes são coletadas em paralelo sobre o mesmo
+        cliente HTTP, respeitando o limite de conexões por host e o prazo
+        total da coleta (Config.COLLECT_DEADLINE). Fontes que não terminarem
+        dentro do prazo retornam lista vazia.
+        
+        Args:
+            concurrent: Força o modo de coleta (padrão: Config.SCRAPE_CONCURRENT)
+        
         Returns:
             Dicionário com itens coletados por fonte
         """
-        results = {}
+        if concurrent is None:
+            concurrent = Config.SCRAPE_CONCURRENT
+        
+        self.new_retry_budget()
         
         try:
+            if concurrent:
+                return await self._scrape_all_concurrent()
+            
+            results = {}
             for source_name, url in self.SOURCES.items():
-                try:
-                    logger.info(f"Coletando {source_name} de {url}")
-                    items = await self.scrape_source(url, source_name)
-                    results[source_name] = items
-                    logger.info(f"Coletados {len(items)} itens de {source_name}")
-                except Exception as e:
-                    logger.error(f"Erro ao coletar {source_name}: {str(e)}")
-                    results[source_name] = []
+                results[source_name] = await self._scrape_source_safe(url, source_name)
+            return results
         
         finally:
             await self.close()
+    
+    async def _scrape_all_concurrent(self) -> Dict[str, List[RawPromotion]]:
+        """Coleta todas as fontes em paralelo dentro do prazo configurado."""
+        tasks = {
+            source_name: asyncio.create_task(self._scrape_source_safe(url, source_name))
+            for source_name, url in self.SOURCES.items()
+        }
+        
+        deadline = Config.COLLECT_DEADLINE if Config.COLLECT_DEADLINE > 0 else None
+        done, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+        
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        
+        # Mantém o agrupamento e a ordem das fontes
+        results = {}
+        for source_name, task in tasks.items():
+            if task in done:
+                results[source_name] = task.result()
+            else:
+                logger.error(
+                    f"Prazo de {Config.COLLECT_DEADLINE}s excedido ao coletar {source_name}"
+                )
+                results[source_name] = []
         
         return results
     
-    async def scrape_source(self, url: str, source: str) -> List[Dict]:
+    async def stream_all(
+        self,
+        concurrent: Optional[bool] = None
+    ) -> AsyncIterator[Tuple[str, List[RawPromotion]]]:
+        """
+        Coleta todas as fontes entregando os itens página a página.
+        
+        As páginas passam por uma fila limitada (Config.PIPELINE_QUEUE_SIZE):
+        se o consumidor estiver lento, a coleta aguarda em vez de acumular
+        páginas em memória. O prazo Config.COLLECT_DEADLINE vale para o
+        conjunto das fontes. O cliente HTTP não é fechado aqui.
+        
+        Args:
+            concurrent: Força o modo de coleta (padrão: Config.SCRAPE_CONCURRENT)
+        
+        Yields:
+            Tuplas (nome da fonte, itens de uma página)
+        """
+        if concurrent is None:
+            concurrent = Config.SCRAPE_CONCURRENT
+        
+        self.new_retry_budget()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, Config.PIPELINE_QUEUE_SIZE))
+        
+        async def produce(source_name: str, url: str):
+            collected = 0
+            try:
+                logger.info(f"Coletando {source_name} de {url}")
+                async for page_items in self.iter_source_pages(url, source_name):
+                    collected += len(page_items)
+                    await queue.put((source_name, page_items))
+                logger.info(f"Coletados {collected} itens de {source_name}")
+            except Exception as e:
+                logger.error(f"Erro ao coletar {source_name}: {str(e)}")
+        
+        async def produce_sequential():
+            for source_name, url in self.SOURCES.items():
+                await produce(source_name, url)
+        
+        if concurrent:
+            producers = [
+                asyncio.create_task(produce(source_name, url))
+                for source_name, url in self.SOURCES.items()
+            ]
+        else:
+            producers = [asyncio.create_task(produce_sequential())]
+        
+        async def supervise():
+            deadline = Config.COLLECT_DEADLINE if Config.COLLECT_DEADLINE > 0 else None
+            _, pending = await asyncio.wait(producers, timeout=deadline)
+            if pending:
+                logger.error(f"Prazo de {Config.COLLECT_DEADLINE}s excedido durante a coleta")
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+            await queue.put(None)
+        
+        supervisor = asyncio.create_task(supervise())
+        
+        try:
+            while True:
+                entry = await queue.get()
+                if entry is None:
+                    break
+                yield entry
+        finally:
+            for task in [supervisor, *producers]:
+                task.cancel()
+            await asyncio.gather(supervisor, *producers, return_exceptions=True)
+    
+    async def _scrape_source_safe(self, url: str, source_name: str) -> List[RawPromotion]:
+        """Coleta uma fonte registrando erros sem interromper as demais."""
+        try:
+            logger.info(f"Coletando {source_name} de {url}")
+            items = await self.scrape_source(url, source_name)
+            logger.info(f"Coletados {len(items)} itens de {source_name}")
+            return items
+        except Exception as e:
+            logger.error(f"Erro ao coletar {source_name}: {str(e)}")
+            return []
+    
+    async def scrape_source(self, url: str, source: str) -> List[RawPromotion]:
         """
         Coleta itens de uma fonte específica.
         
@@ -60,13 +182,170 @@ class MercadoLivreScraper(BaseScraper):
         Returns:
             Lista de itens coletados
         """
-        html = await self.fetch(url)
-        if not html:
+        items = []
+        async for page_items in self.iter_source_pages(url, source):
+            items.extend(page_items)
+        return items
+    
+    async def iter_source_pages(
+        self,
+        url: str,
+        source: str,
+        max_items: Optional[int] = None,
+        max_pages: Optional[int] = None
+    ) -> AsyncIterator[List[RawPromotion]]:
+        """
+        Percorre a paginação de uma fonte, entregando os itens de cada página.
+        
+        Até Config.PAGE_FETCH_WINDOW páginas são requisitadas em paralelo e
+        os itens são entregues na ordem em que as páginas chegam, sem manter
+        o HTML das páginas já processadas. A coleta para ao atingir o limite
+        de itens ou de páginas, ou ao encontrar uma página sem itens.
+        
+        Args:
+            url: URL da primeira página da fonte
+            source: Nome da fonte
+            max_items: Limite de itens (padrão: Config.ITEMS_PER_SOURCE)
+            max_pages: Limite de páginas (padrão: Config.MAX_PAGES_PER_SOURCE)
+        
+        Yields:
+            Lista de itens de cada página
+        """
+        if max_items is None:
+            max_items = Config.ITEMS_PER_SOURCE
+        if max_pages is None:
+            max_pages = Config.MAX_PAGES_PER_SOURCE
+        window = max(1, Config.PAGE_FETCH_WINDOW)
+        
+        collected = 0
+        next_page = 1
+        last_page = max_pages
+        in_flight: Dict[asyncio.Task, int] = {}
+        
+        try:
+            while in_flight or (next_page <= last_page and collected < max_items):
+                while len(in_flight) < window and next_page <= last_page and collected < max_items:
+                    task = asyncio.create_task(
+                        self._scrape_page(self.build_page_url(url, next_page), source, max_items)
+                    )
+                    in_flight[task] = next_page
+                    next_page += 1
+                
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                
+                for task in sorted(done, key=in_flight.get):
+                    page = in_flight.pop(task)
+                    if task.cancelled():
+                        continue
+                    
+                    try:
+                        page_items = task.result()
+                    except Exception as e:
+                        # Falha na primeira página equivale a falha da fonte
+                        if page == 1:
+                            raise
+                        logger.warning(f"Erro ao coletar página {page} de {source}: {str(e)}")
+                        continue
+                    
+                    if not page_items:
+                        # Fim da listagem: descarta páginas posteriores
+                        last_page = min(last_page, page - 1)
+                        for other, other_page in list(in_flight.items()):
+                            if other_page > last_page:
+                                other.cancel()
+                        continue
+                    
+                    if page > last_page or collected >= max_items:
+                        continue
+                    
+                    page_items = page_items[:max_items - collected]
+                    collected += len(page_items)
+                    yield page_items
+        
+        finally:
+            for task in in_flight:
+                task.cancel()
+            if in_flight:
+                await asyncio.gather(*in_flight, return_exceptions=True)
+    
+    async def _scrape_page(self, url: str, source: str, limit: int) -> List[RawPromotion]:
+        """
+        Baixa e interpreta uma página de ofertas.
+        
+        Se a página não mudou desde a última coleta (304), reaproveita os
+        itens extraídos anteriormente sem interpretar o HTML de novo.
+        """
+        page = await self.fetch_page(url)
+        if not page.text:
             return []
         
-        return self._parse_items(html, source)
+        cache = self.http_cache
+        variant = f"{Config.EXTRACTION_MODE}:{Config.PARSER_ENGINE}"
+        
+        if page.not_modified and cache is not None:
+            items = await asyncio.to_thread(cache.load_items, url, limit, variant)
+            if items is not None:
+                logger.debug("Página sem alterações, itens reaproveitados: %s", url)
+                return items
+        
+        items = await self.parse_page(page.text, source, limit)
+        
+        if cache is not None:
+            await asyncio.to_thread(cache.store_items, url, items, limit, variant)
+        
+        return items
     
-    def _parse_items(self, html: str, source: str) -> List[Dict]:
+    async def parse_page(self, html: str, source: str, limit: Optional[int] = None) -> List[RawPromotion]:
+        """
+        Interpreta o HTML de uma página, no executor de parsing se configurado.
+        
+        O tempo registrado em PARSE_SECONDS inclui a espera pelo executor.
+        
+        Args:
+            html: HTML da página
+            source: Nome da fonte
+            limit: Máximo de itens a extrair
+        
+        Returns:
+            Lista de itens extraídos
+        """
+        engine = Config.PARSER_ENGINE
+        mode = Config.EXTRACTION_MODE
+        executor = get_parser_executor()
+        with timed(PARSE_SECONDS, engine=engine, mode=mode):
+            if executor is None:
+                return parse_offer_page(html, source, limit, engine, mode)
+            
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                executor, parse_offer_page, html, source, limit, engine, mode
+            )
+    
+    @staticmethod
+    def build_page_url(url: str, page: int) -> str:
+        """
+        Monta a URL de uma página da listagem de ofertas.
+        
+        Args:
+            url: URL da primeira página
+            page: Número da página (1 retorna a URL original)
+        
+        Returns:
+            URL com o parâmetro `page`
+        """
+        if page <= 1:
+            return url
+        
+        parts = urlsplit(url)
+        query = [(key, value) for key, value in parse_qsl(parts.query) if key != "page"]
+        query.append(("page", str(page)))
+        return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ""))
+    
+    @classmethod
+    def _parse_items(cls, html: str, source: str, limit: Optional[int] = None) -> List[RawPromotion]:
+        if limit is None:
+            limit = Config.ITEMS_PER_SOURCE
+        
         items = []
         soup = BeautifulSoup(html, "lxml")
         
@@ -74,17 +353,18 @@ class MercadoLivreScraper(BaseScraper):
         product_elements = soup.select(".poly-card") or soup.select(".promotion-item") or soup.select(".ui-search-result")
         
         if product_elements:
-            for element in product_elements[:Config.ITEMS_PER_SOURCE]:
+            for element in product_elements[:limit]:
                 try:
-                    item = self._extract_item_data(element, source)
+                    item = cls._extract_item_data(element, source)
                     if item:
                         items.append(item)
                 except Exception as e:
-                    logger.debug(f"Erro ao extrair item: {str(e)}")
+                    logger.debug("Erro ao extrair item: %s", e)
         
         return items
 
-    def _extract_item_data(self, element, source: str) -> Optional[Dict]:
+    @staticmethod
+    def _extract_item_data(element, source: str) -> Optional[RawPromotion]:
         try:
             # Título e URL
             link_elem = element.select_one("a.poly-component__title") or element.select_one("a")
@@ -107,16 +387,50 @@ class MercadoLivreScraper(BaseScraper):
             img_elem = element.select_one("img")
             image_url = img_elem.get("src") or img_elem.get("data-src")
 
-            return {
-                "marketplace": "mercadolivre",
-                "item_id": item_id,
-                "url": url,
-                "title": title,
-                "price": price,
-                "original_price": original_price,
-                "seller": "Mercado Livre",
-                "image_url": image_url,
-                "source": source,
-            }
+            return RawPromotion(
+                marketplace="mercadolivre",
+                item_id=item_id,
+                url=url,
+                title=title,
+                price=price,
+                original_price=original_price,
+                seller="Mercado Livre",
+                image_url=image_url,
+                source=source,
+            )
         except:
-            return None
\ No newline at end of file
+            return None
+
+
+def parse_offer_page(
+    html: str,
+    source: str,
+    limit: Optional[int] = None,
+    engine: str = "bs4",
+    mode: str = "dom"
+) -> List[RawPromotion]:
+    """
+    Extrai os itens de uma página de ofertas.
+    
+    Função de módulo para poder ser enviada a um ProcessPoolExecutor.
+    
+    Args:
+        html: HTML da página
+        source: Nome da fonte
+        limit: Máximo de itens (padrão: Config.ITEMS_PER_SOURCE)
+        engine: "bs4" (BeautifulSoup) ou "lxml" (XPath compilado)
+        mode: "json" tenta o estado embutido antes do DOM; "dom" usa só o DOM
+    """
+    if limit is None:
+        limit = Config.ITEMS_PER_SOURCE
+    
+    if mode == "json":
+        items = json_state_extractor.extract_items(html, source, limit)
+        if items:
+            return items
+        logger.debug("Estado JSON ausente em página de %s; usando extração via DOM", source)
+    
+    if engine == "lxml":
+        return lxml_extractor.extract_items(html, source, limit)
+    
+    return MercadoLivreScraper._parse_items(html, source, limit)
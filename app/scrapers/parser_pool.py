@@ -0,0 +1,74 @@
+"""
+Executor opcional para o parsing de HTML fora do event loop.
+"""
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+from app.config import Config
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+_executor: Optional[Executor] = None
+_lock = threading.Lock()
+
+
+def get_parser_executor() -> Optional[Executor]:
+    """
+    Retorna o executor de parsing do processo, criando-o na primeira chamada.
+    
+    O tipo é definido por Config.PARSER_EXECUTOR ("process", "thread" ou
+    "none") e o número de workers por Config.PARSER_WORKERS.
+    
+    Returns:
+        Executor compartilhado ou None para parsing no próprio event loop
+    """
+    global _executor
+    
+    mode = Config.PARSER_EXECUTOR.lower()
+    if mode not in ("process", "thread"):
+        return None
+    
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                workers = Config.PARSER_WORKERS or os.cpu_count() or 1
+                if mode == "process":
+                    # "spawn" evita herdar locks e threads do worker do gunicorn
+                    _executor = ProcessPoolExecutor(
+                        max_workers=workers,
+                        mp_context=multiprocessing.get_context("spawn")
+                    )
+                else:
+                    _executor = ThreadPoolExecutor(
+                        max_workers=workers,
+                        thread_name_prefix="html-parser"
+                    )
+                logger.info(f"Executor de parsing '{mode}' iniciado com {workers} workers")
+    
+    return _executor
+
+
+def shutdown_parser_executor():
+    """Encerra o executor de parsing, se existir."""
+    global _executor
+    
+    with _lock:
+        executor, _executor = _executor, None
+    
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _reset_after_fork():
+    """O executor do processo pai não funciona no filho após um fork."""
+    global _executor, _lock
+    _executor = None
+    _lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+atexit.register(shutdown_parser_executor)
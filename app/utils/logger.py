@@ -1,36 +1,194 @@
 """
 Utilitários de logging estruturado.
+
+Todos os loggers criados por `setup_logger` compartilham um único
+QueueHandler: a thread que registra só resolve a mensagem e enfileira o
+registro, e a serialização em JSON e a escrita no stderr acontecem na thread
+de um QueueListener.
 """
-import logging
+import atexit
+import copy
 import json
-from datetime import datetime
+import logging
+import os
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, List, Optional, Tuple
+from app.config import Config
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende do ambiente
+    orjson = None
+
+
+def _dumps(data: Dict) -> str:
+    if orjson is not None:
+        return orjson.dumps(data).decode("utf-8")
+    return json.dumps(data, ensure_ascii=False)
+
 
 class JsonFormatter(logging.Formatter):
     """Formatter para logs estruturados em JSON."""
     
+    def __init__(self):
+        super().__init__()
+        self._second: Optional[int] = None
+        self._second_text = ""
+    
+    def _timestamp(self, created: float) -> str:
+        """Horário UTC do registro em ISO 8601; a parte em segundos é reaproveitada."""
+        second = int(created)
+        if second != self._second:
+            self._second = second
+            self._second_text = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+        return f"{self._second_text}.{int((created - second) * 1_000_000):06d}"
+    
     def format(self, record):
         log_data = {
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": self._timestamp(record.created),
             "level": record.levelname,
             "message": record.getMessage(),
             "logger": record.name,
         }
         
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            log_data["suppressed"] = suppressed
+        
         if record.exc_info:
             log_data["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            log_data["exception"] = record.exc_text
+        
+        return _dumps(log_data)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Limita os registros repetidos de um mesmo ponto do código (arquivo e
+    linha) a `burst` por janela de `interval` segundos.
+    
+    Só os registros de DEBUG (os pontos por item) são amostrados: INFO e
+    acima, como o progresso dos lotes, passam sempre. O primeiro registro
+    aceito em uma nova janela leva em `suppressed` quantos foram descartados
+    na janela anterior.
+    """
+    
+    def __init__(self, burst: int, interval: float, max_level: int = logging.DEBUG):
+        """
+        Args:
+            burst: Registros aceitos por ponto do código a cada janela (0 desativa)
+            interval: Duração da janela, em segundos
+            max_level: Nível máximo sujeito à amostragem
+        """
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self.max_level = max_level
+        # (arquivo, linha) -> [início da janela, aceitos, descartados]
+        self._windows: Dict[Tuple[str, int], List] = {}
+        self._lock = threading.Lock()
+    
+    def filter(self, record) -> bool:
+        if self.burst <= 0 or record.levelno > self.max_level:
+            return True
         
-        return json.dumps(log_data, ensure_ascii=False)
+        key = (record.pathname, record.lineno)
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or record.created - window[0] >= self.interval:
+                if window is not None and window[2]:
+                    record.suppressed = window[2]
+                self._windows[key] = [record.created, 1, 0]
+                return True
+            if window[1] < self.burst:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+
+class _PreparedQueueHandler(QueueHandler):
+    """
+    QueueHandler que só resolve a mensagem e o traceback na thread de origem;
+    a formatação JSON fica com o listener.
+    """
+    
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _traceback_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_traceback_formatter = logging.Formatter()
+_handler: Optional[_PreparedQueueHandler] = None
+_listener: Optional[QueueListener] = None
+_handler_lock = threading.Lock()
+
+
+def _get_handler() -> QueueHandler:
+    """Retorna o QueueHandler do processo, iniciando o listener na primeira chamada."""
+    global _handler, _listener
+    
+    if _handler is None:
+        with _handler_lock:
+            if _handler is None:
+                console_handler = logging.StreamHandler()
+                console_handler.setFormatter(JsonFormatter())
+                
+                handler = _PreparedQueueHandler(queue.SimpleQueue())
+                handler.addFilter(SamplingFilter(Config.LOG_SAMPLE_BURST, Config.LOG_SAMPLE_INTERVAL))
+                _listener = QueueListener(handler.queue, console_handler)
+                _listener.start()
+                _handler = handler
+    return _handler
 
 
 def setup_logger(name: str) -> logging.Logger:
-    """Configure um logger estruturado."""
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.DEBUG)
+    """
+    Configure um logger estruturado.
     
-    # Console handler com formatação JSON
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.DEBUG)
-    console_handler.setFormatter(JsonFormatter())
+    Idempotente: chamadas repetidas com o mesmo nome não duplicam o handler.
+    O nível vem de Config.LOG_LEVEL, então registros abaixo dele são
+    descartados antes de qualquer formatação (use argumentos `%s` em vez de
+    f-strings nas mensagens de DEBUG para não montar o texto à toa).
+    """
+    logger = logging.getLogger(name)
+    logger.setLevel(Config.LOG_LEVEL.upper())
     
-    logger.addHandler(console_handler)
+    handler = _get_handler()
+    if handler not in logger.handlers:
+        logger.addHandler(handler)
     return logger
+
+
+def stop_logging():
+    """Esvazia a fila de logs e para o listener (hook worker_exit do gunicorn)."""
+    global _listener
+    
+    with _handler_lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+
+
+def _reset_after_fork():
+    global _listener, _handler_lock
+    _handler_lock = threading.Lock()
+    # A thread do listener não existe no processo filho: recria a fila e o
+    # listener, mantendo o mesmo handler nos loggers já configurados
+    if _handler is not None and _listener is not None:
+        _handler.queue = queue.SimpleQueue()
+        _listener = QueueListener(_handler.queue, *_listener.handlers)
+        _listener.start()
+
+
+atexit.register(stop_logging)
+os.register_at_fork(after_in_child=_reset_after_fork)
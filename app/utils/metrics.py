@@ -0,0 +1,139 @@
+"""
+Métricas Prometheus da coleta: latências por etapa e contadores.
+
+Sob o gunicorn, PROMETHEUS_MULTIPROC_DIR (definido em gunicorn.conf.py)
+faz cada worker gravar suas métricas em arquivos mmap nesse diretório, e
+`render_metrics` agrega todos os workers. Sem a variável, as métricas ficam
+no registro do próprio processo. Sem o prometheus_client instalado, as
+métricas viram no-ops.
+"""
+import os
+import time
+from contextlib import contextmanager
+from typing import Optional, Tuple
+from app.config import Config
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST,
+        CollectorRegistry,
+        Counter,
+        Histogram,
+        generate_latest,
+        multiprocess,
+    )
+except ImportError:  # pragma: no cover - depende do ambiente
+    Counter = Histogram = None
+
+FETCH_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30)
+PARSE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+BIGQUERY_BUCKETS = (0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+COLLECT_BUCKETS = (1, 5, 10, 20, 30, 60, 90, 120, 300)
+
+
+def is_available() -> bool:
+    """Indica se o prometheus_client está instalado."""
+    return Counter is not None
+
+
+class _NoopMetric:
+    """Substituto das métricas quando o prometheus_client não está instalado."""
+    
+    def labels(self, *args, **kwargs):
+        return self
+    
+    def inc(self, amount: float = 1):
+        pass
+    
+    def observe(self, amount: float):
+        pass
+
+
+def _counter(name: str, documentation: str, labels: Tuple[str, ...]):
+    if not is_available():
+        return _NoopMetric()
+    return Counter(name, documentation, labels)
+
+
+def _histogram(name: str, documentation: str, labels: Tuple[str, ...], buckets):
+    if not is_available():
+        return _NoopMetric()
+    return Histogram(name, documentation, labels, buckets=buckets)
+
+
+if Config.METRICS_MULTIPROC_DIR:
+    os.makedirs(Config.METRICS_MULTIPROC_DIR, exist_ok=True)
+
+FETCH_SECONDS = _histogram(
+    "promozone_fetch_seconds",
+    "Latência de cada requisição HTTP às páginas de ofertas",
+    ("host", "status"),
+    FETCH_BUCKETS,
+)
+FETCH_RETRIES = _counter(
+    "promozone_fetch_retries_total",
+    "Novas tentativas de requisição, por motivo",
+    ("host", "reason"),
+)
+FETCH_BYTES = _counter(
+    "promozone_fetch_bytes_total",
+    "Bytes baixados das páginas de ofertas (antes da descompressão)",
+    ("host",),
+)
+PARSE_SECONDS = _histogram(
+    "promozone_parse_seconds",
+    "Tempo de extração dos itens de uma página",
+    ("engine", "mode"),
+    PARSE_BUCKETS,
+)
+ITEMS_DROPPED = _counter(
+    "promozone_items_dropped_total",
+    "Itens descartados na normalização, por motivo",
+    ("reason",),
+)
+BIGQUERY_JOB_SECONDS = _histogram(
+    "promozone_bigquery_job_seconds",
+    "Espera por jobs e gravações no BigQuery, por operação",
+    ("operation",),
+    BIGQUERY_BUCKETS,
+)
+COLLECT_SECONDS = _histogram(
+    "promozone_collect_seconds",
+    "Duração total das coletas, por status",
+    ("status",),
+    COLLECT_BUCKETS,
+)
+
+
+@contextmanager
+def timed(metric, **labels):
+    """Observa em `metric` a duração do bloco, em segundos, mesmo em caso de erro."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metric.labels(**labels).observe(time.perf_counter() - start)
+
+
+def render_metrics() -> Optional[Tuple[bytes, str]]:
+    """
+    Gera a exposição no formato texto do Prometheus.
+    
+    Returns:
+        Tupla (corpo, content type) ou None sem o prometheus_client
+    """
+    if not is_available():
+        return None
+    
+    if Config.METRICS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry, path=Config.METRICS_MULTIPROC_DIR)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid: int):
+    """Remove os arquivos de gauges de um worker encerrado (hook child_exit do gunicorn)."""
+    if is_available() and Config.METRICS_MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid, Config.METRICS_MULTIPROC_DIR)
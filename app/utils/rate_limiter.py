@@ -0,0 +1,256 @@
+"""
+Rate limiter adaptativo por host (token bucket + AIMD).
+"""
+import asyncio
+import fcntl
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+from app.config import Config
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Status que indicam que o alvo está pedindo para desacelerar
+THROTTLE_STATUS = {429, 503}
+
+
+class TokenBucket:
+    """Token bucket em memória, compartilhado pelas corrotinas do processo."""
+    
+    def __init__(self, rate: float, burst: float):
+        """
+        Args:
+            rate: Requisições por segundo
+            burst: Capacidade máxima do bucket
+        """
+        self.burst = burst
+        self._rate = rate
+        self._tokens = burst
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+    
+    @property
+    def rate(self) -> float:
+        return self._rate
+    
+    def take(self) -> float:
+        """
+        Tenta retirar um token.
+        
+        Returns:
+            0 se o token foi retirado, ou segundos a aguardar antes de tentar de novo
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self._rate)
+            self._updated_at = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self._rate
+    
+    def update_rate(self, adjust) -> float:
+        """Aplica `adjust(rate) -> novo rate` e retorna o novo valor."""
+        with self._lock:
+            self._rate = adjust(self._rate)
+            return self._rate
+
+
+class FileTokenBucket:
+    """
+    Token bucket persistido em arquivo e protegido por flock.
+    
+    Permite que todos os workers do gunicorn na mesma máquina dividam o
+    mesmo orçamento de requisições por host.
+    """
+    
+    def __init__(self, path: str, rate: float, burst: float):
+        """
+        Args:
+            path: Arquivo de estado do bucket
+            rate: Requisições por segundo iniciais
+            burst: Capacidade máxima do bucket
+        """
+        self.path = path
+        self.burst = burst
+        self._initial_rate = rate
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    
+    def _locked_update(self, update):
+        with open(self.path, "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                try:
+                    state = json.loads(f.read() or "{}")
+                except ValueError:
+                    state = {}
+                
+                now = time.time()
+                rate = state.get("rate", self._initial_rate)
+                tokens = state.get("tokens", self.burst)
+                updated_at = state.get("updated_at", now)
+                tokens = min(self.burst, tokens + max(0.0, now - updated_at) * rate)
+                
+                result, tokens, rate = update(tokens, rate)
+                
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps({"rate": rate, "tokens": tokens, "updated_at": now}))
+                f.flush()
+                return result
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+    
+    @property
+    def rate(self) -> float:
+        return self._locked_update(lambda tokens, rate: (rate, tokens, rate))
+    
+    def take(self) -> float:
+        def update(tokens, rate):
+            if tokens >= 1:
+                return 0.0, tokens - 1, rate
+            return (1 - tokens) / rate, tokens, rate
+        
+        return self._locked_update(update)
+    
+    def update_rate(self, adjust) -> float:
+        def update(tokens, rate):
+            new_rate = adjust(rate)
+            return new_rate, tokens, new_rate
+        
+        return self._locked_update(update)
+
+
+class RateLimiter:
+    """
+    Limita requisições por host e ajusta a taxa pelo padrão AIMD.
+    
+    Respostas rápidas e bem-sucedidas aumentam a taxa em um passo fixo
+    (aumento aditivo); 429/503, erros de rede ou latência acima do alvo
+    multiplicam a taxa por um fator menor que 1 (redução multiplicativa).
+    A taxa fica sempre entre o mínimo e o máximo configurados.
+    """
+    
+    def __init__(
+        self,
+        backend: str = "local",
+        directory: str = "",
+        initial_rate: float = 2.0,
+        min_rate: float = 0.2,
+        max_rate: float = 10.0,
+        burst: float = 4.0,
+        target_latency: float = 2.0,
+        increase_step: float = 0.2,
+        decrease_factor: float = 0.5
+    ):
+        self.backend = backend
+        self.directory = directory
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.target_latency = target_latency
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self._buckets: Dict[str, object] = {}
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_config(cls) -> "RateLimiter":
+        """Cria o rate limiter a partir da configuração."""
+        return cls(
+            backend=Config.RATE_LIMIT_BACKEND,
+            directory=Config.RATE_LIMIT_DIR,
+            initial_rate=Config.RATE_LIMIT_INITIAL_RPS,
+            min_rate=Config.RATE_LIMIT_MIN_RPS,
+            max_rate=Config.RATE_LIMIT_MAX_RPS,
+            burst=Config.RATE_LIMIT_BURST,
+            target_latency=Config.RATE_LIMIT_TARGET_LATENCY,
+        )
+    
+    def _bucket(self, host: str):
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.get(host)
+                if bucket is None:
+                    if self.backend == "file":
+                        path = os.path.join(self.directory, f"{host.replace(':', '_')}.bucket")
+                        bucket = FileTokenBucket(path, self.initial_rate, self.burst)
+                    else:
+                        bucket = TokenBucket(self.initial_rate, self.burst)
+                    self._buckets[host] = bucket
+        return bucket
+    
+    async def acquire(self, host: str):
+        """Aguarda até haver um token disponível para o host."""
+        bucket = self._bucket(host)
+        while True:
+            if self.backend == "file":
+                wait = await asyncio.to_thread(bucket.take)
+            else:
+                wait = bucket.take()
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+    
+    def record(self, host: str, latency: float, status_code: Optional[int] = None,
+               error: bool = False) -> float:
+        """
+        Ajusta a taxa do host a partir do resultado de uma requisição.
+        
+        Args:
+            host: Host requisitado
+            latency: Duração da requisição em segundos
+            status_code: Status HTTP (None em erro de rede)
+            error: Indica falha de rede/timeout
+        
+        Returns:
+            Nova taxa em requisições por segundo
+        """
+        throttled = error or status_code in THROTTLE_STATUS or (
+            status_code is not None and status_code >= 500
+        )
+        slow = latency > self.target_latency
+        
+        def adjust(rate: float) -> float:
+            if throttled or slow:
+                return max(self.min_rate, rate * self.decrease_factor)
+            return min(self.max_rate, rate + self.increase_step)
+        
+        new_rate = self._bucket(host).update_rate(adjust)
+        if throttled:
+            logger.warning(f"Taxa de {host} reduzida para {new_rate:.2f} req/s (status={status_code})")
+        return new_rate
+    
+    async def record_async(self, host: str, latency: float, status_code: Optional[int] = None,
+                           error: bool = False) -> float:
+        """
+        `record` para o event loop: com o backend "file", o ajuste (flock e
+        regravação do arquivo de estado) roda em uma thread, como no `acquire`.
+        """
+        if self.backend == "file":
+            return await asyncio.to_thread(self.record, host, latency, status_code, error)
+        return self.record(host, latency, status_code, error)
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> Optional[RateLimiter]:
+    """Retorna o rate limiter do processo, ou None se desativado."""
+    global _limiter
+    
+    if not Config.RATE_LIMIT_ENABLED:
+        return None
+    
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter.from_config()
+    return _limiter
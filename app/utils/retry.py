@@ -2,7 +2,11 @@
 Utilitários de retry com exponential backoff.
 """
 import asyncio
-from typing import Callable, Any, TypeVar
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Any, Optional, TypeVar
 from functools import wraps
 import random
 
@@ -64,3 +68,89 @@ def exponential_backoff_retry(
             return sync_wrapper
     
     return decorator
+
+
+def full_jitter_delay(
+    attempt: int,
+    backoff_factor: float = 1.5,
+    base_delay: float = 1.0,
+    max_delay: float = 30.0
+) -> float:
+    """
+    Calcula o delay de retry com "full jitter".
+    
+    O delay é sorteado uniformemente entre 0 e o teto exponencial, o que
+    espalha as novas tentativas de clientes concorrentes.
+    
+    Args:
+        attempt: Índice da tentativa que falhou (0 para a primeira)
+        backoff_factor: Multiplicador para cada retry
+        base_delay: Delay inicial em segundos
+        max_delay: Teto do delay em segundos
+    
+    Returns:
+        Delay em segundos
+    """
+    ceiling = min(max_delay, base_delay * (backoff_factor ** attempt))
+    return random.uniform(0, ceiling)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Interpreta o header Retry-After.
+    
+    Args:
+        value: Valor do header, em segundos ou como data HTTP
+    
+    Returns:
+        Segundos a aguardar ou None se ausente/inválido
+    """
+    if not value:
+        return None
+    
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class RetryBudget:
+    """
+    Orçamento de retries compartilhado entre todas as URLs de uma execução.
+    
+    Limita o número total de novas tentativas e impede que um backoff
+    ultrapasse o prazo da coleta.
+    """
+    
+    def __init__(self, max_retries: int, deadline: Optional[float] = None):
+        """
+        Args:
+            max_retries: Total de retries permitidos na execução
+            deadline: Prazo em segundos a partir de agora (None para ilimitado)
+        """
+        self.remaining = max_retries
+        self.deadline = time.monotonic() + deadline if deadline else None
+        self._lock = threading.Lock()
+    
+    def try_acquire(self, delay: float) -> bool:
+        """
+        Reserva um retry que aguardará `delay` segundos.
+        
+        Returns:
+            True se o retry cabe no orçamento e no prazo
+        """
+        with self._lock:
+            if self.remaining <= 0:
+                return False
+            if self.deadline is not None and time.monotonic() + delay >= self.deadline:
+                return False
+            self.remaining -= 1
+            return True
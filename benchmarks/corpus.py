@@ -0,0 +1,63 @@
+"""
+Corpus de páginas de ofertas para os benchmarks.
+
+A página gravada usada pelos testes (`tests/fixtures/`) é expandida em
+listagens com quantos cards forem necessários, renumerando os IDs dos itens
+para que cada página e fonte tenha produtos distintos.
+"""
+import os
+import re
+from typing import Dict
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), os.pardir, "tests", "fixtures")
+
+_CARDS_RE = re.compile(r"(<ol class=\"items_container\">)(.*)(</ol>)", re.S)
+_ITEM_ID_RE = re.compile(r"MLB(-?)(\d+)")
+
+
+def load_recorded_page(name: str = "ofertas_page.html") -> str:
+    """Lê uma página gravada das fixtures dos testes."""
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def build_listing(page: str, seed: int, repeat: int) -> str:
+    """
+    Monta uma listagem com os cards da página repetidos `repeat` vezes.
+    
+    Args:
+        page: Página gravada
+        seed: Número da listagem, usado como prefixo dos IDs
+        repeat: Quantas cópias dos cards incluir
+    """
+    match = _CARDS_RE.search(page)
+    counter = iter(range(10 ** 9))
+    
+    def renumber(m):
+        return f"MLB{m.group(1)}{seed:04d}{next(counter):05d}"
+    
+    cards = _ITEM_ID_RE.sub(renumber, match.group(2) * repeat)
+    return page[:match.start(2)] + cards + page[match.end(2):]
+
+
+def empty_listing(page: str) -> str:
+    """Listagem sem cards, que encerra a paginação."""
+    match = _CARDS_RE.search(page)
+    return page[:match.start(2)] + page[match.end(2):]
+
+
+def build_corpus(sources, pages_per_source: int, repeat: int) -> Dict[str, Dict[int, str]]:
+    """
+    Gera as páginas servidas pelo servidor local.
+    
+    Returns:
+        {fonte: {número da página: HTML}}
+    """
+    recorded = load_recorded_page()
+    corpus = {}
+    for source_index, source in enumerate(sources):
+        corpus[source] = {
+            page: build_listing(recorded, source_index * 1000 + page, repeat)
+            for page in range(1, pages_per_source + 1)
+        }
+    return corpus
@@ -0,0 +1,66 @@
+"""
+Substitutos locais do BigQuery para os benchmarks.
+"""
+import time
+from typing import Dict, List, Tuple
+from unittest.mock import MagicMock, patch
+
+
+class FakeBigQueryClient:
+    """
+    Cliente com a interface usada pelo pipeline e pelas rotas, sem rede.
+    
+    Cada gravação espera `write_latency` segundos, simulando os jobs do
+    BigQuery; as chaves já vistas contam como duplicadas.
+    """
+    
+    known_keys = None
+    
+    def __init__(self, write_latency: float = 0.0):
+        self.write_latency = write_latency
+        self.keys = set()
+        self.batches = 0
+        self.logs: List[Dict] = []
+    
+    def ensure_tables_exist(self) -> bool:
+        return True
+    
+    def write_promotions(self, rows: List[Dict], execution_id: str) -> Tuple[int, int]:
+        if self.write_latency:
+            time.sleep(self.write_latency)
+        new_keys = {row["dedupe_key"] for row in rows} - self.keys
+        self.keys.update(new_keys)
+        self.batches += 1
+        return len(new_keys), len(rows) - len(new_keys)
+    
+    merge_promotions = write_promotions
+    
+    def log_execution(self, **fields):
+        self.logs.append(fields)
+    
+    def query_stats(self) -> Dict:
+        return {
+            "executions": len(self.logs),
+            "total_items": len(self.keys),
+            "unique_items": len(self.keys),
+            "by_source": {},
+            "discount_sum": 0.0,
+            "discount_count": 0,
+        }
+
+
+def offline_bigquery_client():
+    """
+    BigQueryClient real com o cliente do Google substituído por um mock.
+    
+    Mede o trabalho feito no processo (formatação, Parquet/JSON, SQL) sem
+    jobs remotos.
+    """
+    from app.database import bigquery_client
+    
+    with patch.object(bigquery_client.bigquery, "Client"):
+        client = bigquery_client.BigQueryClient()
+    client.client = MagicMock()
+    client.client.query.return_value.num_dml_affected_rows = 0
+    client.known_keys = None
+    return client
@@ -0,0 +1,303 @@
+"""
+Benchmark ponta a ponta offline: fetch, parsing, normalização, MERGE e /collect.
+
+Tudo roda localmente: as páginas vêm de um servidor HTTP com um corpus
+gerado a partir da página gravada em `tests/fixtures/` e o BigQuery é
+substituído por fakes.
+
+Uso:
+    python -m benchmarks.run --output resultados.json
+    python -m benchmarks.run --latency 0.05 --error-rate 0.05
+    python -m benchmarks.run --baseline anterior.json --tolerance 0.2
+"""
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import ExitStack
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from unittest.mock import patch
+
+from app.config import Config
+from app.normalizers.promotion_normalizer import PromotionNormalizer
+from app.scrapers import lxml_extractor
+from app.scrapers.mercadolivre import MercadoLivreScraper
+from benchmarks.corpus import build_corpus, empty_listing, load_recorded_page
+from benchmarks.fakes import FakeBigQueryClient, offline_bigquery_client
+from benchmarks.server import OfferServer
+
+# Limite de itens por página alto o bastante para extrair todos os cards
+PARSE_LIMIT = 10_000
+
+
+def summarize(durations: List[float], items: int = 0) -> Dict:
+    """Resume as durações (segundos) de uma etapa em milissegundos."""
+    ordered = sorted(durations)
+    median = statistics.median(ordered)
+    result = {
+        "runs": len(ordered),
+        "min_ms": round(ordered[0] * 1000, 3),
+        "median_ms": round(median * 1000, 3),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+    }
+    if items:
+        result["items"] = items
+        result["items_per_s"] = round(items / median, 1) if median else None
+    return result
+
+
+def measure(fn: Callable[[], object], repeat: int) -> List[float]:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def bench_fetch(server: OfferServer, corpus: Dict, repeat: int) -> Dict:
+    """
+    Busca todas as páginas do corpus em paralelo, como uma coleta.
+    
+    Cada repetição tem seu orçamento de retries. Requisições que falham
+    mesmo após os retries são contadas em `failed_requests` (somadas nas
+    repetições) e ficam fora das latências.
+    """
+    urls = [
+        MercadoLivreScraper.build_page_url(server.url_for(source), page)
+        for source, pages in corpus.items()
+        for page in pages
+    ]
+    latencies: List[float] = []
+    failures: List[BaseException] = []
+    
+    async def fetch_all():
+        scraper = MercadoLivreScraper()
+        scraper.new_retry_budget()
+        
+        async def timed(url):
+            start = time.perf_counter()
+            await scraper.fetch(url)
+            latencies.append(time.perf_counter() - start)
+        
+        try:
+            results = await asyncio.gather(*(timed(url) for url in urls), return_exceptions=True)
+        finally:
+            await scraper.close()
+        failures.extend(r for r in results if isinstance(r, BaseException))
+    
+    durations = measure(lambda: asyncio.run(fetch_all()), repeat)
+    result = summarize(durations, items=len(urls))
+    result["requests_per_s"] = result.pop("items_per_s")
+    result["requests"] = result.pop("items")
+    result["failed_requests"] = len(failures)
+    result["request_latency"] = summarize(latencies) if latencies else None
+    return result
+
+
+def bench_parse(pages: List[str], repeat: int) -> Dict:
+    """Extrai os itens das páginas com os motores bs4 e lxml."""
+    results = {}
+    engines = {
+        "bs4": lambda html: MercadoLivreScraper._parse_items(html, "daily_offers", PARSE_LIMIT),
+        "lxml": lambda html: lxml_extractor.extract_items(html, "daily_offers", PARSE_LIMIT),
+    }
+    for name, parse in engines.items():
+        items = sum(len(parse(html)) for html in pages)
+        durations = measure(lambda: [parse(html) for html in pages], repeat)
+        results[name] = summarize(durations, items=items)
+    return results
+
+
+def bench_normalize(items: List[Dict], repeat: int) -> Dict:
+    durations = measure(lambda: PromotionNormalizer.normalize_items(items), repeat)
+    return summarize(durations, items=len(items))
+
+
+def bench_merge(rows: List[Dict], repeat: int) -> Dict:
+    """Mede o trabalho local do merge_promotions (formatação e serialização)."""
+    results = {}
+    client = offline_bigquery_client()
+    for load_format in ("parquet", "json"):
+        with patch.object(Config, "BIGQUERY_LOAD_FORMAT", load_format), \
+                patch.object(Config, "STATS_ROLLUP_ENABLED", False):
+            durations = measure(lambda: client.merge_promotions(rows, "bench"), repeat)
+        results[load_format] = summarize(durations, items=len(rows))
+    return results
+
+
+def bench_collect(server: OfferServer, pages_per_source: int, items_per_page: int,
+                  repeat: int, write_latency: float) -> Dict:
+    """Mede POST /collect completo pelo cliente de testes do Flask."""
+    from app.main import create_app
+    
+    fake_client = FakeBigQueryClient(write_latency=write_latency)
+    sources = {source: server.url_for(source) for source in MercadoLivreScraper.SOURCES}
+    
+    with ExitStack() as stack, tempfile.TemporaryDirectory() as spool_dir:
+        for target, value in (
+            ("MAX_PAGES_PER_SOURCE", pages_per_source),
+            ("ITEMS_PER_SOURCE", pages_per_source * items_per_page),
+            ("RATE_LIMIT_ENABLED", False),
+            ("HTTP_CACHE_DIR", ""),
+            ("KNOWN_KEYS_ENABLED", False),
+            ("SPOOL_DIR", spool_dir),
+        ):
+            stack.enter_context(patch.object(Config, target, value))
+        stack.enter_context(patch.object(MercadoLivreScraper, "SOURCES", sources))
+        stack.enter_context(patch("app.main.get_bigquery_client", return_value=fake_client))
+        stack.enter_context(patch("app.main.start_spool_flusher"))
+        stack.enter_context(
+            patch("app.pipeline.collection.get_bigquery_client", return_value=fake_client)
+        )
+        
+        client = create_app().test_client()
+        collected = []
+        
+        def collect():
+            response = client.post("/collect")
+            body = response.get_json()
+            if response.status_code != 200 or body.get("status") != "success":
+                raise RuntimeError(f"/collect falhou: {body}")
+            collected.append(body["items_collected"])
+        
+        durations = measure(collect, repeat)
+    
+    result = summarize(durations, items=collected[-1] if collected else 0)
+    result["batches_written"] = fake_client.batches
+    return result
+
+
+def run_suite(pages_per_source: int = 4, repeat_cards: int = 10, repeat: int = 5,
+              latency: float = 0.0, error_rate: float = 0.0,
+              write_latency: float = 0.0) -> Dict:
+    """
+    Executa todas as etapas e devolve o relatório.
+    
+    Args:
+        pages_per_source: Páginas servidas por fonte
+        repeat_cards: Cópias dos cards gravados em cada página
+        repeat: Repetições de cada medida
+        latency: Latência do servidor local, em segundos
+        error_rate: Fração de respostas 503
+        write_latency: Latência simulada de cada gravação no BigQuery
+    """
+    corpus = build_corpus(MercadoLivreScraper.SOURCES, pages_per_source, repeat_cards)
+    pages = [html for source_pages in corpus.values() for html in source_pages.values()]
+    items = [
+        item
+        for source, source_pages in corpus.items()
+        for html in source_pages.values()
+        for item in MercadoLivreScraper._parse_items(html, source, PARSE_LIMIT)
+    ]
+    normalized = PromotionNormalizer.normalize_items(items)
+    items_per_page = len(items) // max(1, len(pages))
+    
+    server = OfferServer(corpus, empty_listing(load_recorded_page()),
+                         latency=latency, error_rate=error_rate)
+    with server, patch.object(Config, "RATE_LIMIT_ENABLED", False), \
+            patch.object(Config, "HTTP_CACHE_DIR", ""):
+        stages = {
+            "fetch": bench_fetch(server, corpus, repeat),
+            "parse": bench_parse(pages, repeat),
+            "normalize": bench_normalize(items, repeat),
+            "merge_promotions": bench_merge(normalized, repeat),
+            "collect": bench_collect(server, pages_per_source, items_per_page,
+                                     repeat, write_latency),
+        }
+        served = {"requests": server.requests, "errors": server.errors}
+    
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {
+            "pages_per_source": pages_per_source,
+            "repeat_cards": repeat_cards,
+            "repeat": repeat,
+            "latency": latency,
+            "error_rate": error_rate,
+            "write_latency": write_latency,
+            "parser_engine": Config.PARSER_ENGINE,
+            "parser_executor": Config.PARSER_EXECUTOR,
+        },
+        "corpus": {"pages": len(pages), "items": len(items), "normalized": len(normalized)},
+        "server": served,
+        "stages": stages,
+    }
+
+
+def iter_medians(stages: Dict, prefix: str = ""):
+    """Percorre as etapas (inclusive as aninhadas) devolvendo (nome, median_ms)."""
+    for name, value in stages.items():
+        if not isinstance(value, dict):
+            continue
+        if "median_ms" in value:
+            yield f"{prefix}{name}", value["median_ms"]
+        else:
+            yield from iter_medians(value, f"{prefix}{name}.")
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """
+    Compara as medianas com um relatório anterior.
+    
+    Returns:
+        Descrição das etapas que ficaram mais de `tolerance` mais lentas
+    """
+    previous = dict(iter_medians(baseline.get("stages", {})))
+    regressions = []
+    for name, median in iter_medians(current["stages"]):
+        before = previous.get(name)
+        if before and median > before * (1 + tolerance):
+            regressions.append(f"{name}: {before:.3f}ms -> {median:.3f}ms (+{median / before - 1:.0%})")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark offline do Promozone")
+    parser.add_argument("--pages", type=int, default=4, help="páginas por fonte")
+    parser.add_argument("--cards", type=int, default=10, help="cópias dos cards por página")
+    parser.add_argument("--repeat", type=int, default=5, help="repetições de cada medida")
+    parser.add_argument("--latency", type=float, default=0.0, help="latência do servidor (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fração de respostas 503")
+    parser.add_argument("--write-latency", type=float, default=0.0,
+                        help="latência simulada de cada gravação no BigQuery (s)")
+    parser.add_argument("--output", help="arquivo JSON de saída")
+    parser.add_argument("--baseline", help="relatório anterior para comparação")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="piora relativa tolerada antes de acusar regressão")
+    args = parser.parse_args(argv)
+    
+    report = run_suite(
+        pages_per_source=args.pages,
+        repeat_cards=args.cards,
+        repeat=args.repeat,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        write_latency=args.write_latency,
+    )
+    
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    print(output)
+    
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSÃO {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
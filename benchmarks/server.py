@@ -0,0 +1,102 @@
+"""
+Servidor HTTP local que simula as listagens de ofertas.
+"""
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+from urllib.parse import parse_qs, urlsplit
+
+
+class OfferServer:
+    """
+    Serve o corpus em `http://127.0.0.1:<porta>/<fonte>?page=N`.
+    
+    Cada resposta espera `latency` segundos e, com probabilidade
+    `error_rate`, responde 503 com `Retry-After: 0`. Páginas além do corpus
+    devolvem uma listagem vazia.
+    """
+    
+    def __init__(self, corpus: Dict[str, Dict[int, str]], empty_page: str,
+                 latency: float = 0.0, error_rate: float = 0.0, seed: int = 42):
+        self.corpus = corpus
+        self.empty_page = empty_page.encode("utf-8")
+        self.latency = latency
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+    
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def url_for(self, source: str) -> str:
+        return f"{self.base_url}/{source}"
+    
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, *exc):
+        self.stop()
+    
+    def _should_fail(self) -> bool:
+        with self._lock:
+            self.requests += 1
+            failed = self._random.random() < self.error_rate
+            if failed:
+                self.errors += 1
+            return failed
+    
+    def _handler_class(self):
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            
+            def do_GET(self):
+                if server.latency:
+                    time.sleep(server.latency)
+                
+                if server._should_fail():
+                    self.send_response(503)
+                    self.send_header("Retry-After", "0")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                
+                parts = urlsplit(self.path)
+                source = parts.path.strip("/")
+                page = int(parse_qs(parts.query).get("page", ["1"])[0])
+                pages = server.corpus.get(source)
+                if pages is None:
+                    self.send_error(404)
+                    return
+                
+                html = pages.get(page)
+                body = html.encode("utf-8") if html is not None else server.empty_page
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        return Handler
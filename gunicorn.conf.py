@@ -0,0 +1,41 @@
+"""
+Hooks do gunicorn para o ciclo de vida dos recursos compartilhados do worker.
+"""
+import os
+import shutil
+
+# Diretório das métricas Prometheus compartilhadas entre os workers; precisa
+# estar no ambiente antes de os workers importarem a aplicação
+os.environ["PROMETHEUS_MULTIPROC_DIR"] = (
+    os.environ.get("PROMETHEUS_MULTIPROC_DIR") or "/tmp/promozone-metrics"
+)
+
+
+def on_starting(server):
+    """Descarta métricas de execuções anteriores do servidor."""
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    """Remove os arquivos de gauges do worker encerrado, no processo master."""
+    from app.utils.metrics import mark_process_dead
+
+    mark_process_dead(worker.pid)
+
+
+def worker_exit(server, worker):
+    """Libera os recursos compartilhados do worker: HTTP, parsing, coletas, spool e logs."""
+    from app.database.spool import stop_spool_flusher
+    from app.jobs import manager
+    from app.scrapers.http_client import close_http_client
+    from app.scrapers.parser_pool import shutdown_parser_executor
+    from app.utils.logger import stop_logging
+
+    if manager._manager is not None:
+        manager._manager.shutdown()
+    stop_spool_flusher()
+    close_http_client()
+    shutdown_parser_executor()
+    stop_logging()
@@ -2,8 +2,29 @@
 Script para criar tabelas no BigQuery.
 """
 from google.cloud import bigquery
+import os
 import sys
 
+# Dias de retenção das partições diárias de promoções. O padrão 0 mantém todo
+# o histórico; com um valor positivo, o BigQuery apaga as partições mais
+# antigas que a retenção.
+PARTITION_EXPIRATION_DAYS = int(os.getenv("PROMOTIONS_PARTITION_EXPIRATION_DAYS", "0"))
+
+# Folga da recópia do migrate: um MERGE pode confirmar linhas com inserted_at
+# de até 6 horas antes (limite de duração de um job de consulta)
+MIGRATE_CATCHUP_HOURS = 6
+
+
+def configure_promotions_layout(table: bigquery.Table):
+    """Aplica particionamento diário por collected_at e clustering à tabela de promoções."""
+    table.time_partitioning = bigquery.TimePartitioning(
+        type_=bigquery.TimePartitioningType.DAY,
+        field="collected_at",
+        expiration_ms=PARTITION_EXPIRATION_DAYS * 24 * 60 * 60 * 1000 or None,
+    )
+    table.clustering_fields = ["marketplace", "item_id"]
+    return table
+
 def create_tables(project_id: str, dataset_id: str):
     """Cria as tabelas necessárias no BigQuery."""
     
@@ -48,8 +69,7 @@ def create_tables(project_id: str, dataset_id: str):
         bigquery.SchemaField("inserted_at", "TIMESTAMP", mode="REQUIRED"),
     ]
     
-    table = bigquery.Table(promotions_table_id, schema=schema)
-    table.clustering_fields = ["dedupe_key", "execution_id"]
+    table = configure_promotions_layout(bigquery.Table(promotions_table_id, schema=schema))
     
     try:
         client.get_table(promotions_table_id)
@@ -81,15 +101,154 @@ def create_tables(project_id: str, dataset_id: str):
         table = client.create_table(table)
         print(f"✓ Tabela execution_logs criada")
     
+    # 4. View deduplicada (usada quando a gravação é append-only via Storage Write API)
+    dedup_view_id = f"{project_id}.{dataset_id}.promotions_dedup"
+    
+    client.query(f"""
+        CREATE VIEW IF NOT EXISTS `{dedup_view_id}` AS
+        SELECT * FROM `{promotions_table_id}`
+        WHERE TRUE
+        QUALIFY ROW_NUMBER() OVER (PARTITION BY dedupe_key ORDER BY inserted_at) = 1
+    """).result()
+    print(f"✓ View promotions_dedup criada/verificada")
+    
+    # 5. Rollup horário usado por /stats
+    rollup_table_id = f"{project_id}.{dataset_id}.promotions_hourly"
+    
+    schema = [
+        bigquery.SchemaField("hour", "TIMESTAMP", mode="REQUIRED"),
+        bigquery.SchemaField("source", "STRING", mode="REQUIRED"),
+        bigquery.SchemaField("marketplace", "STRING", mode="REQUIRED"),
+        bigquery.SchemaField("item_count", "INTEGER", mode="REQUIRED"),
+        bigquery.SchemaField("items_sketch", "BYTES", mode="NULLABLE"),
+        bigquery.SchemaField("executions_sketch", "BYTES", mode="NULLABLE"),
+        bigquery.SchemaField("discount_sum", "FLOAT64", mode="REQUIRED"),
+        bigquery.SchemaField("discount_count", "INTEGER", mode="REQUIRED"),
+        bigquery.SchemaField("updated_at", "TIMESTAMP", mode="REQUIRED"),
+    ]
+    
+    table = bigquery.Table(rollup_table_id, schema=schema)
+    table.time_partitioning = bigquery.TimePartitioning(
+        type_=bigquery.TimePartitioningType.DAY, field="hour"
+    )
+    table.clustering_fields = ["source", "marketplace"]
+    
+    try:
+        client.get_table(rollup_table_id)
+        print(f"✓ Tabela promotions_hourly já existe")
+    except Exception:
+        table = client.create_table(table)
+        print(f"✓ Tabela promotions_hourly criada")
+    
     print("\n✅ Todas as tabelas foram criadas/verificadas com sucesso!")
 
 
+def backfill_rollup(project_id: str, dataset_id: str, days: int = 2):
+    """Recalcula o rollup horário a partir da tabela de promoções."""
+    
+    client = bigquery.Client(project=project_id)
+    rollup_table_id = f"{project_id}.{dataset_id}.promotions_hourly"
+    
+    sql = f"""
+        DELETE FROM `{rollup_table_id}`
+        WHERE hour >= TIMESTAMP_TRUNC(TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL {days} DAY), HOUR);
+        
+        INSERT INTO `{rollup_table_id}`
+            (hour, source, marketplace, item_count, items_sketch, executions_sketch,
+             discount_sum, discount_count, updated_at)
+        SELECT
+            TIMESTAMP_TRUNC(collected_at, HOUR),
+            IFNULL(source, ''),
+            marketplace,
+            COUNT(*),
+            HLL_COUNT.INIT(item_id),
+            HLL_COUNT.INIT(execution_id),
+            IFNULL(SUM(discount_percent), 0),
+            COUNT(discount_percent),
+            CURRENT_TIMESTAMP()
+        FROM `{project_id}.{dataset_id}.promotions`
+        WHERE collected_at >= TIMESTAMP_TRUNC(TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL {days} DAY), HOUR)
+        GROUP BY 1, 2, 3;
+    """
+    client.query(sql).result()
+    print(f"✓ Rollup dos últimos {days} dias recalculado")
+
+
+def migrate_promotions(project_id: str, dataset_id: str):
+    """
+    Copia a tabela de promoções para o layout particionado e troca os nomes.
+    
+    A cópia leva todas as linhas e a nova tabela é criada sem expiração de
+    partições, mesmo com PROMOTIONS_PARTITION_EXPIRATION_DAYS definido: ativar
+    a retenção numa tabela migrada é um passo explícito à parte.
+    
+    Depois da cópia, a tabela antiga é renomeada para promotions_legacy e as
+    linhas gravadas durante a cópia são copiadas de novo antes de a nova
+    tabela assumir o nome promotions. Entre as duas renomeações os lotes
+    falham com NotFound (e ficam no spool, se ativo); pare os coletores
+    durante a migração se o spool estiver desativado.
+    """
+    
+    client = bigquery.Client(project=project_id)
+    promotions_table_id = f"{project_id}.{dataset_id}.promotions"
+    legacy_table_id = f"{project_id}.{dataset_id}.promotions_legacy"
+    partitioned_table_id = f"{promotions_table_id}_partitioned"
+    
+    current = client.get_table(promotions_table_id)
+    if current.time_partitioning and current.time_partitioning.field == "collected_at":
+        print(f"✓ Tabela promotions já está particionada")
+        return
+    
+    sql = f"""
+        DECLARE copied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP();
+        
+        CREATE TABLE `{partitioned_table_id}`
+        PARTITION BY DATE(collected_at)
+        CLUSTER BY marketplace, item_id
+        AS SELECT * FROM `{promotions_table_id}`;
+        
+        ALTER TABLE `{promotions_table_id}` RENAME TO promotions_legacy;
+        
+        -- Linhas confirmadas depois do instantâneo da cópia
+        INSERT INTO `{partitioned_table_id}`
+        SELECT L.* FROM `{legacy_table_id}` L
+        WHERE L.inserted_at >= TIMESTAMP_SUB(copied_at, INTERVAL {MIGRATE_CATCHUP_HOURS} HOUR)
+            AND NOT EXISTS (
+                SELECT 1 FROM `{partitioned_table_id}` P
+                WHERE P.dedupe_key = L.dedupe_key
+                    AND P.execution_id = L.execution_id
+                    AND P.inserted_at = L.inserted_at
+            );
+        
+        ALTER TABLE `{partitioned_table_id}` RENAME TO promotions;
+    """
+    client.query(sql).result()
+    print(f"✓ Tabela promotions migrada (original em promotions_legacy)")
+    if PARTITION_EXPIRATION_DAYS:
+        print(
+            f"  Expiração de partições não aplicada; para ativá-la (apaga partições com "
+            f"mais de {PARTITION_EXPIRATION_DAYS} dias):\n"
+            f"  ALTER TABLE `{promotions_table_id}` "
+            f"SET OPTIONS (partition_expiration_days = {PARTITION_EXPIRATION_DAYS})"
+        )
+
+
+COMMANDS = {
+    "create": create_tables,
+    "backfill-rollup": backfill_rollup,
+    "migrate": migrate_promotions,
+}
+
+
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Uso: python create_tables.py <GCP_PROJECT_ID> [DATASET_ID]")
+    args = sys.argv[1:]
+    command = args.pop(0) if args and args[0] in COMMANDS else "create"
+    
+    if not args:
+        print("Uso: python create_tables.py [create|backfill-rollup|migrate] <GCP_PROJECT_ID> [DATASET_ID]")
         sys.exit(1)
     
-    project_id = sys.argv[1]
-    dataset_id = sys.argv[2] if len(sys.argv) > 2 else "promozone"
+    project_id = args[0]
+    dataset_id = args[1] if len(args) > 1 else "promozone"
     
-    create_tables(project_id, dataset_id)
+    COMMANDS[command](project_id, dataset_id)
@@ -0,0 +1,51 @@
+"""
+Testes de fumaça do benchmark offline (benchmarks/run.py).
+"""
+import unittest
+from unittest.mock import patch
+from app.config import Config
+from benchmarks.corpus import build_corpus, empty_listing, load_recorded_page
+from benchmarks.run import bench_fetch, compare, run_suite
+from benchmarks.server import OfferServer
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+    
+    def test_run_suite_reports_all_stages(self):
+        report = run_suite(pages_per_source=1, repeat_cards=1, repeat=1)
+        
+        self.assertEqual(
+            set(report["stages"]),
+            {"fetch", "parse", "normalize", "merge_promotions", "collect"},
+        )
+        self.assertEqual(report["stages"]["parse"]["bs4"]["items"],
+                         report["stages"]["parse"]["lxml"]["items"])
+        self.assertGreater(report["corpus"]["normalized"], 0)
+        self.assertEqual(report["server"]["errors"], 0)
+    
+    def test_fetch_counts_failed_requests(self):
+        corpus = build_corpus(["daily_offers"], 2, 1)
+        server = OfferServer(corpus, empty_listing(load_recorded_page()), error_rate=1.0)
+        
+        with server, patch.object(Config, "RATE_LIMIT_ENABLED", False), \
+                patch.object(Config, "HTTP_CACHE_DIR", ""):
+            result = bench_fetch(server, corpus, repeat=2)
+        
+        self.assertEqual(result["requests"], 2)
+        self.assertEqual(result["failed_requests"], 4)
+        self.assertIsNone(result["request_latency"])
+    
+    def test_compare_flags_only_slower_stages(self):
+        baseline = {"stages": {"fetch": {"median_ms": 10.0},
+                               "parse": {"lxml": {"median_ms": 5.0}}}}
+        current = {"stages": {"fetch": {"median_ms": 10.5},
+                              "parse": {"lxml": {"median_ms": 8.0}}}}
+        
+        regressions = compare(current, baseline, tolerance=0.2)
+        
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith("parse.lxml"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,239 @@
+"""
+Testes para o cliente BigQuery.
+"""
+import json
+import random
+import threading
+import unittest
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+from app.config import Config
+from app.database import bigquery_client, parquet_batch
+from app.database.bigquery_client import BigQueryClient, get_bigquery_client, reset_bigquery_client
+
+
+class TestBigQueryClientRegistry(unittest.TestCase):
+    """Testes para o cliente compartilhado do processo."""
+
+    def setUp(self):
+        reset_bigquery_client()
+        patcher = patch.object(bigquery_client.bigquery, "Client")
+        self.client_cls = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(reset_bigquery_client)
+
+    def test_single_instance_across_threads(self):
+        """Testa que threads concorrentes recebem a mesma instância."""
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(get_bigquery_client()))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len({id(client) for client in results}), 1)
+        self.assertEqual(self.client_cls.call_count, 1)
+
+    def test_reset_creates_new_instance(self):
+        """Testa que o reset (como após um fork) recria o cliente."""
+        first = get_bigquery_client()
+        reset_bigquery_client()
+        self.assertIsNot(get_bigquery_client(), first)
+
+    def test_failed_initialization_is_retried(self):
+        """Testa que uma falha na criação não fica em cache."""
+        self.client_cls.side_effect = [RuntimeError("sem credenciais"), object()]
+        with self.assertRaises(RuntimeError):
+            get_bigquery_client()
+        self.assertIsNotNone(get_bigquery_client())
+
+
+class TestMergePromotions(unittest.TestCase):
+    """Testes para o MERGE na tabela particionada."""
+
+    ROWS = [{"marketplace": "mercadolivre", "item_id": "MLB1", "url": "u", "title": "t",
+             "price": 10, "dedupe_key": "k1"}]
+
+    def setUp(self):
+        patcher = patch.object(bigquery_client.bigquery, "Client")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = BigQueryClient()
+        self.client.client = MagicMock()
+        self.client.known_keys = None
+        self.client.client.query.return_value.num_dml_affected_rows = 0
+
+    def _merge_call(self):
+        self.client.merge_promotions(self.ROWS, "exec-1")
+        call = self.client.client.query.call_args_list[0]
+        params = {p.name: p.value for p in call.kwargs["job_config"].query_parameters}
+        return call.args[0], params
+
+    def test_merge_prunes_to_dedupe_window(self):
+        """Testa que o MERGE filtra partições e blocos de clustering."""
+        with patch.object(Config, "MERGE_DEDUPE_WINDOW_DAYS", 7):
+            sql, params = self._merge_call()
+
+        self.assertIn("T.collected_at >= @dedupe_since", sql)
+        self.assertIn("T.item_id = S.item_id", sql)
+        self.assertEqual(params["inserted_at"] - params["dedupe_since"], timedelta(days=7))
+
+    def test_merge_without_window_scans_history(self):
+        """Testa que a janela 0 mantém a deduplicação sobre todo o histórico."""
+        with patch.object(Config, "MERGE_DEDUPE_WINDOW_DAYS", 0):
+            sql, params = self._merge_call()
+
+        self.assertNotIn("@dedupe_since", sql)
+        self.assertNotIn("dedupe_since", params)
+
+
+class FakeTempTables:
+    """Cliente BigQuery mínimo que guarda as tabelas temporárias em memória."""
+
+    def __init__(self, barrier):
+        self.barrier = barrier
+        self.tables = {}
+        self.merged = []
+        self.lock = threading.Lock()
+
+    def load_table_from_json(self, rows, table_id, job_config=None):
+        # WRITE_TRUNCATE: a carga substitui o conteúdo da tabela
+        with self.lock:
+            self.tables[table_id] = list(rows)
+        # Os dois lotes são carregados antes de qualquer MERGE
+        self.barrier.wait(5)
+        return MagicMock()
+
+    def query(self, sql, job_config=None):
+        table_id = sql.split("USING `", 1)[1].split("`", 1)[0]
+        with self.lock:
+            rows = self.tables[table_id]
+            self.merged.extend(row["dedupe_key"] for row in rows)
+        job = MagicMock()
+        job.num_dml_affected_rows = len(rows)
+        return job
+
+    def delete_table(self, table_id, not_found_ok=False):
+        with self.lock:
+            self.tables.pop(table_id, None)
+
+
+class TestConcurrentReplays(unittest.TestCase):
+    """Testes para réplicas simultâneas do spool de uma mesma execução."""
+
+    def setUp(self):
+        patcher = patch.object(bigquery_client.bigquery, "Client")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_overlapping_replays_keep_their_own_rows(self):
+        """Testa que cada MERGE usa sua própria tabela temporária."""
+        fake = FakeTempTables(threading.Barrier(2))
+        batches = [
+            [{"marketplace": "mercadolivre", "item_id": f"MLB{worker}{i}", "url": "u",
+              "title": "t", "price": 10, "dedupe_key": f"k{worker}{i}"} for i in range(3)]
+            for worker in ("a", "b")
+        ]
+        results = {}
+
+        def replay(name, rows):
+            client = BigQueryClient()
+            client.client = fake
+            client.known_keys = None
+            results[name] = client.merge_promotions(rows, "exec-falhou")
+
+        with patch.object(Config, "BIGQUERY_LOAD_FORMAT", "json"), \
+                patch.object(Config, "STATS_ROLLUP_ENABLED", False):
+            threads = [
+                threading.Thread(target=replay, args=(name, rows))
+                for name, rows in zip(("a", "b"), batches)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        expected = sorted(row["dedupe_key"] for rows in batches for row in rows)
+        self.assertEqual(sorted(fake.merged), expected)
+        self.assertEqual(results, {"a": (3, 0), "b": (3, 0)})
+        self.assertEqual(fake.tables, {})
+
+
+class TestParquetLoad(unittest.TestCase):
+    """Testes para a carga colunar em Parquet."""
+
+    ROWS = [
+        {"marketplace": "mercadolivre", "item_id": "MLB1", "url": "u1", "title": "t1",
+         "price": 19.9, "original_price": 29.9, "discount_percent": 33.44,
+         "seller": "Loja", "source": "technology", "dedupe_key": "k1",
+         "collected_at": "2024-01-02T03:00:00"},
+        {"marketplace": "mercadolivre", "item_id": "MLB2", "url": "u2", "title": "t2",
+         "price": 5, "dedupe_key": "k2"},
+    ]
+
+    def setUp(self):
+        patcher = patch.object(bigquery_client.bigquery, "Client")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = BigQueryClient()
+        self.client.client = MagicMock()
+        self.client.client.query.return_value.num_dml_affected_rows = 0
+        self.client.known_keys = None
+
+    def test_table_matches_json_rows(self):
+        """Testa que as colunas Arrow têm os mesmos valores das linhas JSON."""
+        table = parquet_batch.build_promotions_table(self.ROWS, "exec-1")
+        expected = bigquery_client.format_promotion_rows(self.ROWS, "exec-1")
+
+        self.assertEqual(table.schema.names, [field.name for field in bigquery_client.TEMP_TABLE_SCHEMA])
+        for column in ("marketplace", "item_id", "seller", "image_url", "source", "execution_id"):
+            self.assertEqual(table.column(column).to_pylist(), [row[column] for row in expected])
+        self.assertEqual(table.column("price").to_pylist(), [Decimal("19.9"), Decimal("5")])
+        self.assertEqual(table.column("original_price").to_pylist(), [Decimal("29.9"), None])
+        self.assertEqual(table.column("discount_percent").to_pylist(), [33.44, 0.0])
+        self.assertEqual(
+            table.column("collected_at")[0].as_py(),
+            datetime(2024, 1, 2, 3, tzinfo=timezone.utc),
+        )
+
+    def test_large_prices_match_json_rows(self):
+        """Testa que preços grandes chegam ao NUMERIC com o mesmo valor nos dois formatos."""
+        rng = random.Random(7)
+        prices = [99999999.99, 9604377.56, 1e16, 0.01] + [
+            round(rng.uniform(0, 1e7), 2) for _ in range(2000)
+        ]
+        rows = [{"item_id": str(i), "price": p, "original_price": p * 2, "dedupe_key": str(i)}
+                for i, p in enumerate(prices)]
+
+        table = parquet_batch.build_promotions_table(rows, "exec-1")
+        # O JSON leva o texto do float, que o BigQuery lê exatamente como NUMERIC
+        expected = [json.loads(json.dumps(row), parse_float=Decimal)
+                    for row in bigquery_client.format_promotion_rows(rows, "exec-1")]
+
+        for column in ("price", "original_price"):
+            mismatches = [
+                (row[column], value)
+                for row, value in zip(expected, table.column(column).to_pylist())
+                if row[column] != value
+            ]
+            self.assertEqual(mismatches[:5], [], column)
+        self.assertEqual(table.column("price")[0].as_py(), Decimal("99999999.99"))
+
+    def test_merge_uploads_parquet(self):
+        """Testa que o MERGE carrega a tabela temporária a partir de Parquet."""
+        with patch.object(Config, "BIGQUERY_LOAD_FORMAT", "parquet"):
+            self.client.merge_promotions(self.ROWS, "exec-1")
+
+        self.client.client.load_table_from_json.assert_not_called()
+        call = self.client.client.load_table_from_file.call_args
+        self.assertEqual(call.kwargs["job_config"].source_format, "PARQUET")
+        uploaded = parquet_batch.pq.read_table(call.args[0])
+        self.assertEqual(uploaded.column("dedupe_key").to_pylist(), ["k1", "k2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
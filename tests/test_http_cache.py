@@ -0,0 +1,131 @@
+"""
+Testes para o cache HTTP em disco.
+"""
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import httpx
+from app.config import Config
+from app.models.promotion import RawPromotion
+from app.scrapers.http_cache import HttpCache
+from app.scrapers.mercadolivre import MercadoLivreScraper
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+URL = "https://www.mercadolivre.com.br/ofertas"
+ITEM = RawPromotion(
+    marketplace="mercadolivre", item_id="MLB1", url="https://example.com/MLB1",
+    title="Produto", price=80.0, original_price=None, seller="Loja",
+    image_url=None, source="daily_offers",
+)
+
+
+class TestHttpCache(unittest.TestCase):
+    """Testes para HttpCache."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = HttpCache(self.tmp.name, max_bytes=10 * 1024 * 1024)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_conditional_headers_after_store(self):
+        """Testa que os validadores armazenados viram headers condicionais."""
+        self.assertEqual(self.cache.conditional_headers(URL), {})
+
+        self.cache.store(URL, "<html>ok</html>", '"abc"', "Wed, 21 Oct 2015 07:28:00 GMT")
+
+        self.assertEqual(self.cache.conditional_headers(URL), {
+            "If-None-Match": '"abc"',
+            "If-Modified-Since": "Wed, 21 Oct 2015 07:28:00 GMT",
+        })
+        self.assertEqual(self.cache.load_body(URL), "<html>ok</html>")
+
+    def test_responses_without_validators_are_not_stored(self):
+        """Testa que respostas sem ETag/Last-Modified não entram no cache."""
+        self.cache.store(URL, "<html>ok</html>", None, None)
+        self.assertIsNone(self.cache.load_body(URL))
+
+    def test_items_are_dropped_when_body_changes(self):
+        """Testa que uma nova versão da página descarta os itens antigos."""
+        self.cache.store(URL, "v1", '"1"', None)
+        self.cache.store_items(URL, [ITEM], 25, "dom:bs4")
+        self.assertEqual(self.cache.load_items(URL, 25, "dom:bs4"), [ITEM])
+        self.assertIsNone(self.cache.load_items(URL, 25, "json:bs4"))
+        self.assertIsNone(self.cache.load_items(URL, 50, "dom:bs4"))
+
+        self.cache.store(URL, "v2", '"2"', None)
+        self.assertIsNone(self.cache.load_items(URL, 25, "dom:bs4"))
+
+    def test_lru_eviction(self):
+        """Testa que as entradas menos usadas são removidas ao exceder o limite."""
+        cache = HttpCache(self.tmp.name, max_bytes=1500)
+        body = os.urandom(400).hex()
+
+        cache.store("https://a", body, '"a"', None)
+        cache.store("https://b", body, '"b"', None)
+        os.utime(cache._path("https://a", "meta.json"), (1, 1))
+        os.utime(cache._path("https://b", "meta.json"), (2, 2))
+        cache.store("https://c", body, '"c"', None)
+
+        self.assertIsNone(cache.load_body("https://a"))
+        self.assertIsNotNone(cache.load_body("https://c"))
+
+    def test_directory_scanned_only_when_needed(self):
+        """Testa que o diretório só é varrido ao passar do limite ou do intervalo."""
+        cache = HttpCache(self.tmp.name, max_bytes=10 * 1024 * 1024)
+        with patch.object(cache, "_evict", wraps=cache._evict) as evict:
+            for i in range(20):
+                cache.store(f"https://site/{i}", "corpo", f'"{i}"', None)
+            # Só a primeira gravação varre, para conhecer o tamanho inicial
+            self.assertEqual(evict.call_count, 1)
+
+            cache._scanned_at -= HttpCache.EVICT_INTERVAL
+            cache.store("https://site/intervalo", "corpo", '"x"', None)
+            self.assertEqual(evict.call_count, 2)
+
+            cache.max_bytes = cache._size
+            cache.store("https://site/limite", "corpo", '"y"', None)
+            self.assertEqual(evict.call_count, 3)
+            self.assertLessEqual(cache._size, cache.max_bytes)
+
+
+class TestScraperConditionalRequests(unittest.IsolatedAsyncioTestCase):
+    """Testa o reaproveitamento de itens em respostas 304."""
+
+    async def test_not_modified_skips_parsing(self):
+        with open(os.path.join(FIXTURES_DIR, "ofertas_page.html"), encoding="utf-8") as f:
+            html = f.read()
+
+        def handler(request):
+            if request.headers.get("If-None-Match") == '"v1"':
+                return httpx.Response(304)
+            return httpx.Response(200, text=html, headers={"ETag": '"v1"'})
+
+        with tempfile.TemporaryDirectory() as tmp, \
+                patch.object(Config, "HTTP_CACHE_DIR", tmp):
+            results = []
+            parse_calls = []
+            for _ in range(2):
+                scraper = MercadoLivreScraper()
+                scraper.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+                original_parse = scraper.parse_page
+
+                async def counting_parse(*args, **kwargs):
+                    parse_calls.append(args)
+                    return await original_parse(*args, **kwargs)
+
+                scraper.parse_page = counting_parse
+                results.append(await scraper._scrape_page(URL, "daily_offers", 25))
+                await scraper.close()
+
+        self.assertEqual(len(parse_calls), 1)
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(len(results[1]), 5)
+        # Itens reaproveitados mantêm o tipo e seguem no caminho colunar
+        self.assertEqual({type(item) for item in results[1]}, {RawPromotion})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+"""
+Testes para as coletas assíncronas.
+"""
+import tempfile
+import threading
+import unittest
+import uuid
+from unittest.mock import patch
+from app.jobs.manager import JobManager, JobStore
+
+
+class TestJobManager(unittest.TestCase):
+    """Testes para JobManager e JobStore."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = JobStore(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_job_runs_in_background_and_reports_result(self):
+        """Testa o ciclo queued → running → success com progresso."""
+        release = threading.Event()
+
+        def run(execution_id, on_progress):
+            on_progress({"items_collected": 10})
+            release.wait(5)
+            return {"execution_id": execution_id, "status": "success", "items_inserted": 7}
+
+        manager = JobManager(run, self.store, max_workers=1, max_pending=2)
+        execution_id = str(uuid.uuid4())
+
+        job = manager.submit(execution_id)
+        self.assertEqual(job["status"], "queued")
+
+        release.set()
+        manager.shutdown(wait=True)
+
+        job = self.store.get(execution_id)
+        self.assertEqual(job["status"], "success")
+        self.assertEqual(job["progress"], {"items_collected": 10})
+        self.assertEqual(job["result"]["items_inserted"], 7)
+
+    def test_queue_is_bounded(self):
+        """Testa que a fila recusa coletas acima do limite."""
+        release = threading.Event()
+
+        def run(execution_id, on_progress):
+            release.wait(5)
+            return {"status": "success"}
+
+        manager = JobManager(run, self.store, max_workers=1, max_pending=1)
+        self.assertIsNotNone(manager.submit(str(uuid.uuid4())))
+        self.assertIsNone(manager.submit(str(uuid.uuid4())))
+
+        release.set()
+        manager.shutdown(wait=True)
+
+    def test_failed_job_is_reported(self):
+        """Testa que exceções viram status de erro."""
+        def run(execution_id, on_progress):
+            raise RuntimeError("falhou")
+
+        manager = JobManager(run, self.store, max_workers=1, max_pending=1)
+        execution_id = str(uuid.uuid4())
+        manager.submit(execution_id)
+        manager.shutdown(wait=True)
+
+        job = self.store.get(execution_id)
+        self.assertEqual(job["status"], "error")
+        self.assertEqual(job["result"]["error"], "falhou")
+
+    def test_shutdown_marks_cancelled_and_interrupted_jobs(self):
+        """Testa que o encerramento não deixa coletas presas em queued/running."""
+        started = threading.Event()
+        release = threading.Event()
+
+        def run(execution_id, on_progress):
+            started.set()
+            release.wait(5)
+            return {"execution_id": execution_id, "status": "success"}
+
+        manager = JobManager(run, self.store, max_workers=1, max_pending=2)
+        running_id, queued_id = str(uuid.uuid4()), str(uuid.uuid4())
+        manager.submit(running_id)
+        self.assertTrue(started.wait(5))
+        manager.submit(queued_id)
+
+        manager.shutdown()
+
+        self.assertEqual(self.store.get(queued_id)["status"], "cancelled")
+        self.assertEqual(self.store.get(running_id)["status"], "error")
+        self.assertEqual(manager._pending, 1)
+
+        # Se a coleta terminar antes de o worker sair, o resultado prevalece
+        release.set()
+        manager.shutdown(wait=True)
+        self.assertEqual(self.store.get(running_id)["status"], "success")
+        self.assertEqual(manager._pending, 0)
+
+    def test_store_rejects_non_uuid_ids(self):
+        """Testa que IDs fora do formato UUID não viram caminhos."""
+        self.assertIsNone(self.store.get("../../etc/passwd"))
+
+
+class TestCollectAsyncRoutes(unittest.TestCase):
+    """Testes para POST /collect?async=1 e GET /collect/<id>."""
+
+    def setUp(self):
+        from app.main import create_app
+        self.tmp = tempfile.TemporaryDirectory()
+        self.manager = JobManager(
+            lambda execution_id, on_progress: {"execution_id": execution_id, "status": "success"},
+            JobStore(self.tmp.name),
+            max_workers=1,
+            max_pending=2,
+        )
+        patcher = patch("app.main.get_job_manager", return_value=self.manager)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        with patch("app.main.get_bigquery_client"), patch("app.main.start_spool_flusher"):
+            self.client = create_app().test_client()
+
+    def tearDown(self):
+        self.manager.shutdown(wait=True)
+        self.tmp.cleanup()
+
+    def test_async_collect_returns_execution_id(self):
+        response = self.client.post("/collect?async=1")
+        self.assertEqual(response.status_code, 202)
+        execution_id = response.get_json()["execution_id"]
+
+        self.manager.shutdown(wait=True)
+        status = self.client.get(f"/collect/{execution_id}")
+        self.assertEqual(status.status_code, 200)
+        self.assertEqual(status.get_json()["status"], "success")
+
+    def test_unknown_execution_returns_404(self):
+        self.assertEqual(self.client.get(f"/collect/{uuid.uuid4()}").status_code, 404)
+        self.assertEqual(self.client.get("/collect/invalido").status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+"""
+Testes para a extração via estado JSON embutido.
+"""
+import os
+import unittest
+from app.scrapers import json_state_extractor
+from app.scrapers.mercadolivre import MercadoLivreScraper, parse_offer_page
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+class TestJsonStateExtractor(unittest.TestCase):
+    """Testes para json_state_extractor."""
+
+    def test_extracts_items_from_script_tag(self):
+        """Testa a extração dos cards do blob em <script>."""
+        items = json_state_extractor.extract_items(
+            load_fixture("ofertas_state_page.html"), "technology", 100
+        )
+
+        self.assertEqual([item["item_id"] for item in items], ["MLB4001001", "MLB4002002"])
+        self.assertEqual(items[0]["title"], 'Smart TV 55" 4K UHD')
+        self.assertEqual(items[0]["price"], 2399.9)
+        self.assertEqual(items[0]["original_price"], 3199.0)
+        self.assertEqual(
+            items[0]["url"], "https://www.mercadolivre.com.br/smart-tv-55-4k/p/MLB4001001"
+        )
+        self.assertEqual(
+            items[0]["image_url"], "https://http2.mlstatic.com/D_Q_NP_700001-MLA7000-O.webp"
+        )
+        self.assertIsNone(items[1]["original_price"])
+        self.assertEqual(items[1]["source"], "technology")
+
+    def test_extracts_items_from_window_assignment(self):
+        """Testa o blob atribuído a window.__PRELOADED_STATE__."""
+        html = (
+            "<script>window.__PRELOADED_STATE__ = "
+            '{"items":[{"polycard":{"metadata":{"id":"MLB9","url":"https://x/MLB9"},'
+            '"components":[{"type":"title","title":{"text":"Item; com {chaves}"}},'
+            '{"type":"price","price":{"current_price":{"value":10}}}]}}]};'
+            "window.OTHER = {};</script>"
+        )
+        items = json_state_extractor.extract_items(html, "daily_offers", 10)
+
+        self.assertEqual(len(items), 1)
+        self.assertEqual(items[0]["title"], "Item; com {chaves}")
+
+    def test_limit_counts_cards(self):
+        """Testa o limite de cards processados."""
+        items = json_state_extractor.extract_items(
+            load_fixture("ofertas_state_page.html"), "technology", 1
+        )
+        self.assertEqual(len(items), 1)
+
+    def test_missing_state_returns_none(self):
+        """Testa que páginas sem estado retornam None."""
+        html = load_fixture("ofertas_page.html")
+        self.assertIsNone(json_state_extractor.extract_items(html, "daily_offers", 10))
+
+    def test_parse_offer_page_falls_back_to_dom(self):
+        """Testa o fallback para o caminho CSS quando não há estado."""
+        html = load_fixture("ofertas_page.html")
+        expected = MercadoLivreScraper._parse_items(html, "daily_offers", 100)
+
+        self.assertEqual(parse_offer_page(html, "daily_offers", 100, mode="json"), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+"""
+Testes para o índice local de chaves conhecidas.
+"""
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from app.config import Config
+from app.database import bigquery_client
+from app.database.bigquery_client import BigQueryClient
+from app.database.known_keys import KnownKeys, today
+
+
+def make_row(key):
+    return {"marketplace": "mercadolivre", "item_id": key, "url": "u", "title": "t",
+            "price": 10, "dedupe_key": f"mercadolivre#{key}#10"}
+
+
+class TestKnownKeys(unittest.TestCase):
+    """Testes para o conjunto de digests persistido em disco."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "keys.bin")
+
+    def test_filter_new_drops_known_rows(self):
+        """Testa que apenas linhas com chaves desconhecidas passam."""
+        index = KnownKeys(self.path, retention_days=30)
+        index.add([make_row("MLB1")["dedupe_key"]])
+
+        rows = index.filter_new([make_row("MLB1"), make_row("MLB2")])
+
+        self.assertEqual([row["item_id"] for row in rows], ["MLB2"])
+
+    def test_index_survives_restart(self):
+        """Testa que o índice é recarregado do disco."""
+        KnownKeys(self.path, retention_days=30).add(["a", "b"])
+
+        reloaded = KnownKeys(self.path, retention_days=30)
+
+        self.assertEqual(len(reloaded), 2)
+        self.assertIn("a", reloaded)
+        self.assertNotIn("c", reloaded)
+
+    def test_workers_sharing_the_file_keep_each_others_keys(self):
+        """Testa que anexos e compactações de um worker não apagam as chaves de outro."""
+        first = KnownKeys(self.path, retention_days=30)
+        second = KnownKeys(self.path, retention_days=30)
+
+        first.add(["a"])
+        second.add(["b"])
+        self.assertEqual(len(KnownKeys(self.path, retention_days=30)), 2)
+
+        second.save()
+        first.add(["c"])
+        reloaded = KnownKeys(self.path, retention_days=30)
+        self.assertEqual(len(reloaded), 3)
+        self.assertIn("b", second)
+
+    def test_add_only_appends_new_keys(self):
+        """Testa que chaves já conhecidas não são regravadas."""
+        index = KnownKeys(self.path, retention_days=30)
+        index.add(["a", "b"])
+        size = os.path.getsize(self.path)
+
+        index.add(["a", "b"])
+        self.assertEqual(os.path.getsize(self.path), size)
+
+        index.add(["a", "c"])
+        self.assertEqual(os.path.getsize(self.path), size + 8 + 8)
+
+    def test_incomplete_block_is_ignored(self):
+        """Testa que um anexo interrompido não invalida os blocos anteriores."""
+        KnownKeys(self.path, retention_days=30).add(["a"])
+        with open(self.path, "ab") as f:
+            f.write(b"\x01\x02\x03")
+
+        self.assertIn("a", KnownKeys(self.path, retention_days=30))
+
+    def test_old_days_expire(self):
+        """Testa que chaves fora da retenção são descartadas."""
+        index = KnownKeys(self.path, retention_days=7)
+        index.warm(lambda days: [("recente", today() - 1), ("antiga", today() - 30)])
+
+        self.assertIn("recente", index)
+        self.assertNotIn("antiga", KnownKeys(self.path, retention_days=7))
+
+
+class TestMergeWithKnownKeys(unittest.TestCase):
+    """Testes para o pré-filtro no merge_promotions."""
+
+    def setUp(self):
+        patcher = patch.object(bigquery_client.bigquery, "Client")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = BigQueryClient()
+        self.client.client = MagicMock()
+        self.client.client.query.return_value.num_dml_affected_rows = 1
+        self.client.known_keys = KnownKeys("", retention_days=30)
+        patcher = patch.object(Config, "BIGQUERY_LOAD_FORMAT", "json")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_known_rows_are_not_uploaded(self):
+        """Testa que linhas conhecidas não vão para a tabela temporária."""
+        self.client.known_keys.add([make_row("MLB1")["dedupe_key"]])
+
+        inserted, deduplicated = self.client.merge_promotions(
+            [make_row("MLB1"), make_row("MLB2")], "exec-1"
+        )
+
+        uploaded = self.client.client.load_table_from_json.call_args.args[0]
+        self.assertEqual([row["item_id"] for row in uploaded], ["MLB2"])
+        self.assertEqual((inserted, deduplicated), (1, 1))
+        self.assertIn(make_row("MLB2")["dedupe_key"], self.client.known_keys)
+
+    def test_unchanged_run_skips_jobs(self):
+        """Testa que um lote todo conhecido não dispara carga nem MERGE."""
+        self.client.known_keys.add([make_row("MLB1")["dedupe_key"]])
+
+        self.assertEqual(self.client.merge_promotions([make_row("MLB1")], "exec-1"), (0, 1))
+        self.client.client.load_table_from_json.assert_not_called()
+        self.client.client.query.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
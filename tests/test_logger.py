@@ -0,0 +1,134 @@
+"""
+Testes do logging estruturado.
+"""
+import io
+import json
+import logging
+import sys
+import unittest
+from unittest.mock import patch
+from app.config import Config
+from app.utils import logger as logger_module
+from app.utils.logger import JsonFormatter, SamplingFilter, setup_logger
+
+
+def make_record(level=logging.WARNING, msg="aviso %s", args=("x",), lineno=10, created=1000.0):
+    record = logging.LogRecord("app.teste", level, "/app/teste.py", lineno, msg, args, None)
+    record.created = created
+    return record
+
+
+class TestJsonFormatter(unittest.TestCase):
+    """Testes do formatter JSON."""
+
+    def test_format_fields(self):
+        """Testa os campos e o horário UTC do registro."""
+        record = make_record(created=1700000000.25)
+        data = json.loads(JsonFormatter().format(record))
+
+        self.assertEqual(data["timestamp"], "2023-11-14T22:13:20.250000")
+        self.assertEqual(data["level"], "WARNING")
+        self.assertEqual(data["message"], "aviso x")
+        self.assertEqual(data["logger"], "app.teste")
+        self.assertNotIn("exception", data)
+
+    def test_format_prepared_exception(self):
+        """Testa que o traceback resolvido pelo QueueHandler vai para o JSON."""
+        try:
+            raise ValueError("falhou")
+        except ValueError:
+            record = logging.LogRecord(
+                "app.teste", logging.ERROR, "/app/teste.py", 1, "erro", None, sys.exc_info()
+            )
+        prepared = logger_module._PreparedQueueHandler(None).prepare(record)
+
+        self.assertIsNone(prepared.exc_info)
+        data = json.loads(JsonFormatter().format(prepared))
+        self.assertIn("ValueError: falhou", data["exception"])
+
+    def test_format_suppressed(self):
+        """Testa que a contagem de registros descartados aparece no JSON."""
+        record = make_record()
+        record.suppressed = 7
+        self.assertEqual(json.loads(JsonFormatter().format(record))["suppressed"], 7)
+
+
+class TestSamplingFilter(unittest.TestCase):
+    """Testes da amostragem dos registros DEBUG repetidos."""
+
+    def test_limits_per_callsite(self):
+        """Testa o limite por ponto do código e a contagem na janela seguinte."""
+        sampler = SamplingFilter(burst=2, interval=60)
+
+        accepted = [
+            sampler.filter(make_record(level=logging.DEBUG, created=1000.0 + i)) for i in range(5)
+        ]
+        self.assertEqual(accepted, [True, True, False, False, False])
+
+        # Outro ponto do código tem sua própria janela
+        self.assertTrue(sampler.filter(make_record(level=logging.DEBUG, lineno=20, created=1001.0)))
+
+        record = make_record(level=logging.DEBUG, created=1061.0)
+        self.assertTrue(sampler.filter(record))
+        self.assertEqual(record.suppressed, 3)
+
+    def test_info_and_above_are_never_sampled(self):
+        """Testa que progresso, avisos e erros passam sempre."""
+        sampler = SamplingFilter(burst=1, interval=60)
+        for level in (logging.INFO, logging.WARNING, logging.ERROR):
+            results = [sampler.filter(make_record(level=level)) for _ in range(3)]
+            self.assertEqual(results, [True, True, True], logging.getLevelName(level))
+
+    def test_disabled(self):
+        """Testa que burst 0 desativa a amostragem."""
+        sampler = SamplingFilter(burst=0, interval=60)
+        self.assertTrue(all(sampler.filter(make_record(level=logging.DEBUG)) for _ in range(50)))
+
+
+class TestSetupLogger(unittest.TestCase):
+    """Testes da configuração dos loggers."""
+
+    def test_idempotent(self):
+        """Testa que chamadas repetidas não duplicam handlers."""
+        first = setup_logger("app.teste.idempotente")
+        second = setup_logger("app.teste.idempotente")
+
+        self.assertIs(first, second)
+        self.assertEqual(len(first.handlers), 1)
+        self.assertIs(first.handlers[0], setup_logger("app.teste.outro").handlers[0])
+
+    def test_bigquery_client_uses_shared_handler(self):
+        """Testa que o cliente BigQuery registra pelo handler compartilhado."""
+        from app.database import bigquery_client
+
+        self.assertIs(bigquery_client.logger.handlers[0], logger_module._get_handler())
+
+    def test_level_from_config(self):
+        """Testa que DEBUG é descartado antes da formatação no nível INFO."""
+        with patch.object(Config, "LOG_LEVEL", "info"):
+            log = setup_logger("app.teste.nivel")
+
+        self.assertFalse(log.isEnabledFor(logging.DEBUG))
+        self.assertTrue(log.isEnabledFor(logging.INFO))
+
+    def test_listener_writes_json(self):
+        """Testa que o listener grava os registros enfileirados em JSON."""
+        log = setup_logger("app.teste.saida")
+        console_handler = logger_module._listener.handlers[0]
+        stream = io.StringIO()
+        previous = console_handler.setStream(stream)
+        try:
+            log.warning("Página %s falhou", 3)
+            # stop() esvazia a fila antes de parar a thread
+            logger_module._listener.stop()
+        finally:
+            console_handler.setStream(previous)
+            logger_module._listener.start()
+
+        data = json.loads(stream.getvalue().strip().splitlines()[-1])
+        self.assertEqual(data["message"], "Página 3 falhou")
+        self.assertEqual(data["logger"], "app.teste.saida")
+
+
+if __name__ == '__main__':
+    unittest.main()
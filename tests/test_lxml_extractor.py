@@ -0,0 +1,68 @@
+"""
+Testes de equivalência entre o extrator lxml e o caminho BeautifulSoup.
+"""
+import os
+import unittest
+from app.scrapers import lxml_extractor
+from app.scrapers.mercadolivre import MercadoLivreScraper
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+class TestLxmlExtractor(unittest.TestCase):
+    """Testa que o extrator lxml retorna os mesmos itens do BeautifulSoup."""
+
+    def assertSameItems(self, html, limit=100):
+        expected = MercadoLivreScraper._parse_items(html, "daily_offers", limit)
+        result = lxml_extractor.extract_items(html, "daily_offers", limit)
+        self.assertEqual(result, expected)
+        return result
+
+    def test_fixture_page(self):
+        """Testa a página de ofertas salva."""
+        items = self.assertSameItems(load_fixture("ofertas_page.html"))
+        self.assertEqual(len(items), 5)
+
+    def test_limit_applies_to_cards(self):
+        """Testa que o limite conta cards, inclusive os descartados."""
+        html = load_fixture("ofertas_page.html")
+        for limit in range(0, 9):
+            self.assertSameItems(html, limit)
+
+    def test_fallback_selectors(self):
+        """Testa os seletores alternativos quando não há .poly-card."""
+        html = """
+        <div class="ui-search-result">
+          <img data-src="https://img/1.jpg">
+          <a href="https://www.mercadolivre.com.br/p/MLB111">Produto  <span>1</span></a>
+          <div class="poly-price__current"><span class="andes-money-amount__fraction">1.234</span></div>
+        </div>
+        """
+        items = self.assertSameItems(html)
+        self.assertEqual(items[0]["title"], "Produto1")
+
+    def test_text_ignores_comments_and_scripts(self):
+        """Testa que comentários e scripts ficam fora do título."""
+        html = """
+        <div class="poly-card">
+          <img src="https://img/2.jpg">
+          <a class="poly-component__title" href="https://x/MLB222">Tênis<!-- oculto -->
+            Esportivo<script>var x = 1;</script><style>.a{}</style> Azul</a>
+          <div class="poly-price__current"><b class="andes-money-amount__fraction"> 79 </b></div>
+        </div>
+        """
+        self.assertSameItems(html)
+
+    def test_empty_document(self):
+        """Testa documento vazio ou sem cards."""
+        self.assertEqual(lxml_extractor.extract_items("", "daily_offers", 10), [])
+        self.assertSameItems("<html><body><p>Sem ofertas</p></body></html>")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+Testes para as métricas Prometheus e o endpoint /metrics.
+"""
+import gzip
+import unittest
+from unittest.mock import patch
+import httpx
+from prometheus_client import REGISTRY
+from app.normalizers.promotion_normalizer import PromotionNormalizer
+from app.scrapers.mercadolivre import MercadoLivreScraper
+
+
+def sample(name, labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class TestInstrumentation(unittest.IsolatedAsyncioTestCase):
+    """Testes para os pontos instrumentados."""
+
+    async def test_fetch_records_latency_retries_and_bytes(self):
+        calls = []
+        body = gzip.compress(b"ok" * 50)
+
+        def handler(request):
+            calls.append(request.url)
+            if len(calls) == 1:
+                return httpx.Response(503, headers={"Retry-After": "0"})
+            return httpx.Response(
+                200, headers={"Content-Encoding": "gzip"}, stream=httpx.ByteStream(body)
+            )
+
+        labels = {"host": "metrics.example.com"}
+        retries_before = sample("promozone_fetch_retries_total", {**labels, "reason": "503"})
+        bytes_before = sample("promozone_fetch_bytes_total", labels)
+        ok_before = sample("promozone_fetch_seconds_count", {**labels, "status": "200"})
+
+        scraper = MercadoLivreScraper()
+        scraper.rate_limiter = None
+        scraper.http_cache = None
+        scraper.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        await scraper.fetch("https://metrics.example.com/ofertas")
+        await scraper.close()
+
+        self.assertEqual(
+            sample("promozone_fetch_retries_total", {**labels, "reason": "503"}) - retries_before, 1
+        )
+        # Bytes comprimidos, como chegaram pela rede
+        self.assertEqual(sample("promozone_fetch_bytes_total", labels) - bytes_before, len(body))
+        self.assertEqual(
+            sample("promozone_fetch_seconds_count", {**labels, "status": "200"}) - ok_before, 1
+        )
+
+    def test_normalizer_counts_dropped_items_by_reason(self):
+        before_missing = sample("promozone_items_dropped_total", {"reason": "missing_item_id"})
+        before_price = sample("promozone_items_dropped_total", {"reason": "invalid_price"})
+
+        PromotionNormalizer.normalize_items([
+            {"marketplace": "mercadolivre", "url": "https://x", "title": "Sem id", "price": 10},
+            {"marketplace": "mercadolivre", "item_id": "MLB1", "url": "https://x",
+             "title": "Preço negativo", "price": -1},
+        ])
+
+        self.assertEqual(
+            sample("promozone_items_dropped_total", {"reason": "missing_item_id"}) - before_missing, 1
+        )
+        self.assertEqual(
+            sample("promozone_items_dropped_total", {"reason": "invalid_price"}) - before_price, 1
+        )
+
+
+class TestMetricsRoute(unittest.TestCase):
+    """Testes para GET /metrics."""
+
+    def setUp(self):
+        from app.main import create_app
+        with patch("app.main.get_bigquery_client"), patch("app.main.start_spool_flusher"):
+            self.client = create_app().test_client()
+
+    def test_metrics_exposes_prometheus_text(self):
+        PromotionNormalizer.normalize_items([{"marketplace": "mercadolivre"}])
+
+        response = self.client.get("/metrics")
+        body = response.get_data(as_text=True)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith("text/plain"))
+        self.assertIn("promozone_items_dropped_total", body)
+        self.assertIn("promozone_fetch_seconds", body)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+"""
+Testes para os registros compactos de promoções.
+"""
+import json
+import pickle
+import unittest
+from dataclasses import FrozenInstanceError
+from app.database.bigquery_client import format_promotion_rows
+from app.models.promotion import PROMOTION_FIELDS, Promotion, RawPromotion, to_json_dict, with_sources
+from app.normalizers.promotion_normalizer import PromotionNormalizer
+
+
+def make_raw(**overrides):
+    fields = {
+        "marketplace": "mercadolivre",
+        "item_id": "MLB1",
+        "url": "https://example.com/MLB1",
+        "title": "Produto",
+        "price": 80.0,
+        "original_price": 100.0,
+        "seller": "Mercado Livre",
+        "image_url": None,
+        "source": "daily_offers",
+    }
+    fields.update(overrides)
+    return RawPromotion(**fields)
+
+
+class TestPromotionRecords(unittest.TestCase):
+    """Testes para RawPromotion e Promotion."""
+
+    def test_records_are_slotted_and_frozen(self):
+        raw = make_raw()
+
+        self.assertFalse(hasattr(raw, "__dict__"))
+        with self.assertRaises(FrozenInstanceError):
+            raw.price = 1.0
+
+    def test_mapping_access_matches_dict(self):
+        raw = make_raw()
+        as_dict = raw.to_dict()
+
+        self.assertEqual(raw, as_dict)
+        self.assertEqual(as_dict, raw)
+        self.assertEqual({**raw}, as_dict)
+        self.assertEqual(raw["price"], 80.0)
+        self.assertIsNone(raw.get("collected_at"))
+        self.assertNotIn("collected_at", raw)
+        with self.assertRaises(KeyError):
+            raw["collected_at"]
+
+    def test_repeated_strings_are_interned(self):
+        source = "".join(["daily_", "offers"])
+        first = make_raw(source=source)
+        second = make_raw(source="daily_offers")
+
+        self.assertIs(first.source, second.source)
+        self.assertIs(first.marketplace, second.marketplace)
+
+    def test_records_survive_pickling(self):
+        raw = make_raw()
+
+        self.assertEqual(pickle.loads(pickle.dumps(raw)), raw)
+
+    def test_sources_key_only_when_set(self):
+        promotion = PromotionNormalizer.normalize_item(make_raw())
+        bare = Promotion(**{name: promotion[name] for name in PROMOTION_FIELDS})
+        merged = with_sources(bare, ["daily_offers"])
+
+        self.assertIsInstance(promotion, Promotion)
+        self.assertEqual(promotion["sources"], [promotion.source])
+        self.assertNotIn("sources", bare)
+        self.assertEqual(merged["sources"], ["daily_offers"])
+        self.assertEqual(json.loads(json.dumps(to_json_dict(merged)))["sources"], ["daily_offers"])
+
+    def test_load_row_matches_dict_formatting(self):
+        promotion = PromotionNormalizer.normalize_item(make_raw())
+
+        from_record = format_promotion_rows([promotion], "exec-1")
+        from_dict = format_promotion_rows([promotion.to_dict()], "exec-1")
+
+        self.assertEqual(len(from_record), 1)
+        from_record[0].pop("collected_at")
+        from_dict[0].pop("collected_at")
+        self.assertEqual(from_record, from_dict)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,13 @@
 """
 Testes para o normalizer de promoções.
 """
+import math
+import random
 import unittest
+from decimal import Decimal
+from unittest.mock import patch
+from app.config import Config
+from app.normalizers import columnar
 from app.normalizers.promotion_normalizer import PromotionNormalizer
 
 
@@ -112,6 +118,161 @@ class TestPromotionNormalizer(unittest.TestCase):
         self.assertEqual(len(result), 2)
         self.assertEqual(result[0]["item_id"], "MLB1")
         self.assertEqual(result[1]["item_id"], "MLB2")
+    
+    def test_deduplicate_items_keeps_priority_source(self):
+        """Testa que itens repetidos entre fontes viram um só, com todas as fontes."""
+        item = {
+            "marketplace": "mercadolivre",
+            "item_id": "MLB1",
+            "url": "https://example.com/1",
+            "title": "Produto 1",
+            "price": 100.00,
+        }
+        items = [
+            {**item, "source": "electronics"},
+            {**item, "item_id": "MLB2", "source": "electronics"},
+            {**item, "source": "technology"},
+            {**item, "source": "daily_offers", "title": "Produto 1 (oferta)"},
+        ]
+        
+        result = PromotionNormalizer.normalize_items(items)
+        reversed_result = PromotionNormalizer.normalize_items(list(reversed(items)))
+        
+        self.assertEqual([r["item_id"] for r in result], ["MLB1", "MLB2"])
+        self.assertEqual(result[0]["source"], "daily_offers")
+        self.assertEqual(result[0]["sources"], ["daily_offers", "electronics", "technology"])
+        self.assertEqual(result[1]["sources"], ["electronics"])
+        self.assertEqual(reversed_result[0], result[0])
+    
+    def test_deduplicate_items_passes_unique_records_through(self):
+        """Testa que só as chaves repetidas recriam o item vencedor."""
+        normalized = [
+            PromotionNormalizer.normalize_item({
+                "marketplace": "mercadolivre", "item_id": item_id, "url": "https://example.com/1",
+                "title": "Produto 1", "price": 100.00, "source": source,
+            })
+            for item_id, source in (("MLB1", "electronics"), ("MLB2", "technology"), ("MLB1", "daily_offers"))
+        ]
+        
+        result = PromotionNormalizer.deduplicate_items(normalized)
+        
+        self.assertIs(result[1], normalized[1])
+        self.assertEqual(result[1]["sources"], ["technology"])
+        self.assertEqual(result[0]["sources"], ["daily_offers", "electronics"])
+
+
+
+def random_price(rng):
+    return rng.choice([
+        None, 0, "", "0", "0.0", "-1", "nan",
+        # Formatos em que o texto do pyarrow difere do str() do Python
+        100.0, 10 ** 15, 1e15, 1e16, 1e-5, 123456789012345.6, "2.5e-7", " 12.5", "1_000",
+        rng.randrange(-5, 3000),
+        round(rng.uniform(-10, 3000), rng.randrange(4)),
+        str(round(rng.uniform(0, 3000), rng.randrange(4))),
+    ])
+
+
+def random_item(rng):
+    item = {
+        "marketplace": rng.choice(["mercadolivre"] * 8 + ["", None]),
+        "item_id": rng.choice([None] + [f"MLB{n}" for n in range(40)]),
+        "url": rng.choice(["https://example.com/1", "https://example.com/2", ""]),
+        "title": rng.choice(["Produto", "Outro produto", None]),
+        "price": random_price(rng),
+        "source": rng.choice(["daily_offers", "technology", "electronics", None]),
+    }
+    if rng.random() < 0.8:
+        item["original_price"] = random_price(rng)
+    if rng.random() < 0.5:
+        item["seller"] = rng.choice(["", None, "Loja"])
+    return item
+
+
+def normalize_per_item(items):
+    results = [PromotionNormalizer.normalize_item(item) for item in items]
+    return [result for result in results if result]
+
+
+@unittest.skipUnless(columnar.is_available(), "NumPy não instalado")
+class TestColumnarNormalizer(unittest.TestCase):
+    """Testes para a normalização colunar."""
+
+    def assertSameRows(self, expected, actual):
+        self.assertEqual(len(expected), len(actual))
+        for left, right in zip(expected, actual):
+            self.assertEqual(list(left), list(right))
+            for key in left:
+                self.assertIs(type(left[key]), type(right[key]), key)
+                if isinstance(left[key], float) and math.isnan(left[key]):
+                    self.assertTrue(math.isnan(right[key]))
+                else:
+                    self.assertEqual(left[key], right[key], key)
+
+    def test_matches_per_item_path(self):
+        rng = random.Random(7)
+        for _ in range(50):
+            items = [random_item(rng) for _ in range(rng.randrange(200))]
+            self.assertSameRows(normalize_per_item(items), columnar.normalize_batch(items))
+
+    def test_discount_rounding_matches_builtin_round(self):
+        rng = random.Random(11)
+        items = []
+        for n in range(20000):
+            original = round(rng.uniform(1, 5000), 2)
+            items.append({
+                "marketplace": "mercadolivre",
+                "item_id": f"MLB{n}",
+                "url": "https://example.com",
+                "title": "Produto",
+                "price": round(rng.uniform(0.01, original), 2),
+                "original_price": original,
+            })
+
+        self.assertSameRows(normalize_per_item(items), columnar.normalize_batch(items))
+
+    def test_text_prices_match_per_item_path(self):
+        rng = random.Random(5)
+        for extra in ([], [" 12.5"]):
+            prices = [str(rng.choice([round(rng.uniform(0, 3000), rng.randrange(4)), rng.randrange(1, 10 ** 6),
+                                      10 ** rng.uniform(-6, 20)]))
+                      for _ in range(500)] + extra
+            items = [{
+                "marketplace": "mercadolivre",
+                "item_id": f"MLB{n}",
+                "url": "https://example.com",
+                "title": "Produto",
+                "price": price,
+                "original_price": price if n % 3 else None,
+            } for n, price in enumerate(prices)]
+
+            self.assertSameRows(normalize_per_item(items), columnar.normalize_batch(items))
+
+    def test_unsupported_values_fall_back_to_per_item(self):
+        items = [{
+            "marketplace": "mercadolivre",
+            "item_id": "MLB1",
+            "url": "https://example.com",
+            "title": "Produto",
+            "price": Decimal("10.50"),
+        }] * PromotionNormalizer.COLUMNAR_MIN_ITEMS
+
+        self.assertIsNone(columnar.normalize_batch(items))
+        with patch.object(Config, "NORMALIZER_ENGINE", "columnar"):
+            result = PromotionNormalizer.normalize_items(items)
+        self.assertEqual(result[0]["price"], Decimal("10.50"))
+
+    def test_normalize_items_is_identical_for_both_engines(self):
+        rng = random.Random(3)
+        items = [random_item(rng) for _ in range(1000)]
+        items = [item for item in items if "nan" not in (item["price"], item.get("original_price"))]
+
+        with patch.object(Config, "NORMALIZER_ENGINE", "item"):
+            expected = PromotionNormalizer.normalize_items(items)
+        with patch.object(Config, "NORMALIZER_ENGINE", "columnar"):
+            actual = PromotionNormalizer.normalize_items(items)
+
+        self.assertEqual(expected, actual)
 
 
 if __name__ == "__main__":
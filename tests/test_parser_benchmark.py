@@ -0,0 +1,43 @@
+"""
+Benchmark do extrator lxml contra o caminho BeautifulSoup.
+
+Requer pytest-benchmark; sem ele os testes são ignorados.
+Execução: pytest tests/test_parser_benchmark.py --benchmark-only
+"""
+import os
+import re
+import pytest
+from app.scrapers import lxml_extractor
+from app.scrapers.mercadolivre import MercadoLivreScraper
+
+pytest.importorskip("pytest_benchmark")
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+LIMIT = 10_000
+
+
+def _load_pages():
+    with open(os.path.join(FIXTURES_DIR, "ofertas_page.html"), encoding="utf-8") as f:
+        page = f.read()
+    
+    # Página grande: os mesmos cards repetidos, como numa listagem de 48+ itens
+    cards = re.search(r"<ol class=\"items_container\">(.*)</ol>", page, re.S).group(1)
+    large_page = page.replace(cards, cards * 25)
+    return {"fixture": page, "large": large_page}
+
+
+PAGES = _load_pages()
+
+
+@pytest.mark.parametrize("page", sorted(PAGES))
+def test_benchmark_bs4(benchmark, page):
+    benchmark.group = f"parse-{page}"
+    items = benchmark(MercadoLivreScraper._parse_items, PAGES[page], "daily_offers", LIMIT)
+    assert items
+
+
+@pytest.mark.parametrize("page", sorted(PAGES))
+def test_benchmark_lxml(benchmark, page):
+    benchmark.group = f"parse-{page}"
+    items = benchmark(lxml_extractor.extract_items, PAGES[page], "daily_offers", LIMIT)
+    assert items == MercadoLivreScraper._parse_items(PAGES[page], "daily_offers", LIMIT)
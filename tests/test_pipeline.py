@@ -0,0 +1,137 @@
+"""
+Testes para o pipeline de coleta em streaming.
+"""
+import asyncio
+import threading
+import unittest
+from app.pipeline.streaming import CollectionPipeline
+
+
+def make_item(index, source="daily_offers"):
+    return {
+        "marketplace": "mercadolivre",
+        "item_id": f"MLB{index}",
+        "url": f"https://example.com/{index}",
+        "title": f"Produto {index}",
+        "price": 10.0 + index,
+        "source": source,
+    }
+
+
+class FakeScraper:
+    """Scraper que entrega páginas pré-definidas."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.closed = False
+
+    async def stream_all(self):
+        for source, items in self.pages:
+            await asyncio.sleep(0)
+            yield source, items
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBigQueryClient:
+    """Cliente que registra os lotes recebidos."""
+
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    def write_promotions(self, rows, execution_id):
+        if self.fail:
+            raise RuntimeError("BigQuery indisponível")
+        self.batches.append(list(rows))
+        return len(rows), 0
+
+
+class TestCollectionPipeline(unittest.TestCase):
+    """Testes para o CollectionPipeline."""
+
+    def test_pipeline_loads_in_micro_batches(self):
+        """Testa que os itens são carregados em lotes do tamanho configurado."""
+        pages = [
+            ("daily_offers", [make_item(i) for i in range(0, 4)]),
+            ("technology", [make_item(i, "technology") for i in range(4, 9)]),
+        ]
+        scraper = FakeScraper(pages)
+        bq_client = FakeBigQueryClient()
+
+        pipeline = CollectionPipeline(scraper, bq_client, "exec-1", batch_size=3, queue_size=1)
+        summary = asyncio.run(pipeline.run())
+
+        self.assertEqual([len(batch) for batch in bq_client.batches], [3, 3, 3])
+        self.assertEqual(summary["items_collected"], 9)
+        self.assertEqual(summary["items_inserted"], 9)
+        self.assertEqual(summary["by_source"], {"daily_offers": 4, "technology": 5})
+        self.assertTrue(scraper.closed)
+
+    def test_pipeline_sends_each_key_once(self):
+        """Testa que itens repetidos entre fontes e lotes são enviados uma só vez."""
+        pages = [
+            ("daily_offers", [make_item(i) for i in range(0, 3)]),
+            ("technology", [make_item(i, "technology") for i in range(1, 5)]),
+        ]
+        bq_client = FakeBigQueryClient()
+
+        pipeline = CollectionPipeline(FakeScraper(pages), bq_client, "exec-1", batch_size=4)
+        summary = asyncio.run(pipeline.run())
+
+        keys = [row["dedupe_key"] for batch in bq_client.batches for row in batch]
+        self.assertEqual(len(keys), 5)
+        self.assertEqual(len(set(keys)), 5)
+        self.assertEqual(summary["items_merged"], 2)
+        self.assertEqual(summary["normalized_by_source"], {"daily_offers": 3, "technology": 2})
+        self.assertEqual(bq_client.batches[0][1]["sources"], ["daily_offers", "technology"])
+
+    def test_repeats_after_flush_are_left_to_the_merge(self):
+        """Testa que o pipeline não guarda as chaves de lotes já carregados."""
+        pages = [
+            ("daily_offers", [make_item(i) for i in range(0, 2)]),
+            ("technology", [make_item(0, "technology")]),
+        ]
+        bq_client = FakeBigQueryClient()
+
+        pipeline = CollectionPipeline(FakeScraper(pages), bq_client, "exec-1", batch_size=2)
+        summary = asyncio.run(pipeline.run())
+
+        self.assertEqual([len(batch) for batch in bq_client.batches], [2, 1])
+        self.assertEqual(bq_client.batches[1][0]["item_id"], "MLB0")
+        self.assertEqual(summary["items_merged"], 0)
+
+    def test_pipeline_propagates_load_errors(self):
+        """Testa que uma falha de carga interrompe o pipeline."""
+        scraper = FakeScraper([("daily_offers", [make_item(1)])])
+        pipeline = CollectionPipeline(scraper, FakeBigQueryClient(fail=True), "exec-2")
+
+        with self.assertRaises(RuntimeError):
+            asyncio.run(pipeline.run())
+        self.assertTrue(scraper.closed)
+
+    def test_progress_callback_runs_off_the_event_loop(self):
+        """Testa que o callback de progresso (que grava em disco) não roda no event loop."""
+        calls = []
+
+        def on_progress(progress):
+            calls.append((threading.get_ident(), progress["items_collected"]))
+
+        async def run():
+            pipeline = CollectionPipeline(
+                FakeScraper([("daily_offers", [make_item(1), make_item(2)])]),
+                FakeBigQueryClient(), "exec-3", on_progress=on_progress,
+            )
+            await pipeline.run()
+            return threading.get_ident()
+
+        loop_thread = asyncio.run(run())
+
+        self.assertTrue(calls)
+        self.assertNotIn(loop_thread, [thread for thread, _ in calls])
+        self.assertEqual(calls[-1][1], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
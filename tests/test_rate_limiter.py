@@ -0,0 +1,98 @@
+"""
+Testes para o rate limiter adaptativo.
+"""
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+from app.utils.rate_limiter import FileTokenBucket, RateLimiter, TokenBucket
+
+
+class TestTokenBucket(unittest.TestCase):
+    """Testes para os token buckets."""
+
+    def test_bucket_allows_burst_then_waits(self):
+        """Testa o burst inicial e o tempo de espera depois dele."""
+        bucket = TokenBucket(rate=10, burst=2)
+        self.assertEqual(bucket.take(), 0)
+        self.assertEqual(bucket.take(), 0)
+        wait = bucket.take()
+        self.assertGreater(wait, 0)
+        self.assertLessEqual(wait, 0.1)
+
+    def test_file_bucket_is_shared(self):
+        """Testa que dois buckets no mesmo arquivo dividem os tokens."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "host.bucket")
+            first = FileTokenBucket(path, rate=0.01, burst=2)
+            second = FileTokenBucket(path, rate=0.01, burst=2)
+
+            self.assertEqual(first.take(), 0)
+            self.assertEqual(second.take(), 0)
+            self.assertGreater(first.take(), 0)
+
+            second.update_rate(lambda rate: 5.0)
+            self.assertEqual(first.rate, 5.0)
+
+
+class TestRateLimiter(unittest.TestCase):
+    """Testes para o ajuste AIMD."""
+
+    def setUp(self):
+        self.limiter = RateLimiter(
+            initial_rate=2.0, min_rate=0.5, max_rate=3.0,
+            increase_step=0.5, decrease_factor=0.5, target_latency=1.0
+        )
+
+    def test_additive_increase_up_to_max(self):
+        """Testa o aumento aditivo até o teto."""
+        rates = [self.limiter.record("h", 0.1, 200) for _ in range(4)]
+        self.assertEqual(rates, [2.5, 3.0, 3.0, 3.0])
+
+    def test_multiplicative_decrease_on_throttle(self):
+        """Testa a redução multiplicativa em 429, erro e lentidão."""
+        self.assertEqual(self.limiter.record("h", 0.1, 429), 1.0)
+        self.assertEqual(self.limiter.record("h", 0.1, error=True), 0.5)
+        self.assertEqual(self.limiter.record("h", 5.0, 200), 0.5)
+
+    def test_acquire_paces_requests(self):
+        """Testa que o acquire espaça as requisições acima do burst."""
+        limiter = RateLimiter(initial_rate=20, burst=1)
+
+        async def run():
+            start = time.monotonic()
+            for _ in range(3):
+                await limiter.acquire("h")
+            return time.monotonic() - start
+
+        self.assertGreaterEqual(asyncio.run(run()), 0.09)
+
+    def test_file_backend_records_off_the_event_loop(self):
+        """Testa que o ajuste com o backend "file" não roda na thread do event loop."""
+        with tempfile.TemporaryDirectory() as tmp:
+            limiter = RateLimiter(backend="file", directory=tmp, initial_rate=2.0,
+                                  max_rate=3.0, increase_step=0.5)
+            bucket = limiter._bucket("h")
+            update_rate = bucket.update_rate
+            threads = []
+
+            def tracking_update(adjust):
+                threads.append(threading.get_ident())
+                return update_rate(adjust)
+
+            bucket.update_rate = tracking_update
+
+            async def run():
+                return threading.get_ident(), await limiter.record_async("h", 0.1, 200)
+
+            loop_thread, rate = asyncio.run(run())
+
+        self.assertEqual(rate, 2.5)
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0], loop_thread)
+
+
+if __name__ == "__main__":
+    unittest.main()
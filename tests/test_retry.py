@@ -0,0 +1,46 @@
+"""
+Testes para os utilitários de retry.
+"""
+import unittest
+from app.utils.retry import RetryBudget, full_jitter_delay, parse_retry_after
+
+
+class TestRetryUtils(unittest.TestCase):
+    """Testes para backoff, Retry-After e orçamento de retries."""
+    
+    def test_full_jitter_delay_within_ceiling(self):
+        """Testa que o delay fica entre zero e o teto exponencial."""
+        for attempt in range(6):
+            delay = full_jitter_delay(attempt, backoff_factor=2.0, max_delay=10.0)
+            self.assertGreaterEqual(delay, 0)
+            self.assertLessEqual(delay, min(10.0, 2.0 ** attempt))
+    
+    def test_parse_retry_after_seconds(self):
+        """Testa Retry-After em segundos."""
+        self.assertEqual(parse_retry_after("7"), 7.0)
+    
+    def test_parse_retry_after_http_date_in_past(self):
+        """Testa Retry-After como data HTTP já vencida."""
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0.0)
+    
+    def test_parse_retry_after_invalid(self):
+        """Testa Retry-After ausente ou inválido."""
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after("amanhã"))
+    
+    def test_retry_budget_limits_total_retries(self):
+        """Testa que o orçamento é compartilhado e se esgota."""
+        budget = RetryBudget(max_retries=2)
+        self.assertTrue(budget.try_acquire(0))
+        self.assertTrue(budget.try_acquire(0))
+        self.assertFalse(budget.try_acquire(0))
+    
+    def test_retry_budget_respects_deadline(self):
+        """Testa que um backoff além do prazo é recusado."""
+        budget = RetryBudget(max_retries=5, deadline=1.0)
+        self.assertFalse(budget.try_acquire(5.0))
+        self.assertTrue(budget.try_acquire(0.1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,273 @@
+"""
+Testes para o scraper do Mercado Livre.
+"""
+import asyncio
+import os
+import time
+import unittest
+from unittest.mock import patch
+import httpx
+from app.config import Config
+from app.scrapers import http_client
+from app.scrapers.mercadolivre import MercadoLivreScraper
+from app.scrapers.parser_pool import shutdown_parser_executor
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+class SlowScraper(MercadoLivreScraper):
+    """Scraper que simula a latência de cada fonte sem acessar a rede."""
+
+    DELAYS = {"daily_offers": 0.2, "technology": 0.2, "electronics": 0.2}
+
+    async def scrape_source(self, url, source):
+        await asyncio.sleep(self.DELAYS[source])
+        return [{"item_id": f"MLB-{source}", "source": source}]
+
+
+class TestScrapeAll(unittest.IsolatedAsyncioTestCase):
+    """Testes para a coleta de múltiplas fontes."""
+
+    async def test_scrape_all_concurrent_groups_by_source(self):
+        """Testa que as fontes rodam em paralelo e mantêm o agrupamento."""
+        scraper = SlowScraper()
+
+        start = time.monotonic()
+        results = await scraper.scrape_all(concurrent=True)
+        elapsed = time.monotonic() - start
+
+        self.assertEqual(list(results.keys()), list(MercadoLivreScraper.SOURCES.keys()))
+        self.assertEqual(results["technology"][0]["source"], "technology")
+        self.assertLess(elapsed, 0.5)
+
+    async def test_scrape_all_deadline_returns_partial_results(self):
+        """Testa que fontes acima do prazo retornam lista vazia."""
+        scraper = SlowScraper()
+        scraper.DELAYS = {"daily_offers": 0.01, "technology": 5, "electronics": 0.01}
+
+        with patch.object(Config, "COLLECT_DEADLINE", 0.3):
+            results = await scraper.scrape_all(concurrent=True)
+
+        self.assertEqual(len(results["daily_offers"]), 1)
+        self.assertEqual(results["technology"], [])
+        self.assertEqual(len(results["electronics"]), 1)
+
+
+class PagedScraper(MercadoLivreScraper):
+    """Scraper com uma listagem paginada simulada."""
+
+    def __init__(self, total_pages, items_per_page=10):
+        super().__init__()
+        self.total_pages = total_pages
+        self.items_per_page = items_per_page
+        self.requested = []
+
+    async def _scrape_page(self, url, source, limit):
+        self.requested.append(url)
+        page = int(url.rsplit("page=", 1)[1]) if "page=" in url else 1
+        await asyncio.sleep(0.01 * (page % 3))
+        if page > self.total_pages:
+            return []
+        return [
+            {"item_id": f"MLB{page}{i:03d}", "source": source}
+            for i in range(self.items_per_page)
+        ][:limit]
+
+
+class TestPagination(unittest.IsolatedAsyncioTestCase):
+    """Testes para a paginação das fontes."""
+
+    def test_build_page_url(self):
+        """Testa a montagem das URLs de paginação."""
+        url = "https://www.mercadolivre.com.br/ofertas?category=MLB1051#menu_container"
+        self.assertEqual(MercadoLivreScraper.build_page_url(url, 1), url)
+        self.assertEqual(
+            MercadoLivreScraper.build_page_url(url, 3),
+            "https://www.mercadolivre.com.br/ofertas?category=MLB1051&page=3",
+        )
+
+    async def test_crawl_respects_item_budget(self):
+        """Testa que a coleta para no limite de itens."""
+        scraper = PagedScraper(total_pages=50)
+
+        with patch.object(Config, "PAGE_FETCH_WINDOW", 4):
+            pages = [
+                page async for page in scraper.iter_source_pages(
+                    "https://example.com/ofertas", "daily_offers", max_items=35, max_pages=50
+                )
+            ]
+
+        self.assertEqual(sum(len(page) for page in pages), 35)
+        self.assertLess(len(scraper.requested), 10)
+
+    async def test_crawl_stops_at_last_page(self):
+        """Testa que uma página vazia encerra a paginação."""
+        scraper = PagedScraper(total_pages=3)
+
+        with patch.object(Config, "PAGE_FETCH_WINDOW", 2):
+            items = []
+            async for page in scraper.iter_source_pages(
+                "https://example.com/ofertas", "daily_offers", max_items=1000, max_pages=20
+            ):
+                items.extend(page)
+
+        self.assertEqual(len(items), 30)
+        self.assertEqual(len({item["item_id"] for item in items}), 30)
+
+    async def test_stream_all_yields_pages_from_every_source(self):
+        """Testa que o streaming entrega as páginas de todas as fontes."""
+        scraper = PagedScraper(total_pages=2)
+
+        with patch.object(Config, "MAX_PAGES_PER_SOURCE", 5), \
+                patch.object(Config, "ITEMS_PER_SOURCE", 100):
+            totals = {}
+            async for source, items in scraper.stream_all(concurrent=True):
+                totals[source] = totals.get(source, 0) + len(items)
+
+        self.assertEqual(totals, {source: 20 for source in MercadoLivreScraper.SOURCES})
+
+
+class TestParserExecutor(unittest.IsolatedAsyncioTestCase):
+    """Testes para o parsing fora do event loop."""
+
+    def tearDown(self):
+        shutdown_parser_executor()
+
+    async def _parse_with(self, mode):
+        html = load_fixture("ofertas_page.html")
+        with patch.object(Config, "PARSER_EXECUTOR", mode), \
+                patch.object(Config, "PARSER_WORKERS", 2):
+            return await MercadoLivreScraper().parse_page(html, "daily_offers", 100)
+
+    async def test_executors_return_same_items(self):
+        """Testa que thread e processo retornam os mesmos itens do parsing local."""
+        expected = await self._parse_with("none")
+
+        self.assertEqual(len(expected), 5)
+        self.assertEqual(await self._parse_with("thread"), expected)
+        shutdown_parser_executor()
+        self.assertEqual(await self._parse_with("process"), expected)
+
+
+class TestFetch(unittest.IsolatedAsyncioTestCase):
+    """Testes para o retry do BaseScraper.fetch."""
+
+    def _scraper(self, handler):
+        scraper = MercadoLivreScraper()
+        scraper.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return scraper
+
+    async def test_fetch_honors_retry_after_without_blocking(self):
+        """Testa que o backoff respeita Retry-After e não bloqueia o loop."""
+        calls = []
+
+        def handler(request):
+            calls.append(request.url)
+            if len(calls) == 1:
+                return httpx.Response(429, headers={"Retry-After": "0"})
+            return httpx.Response(200, text="ok")
+
+        scraper = self._scraper(handler)
+        ticks = []
+
+        async def ticker():
+            for _ in range(3):
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0)
+
+        html, _ = await asyncio.gather(scraper.fetch("https://example.com/"), ticker())
+        await scraper.close()
+
+        self.assertEqual(html, "ok")
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(len(ticks), 3)
+
+    async def test_fetch_caps_retry_after_without_budget(self):
+        """Testa que um Retry-After longo é limitado ao delay máximo sem orçamento."""
+        calls = []
+
+        def handler(request):
+            calls.append(request.url)
+            if len(calls) == 1:
+                return httpx.Response(503, headers={"Retry-After": "3600"})
+            return httpx.Response(200, text="ok")
+
+        scraper = self._scraper(handler)
+        scraper.max_retry_delay = 0.01
+        self.assertIsNone(scraper.retry_budget)
+
+        start = time.monotonic()
+        html = await asyncio.wait_for(scraper.fetch("https://example.com/"), timeout=5)
+        await scraper.close()
+
+        self.assertEqual(html, "ok")
+        self.assertLess(time.monotonic() - start, 5)
+
+    async def test_fetch_does_not_retry_client_errors(self):
+        """Testa que 404 falha na primeira tentativa."""
+        calls = []
+
+        def handler(request):
+            calls.append(request.url)
+            return httpx.Response(404)
+
+        scraper = self._scraper(handler)
+        with self.assertRaises(httpx.HTTPStatusError):
+            await scraper.fetch("https://example.com/")
+        await scraper.close()
+
+        self.assertEqual(len(calls), 1)
+
+    async def test_fetch_stops_when_budget_exhausted(self):
+        """Testa que o orçamento compartilhado interrompe os retries."""
+        calls = []
+
+        def handler(request):
+            calls.append(request.url)
+            return httpx.Response(503)
+
+        scraper = self._scraper(handler)
+        scraper.max_retries = 5
+        budget = scraper.new_retry_budget()
+        budget.remaining = 1
+        with patch("app.scrapers.base.full_jitter_delay", return_value=0):
+            with self.assertRaises(httpx.HTTPStatusError):
+                await scraper.fetch("https://example.com/")
+        await scraper.close()
+
+        self.assertEqual(len(calls), 2)
+
+
+class TestSharedClient(unittest.TestCase):
+    """Testes para o cliente HTTP compartilhado entre coletas."""
+
+    def tearDown(self):
+        http_client.close_http_client()
+
+    def test_client_is_reused_across_runs(self):
+        """Testa que coletas sucessivas usam o mesmo cliente no loop de fundo."""
+
+        async def grab_client():
+            scraper = MercadoLivreScraper()
+            scraper._acquire_client()
+            client = scraper.client
+            await scraper.close()
+            return client
+
+        first = http_client.run_coroutine(grab_client())
+        second = http_client.run_coroutine(grab_client())
+
+        self.assertIs(first, second)
+        self.assertFalse(first.is_closed)
+
+        http_client.close_http_client()
+        self.assertTrue(first.is_closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
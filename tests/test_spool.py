@@ -0,0 +1,162 @@
+"""
+Testes para o spool local de lotes.
+"""
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+import uuid
+from datetime import datetime, timezone
+from app.database.bigquery_client import format_promotion_rows
+from app.database.parquet_batch import build_promotions_table
+from app.database.spool import Spool, SpoolFlusher
+from app.pipeline.streaming import CollectionPipeline
+from tests.test_pipeline import FakeScraper, make_item
+
+
+class FlakyBigQueryClient:
+    """Cliente que falha nas primeiras `failures` gravações."""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.batches = []
+
+    def write_promotions(self, rows, execution_id):
+        if self.failures > 0:
+            self.failures -= 1
+            raise RuntimeError("BigQuery indisponível")
+        self.batches.append((execution_id, list(rows)))
+        return len(rows), 0
+
+
+class TestSpool(unittest.TestCase):
+    """Testes para os segmentos do spool."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.spool = Spool(self.tmp.name)
+        self.execution_id = str(uuid.uuid4())
+
+    def test_segment_round_trip_and_ack(self):
+        """Testa que um segmento preserva as linhas e some após o ack."""
+        rows = [make_item(1), make_item(2, "technology")]
+        segment = self.spool.write(rows, self.execution_id, "2024-01-02T03:04:05")
+
+        expected = [{**row, "collected_at": "2024-01-02T03:04:05"} for row in rows]
+        self.assertEqual(self.spool.read(segment), (self.execution_id, expected))
+        self.assertEqual(self.spool.pending(), [])
+
+        self.spool.release(segment)
+        pending = self.spool.pending()
+        self.assertEqual(len(pending), 1)
+
+        inflight = self.spool.claim(pending[0])
+        self.assertIsNone(self.spool.claim(pending[0]))
+        self.spool.ack(inflight)
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+    def test_replay_keeps_collection_time(self):
+        """Testa que a regravação usa o horário da coleta, não o da nova tentativa."""
+        self.spool.release(self.spool.write([make_item(1)], self.execution_id, "2024-01-02T03:04:05"))
+        client = FlakyBigQueryClient(failures=0)
+        flusher = SpoolFlusher(self.spool, client.write_promotions, interval=1, batch_size=10)
+
+        flusher.flush_once()
+
+        rows = format_promotion_rows(client.batches[0][1], self.execution_id)
+        self.assertEqual(rows[0]["collected_at"], "2024-01-02T03:04:05")
+        table = build_promotions_table(client.batches[0][1], self.execution_id)
+        self.assertEqual(table.column("collected_at")[0].as_py(),
+                         datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc))
+
+    def test_stale_segments_return_to_queue(self):
+        """Testa que segmentos reservados por um worker morto voltam à fila."""
+        segment = self.spool.write([make_item(1)], self.execution_id)
+        old = time.time() - 3600
+        os.utime(segment, (old, old))
+
+        self.spool.recover_stale()
+
+        self.assertEqual(len(self.spool.pending()), 1)
+
+    def test_flusher_replays_in_large_batches(self):
+        """Testa que o flusher agrupa segmentos da mesma execução e confirma só após gravar."""
+        for i in range(3):
+            self.spool.release(self.spool.write([make_item(i)], self.execution_id))
+        client = FlakyBigQueryClient(failures=1)
+        flusher = SpoolFlusher(self.spool, client.write_promotions, interval=1, batch_size=10)
+
+        with self.assertRaises(RuntimeError):
+            flusher.flush_once()
+        self.assertEqual(len(self.spool.pending()), 3)
+
+        self.assertEqual(flusher.flush_once(), 3)
+        self.assertEqual(len(client.batches), 1)
+        self.assertEqual(len(client.batches[0][1]), 3)
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+
+class TestPipelineWithSpool(unittest.TestCase):
+    """Testes para o pipeline com spool durante uma falha do BigQuery."""
+
+    def test_collect_survives_sink_outage(self):
+        """Testa que a coleta termina e os lotes ficam no spool para replay."""
+        with tempfile.TemporaryDirectory() as directory:
+            spool = Spool(directory)
+            execution_id = str(uuid.uuid4())
+            pages = [("daily_offers", [make_item(i) for i in range(6)])]
+            client = FlakyBigQueryClient(failures=1)
+
+            pipeline = CollectionPipeline(
+                FakeScraper(pages), client, execution_id, batch_size=2, spool=spool
+            )
+            summary = asyncio.run(pipeline.run())
+
+            self.assertEqual(summary["items_spooled"], 6)
+            self.assertEqual(summary["items_inserted"], 0)
+            self.assertEqual(len(spool.pending()), 3)
+
+            flusher = SpoolFlusher(spool, client.write_promotions, interval=1, batch_size=100)
+            self.assertEqual(flusher.flush_once(), 6)
+            self.assertEqual(spool.pending(), [])
+
+    def test_spool_io_runs_off_the_event_loop(self):
+        """Testa que ack e release do spool não rodam no event loop."""
+        calls = []
+
+        class RecordingSpool(Spool):
+            def ack(self, segment):
+                calls.append(("ack", threading.get_ident()))
+                super().ack(segment)
+
+            def release(self, segment):
+                calls.append(("release", threading.get_ident()))
+                super().release(segment)
+
+        async def run(spool, client):
+            pipeline = CollectionPipeline(
+                FakeScraper([("daily_offers", [make_item(i) for i in range(4)])]),
+                client, str(uuid.uuid4()), batch_size=2, spool=spool,
+            )
+            await pipeline.run()
+            return threading.get_ident()
+
+        with tempfile.TemporaryDirectory() as directory:
+            loop_thread = asyncio.run(run(RecordingSpool(directory), FlakyBigQueryClient(failures=1)))
+
+        self.assertEqual(sorted(name for name, _ in calls), ["release", "release"])
+        self.assertNotIn(loop_thread, [thread for _, thread in calls])
+
+        calls.clear()
+        with tempfile.TemporaryDirectory() as directory:
+            loop_thread = asyncio.run(run(RecordingSpool(directory), FlakyBigQueryClient(failures=0)))
+
+        self.assertEqual([name for name, _ in calls], ["ack", "ack"])
+        self.assertNotIn(loop_thread, [thread for _, thread in calls])
+
+
+if __name__ == "__main__":
+    unittest.main()
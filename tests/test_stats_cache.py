@@ -0,0 +1,126 @@
+"""
+Testes para o cache de estatísticas.
+"""
+import time
+import unittest
+from app.database.stats_cache import StatsCache, format_stats
+
+
+def make_aggregates(executions=1, total_items=10):
+    return {
+        "executions": executions,
+        "total_items": total_items,
+        "unique_items": total_items,
+        "by_source": {"daily_offers": total_items, "technology": 0, "electronics": 0},
+        "discount_sum": 20.0 * total_items,
+        "discount_count": total_items,
+    }
+
+
+class CountingLoader:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return make_aggregates(executions=self.calls)
+
+
+class TestStatsCache(unittest.TestCase):
+    """Testes para StatsCache."""
+
+    def test_format_stats(self):
+        """Testa o formato de resposta de /stats."""
+        stats = format_stats(make_aggregates())
+        self.assertEqual(stats["avg_discount_percent"], 20.0)
+        self.assertEqual(stats["by_source"]["daily_offers"], 10)
+        self.assertEqual(format_stats({**make_aggregates(), "discount_count": 0})["avg_discount_percent"], 0)
+
+    def test_fresh_value_is_served_from_cache(self):
+        """Testa que leituras dentro do TTL não consultam o BigQuery."""
+        loader = CountingLoader()
+        cache = StatsCache(loader, ttl=60, stale_ttl=60)
+
+        cache.get()
+        cache.get()
+
+        self.assertEqual(loader.calls, 1)
+
+    def test_stale_value_is_served_while_revalidating(self):
+        """Testa o stale-while-revalidate após invalidação."""
+        loader = CountingLoader()
+        cache = StatsCache(loader, ttl=60, stale_ttl=60)
+        cache.get()
+
+        cache.invalidate()
+        self.assertEqual(cache.get()["executions"], 1)
+
+        for _ in range(100):
+            if loader.calls == 2:
+                break
+            time.sleep(0.01)
+        self.assertEqual(loader.calls, 2)
+
+    def test_expired_value_is_loaded_synchronously(self):
+        """Testa a consulta direta quando o valor está vencido além da janela."""
+        loader = CountingLoader()
+        cache = StatsCache(loader, ttl=0, stale_ttl=0)
+        cache.get()
+        self.assertEqual(cache.get()["executions"], 2)
+
+    def test_apply_run_updates_counts_incrementally(self):
+        """Testa a soma incremental dos contadores da coleta."""
+        cache = StatsCache(lambda: make_aggregates(), ttl=60, stale_ttl=60)
+        cache.get()
+
+        cache.apply_run({
+            "items_inserted": 5,
+            "items_deduplicated": 0,
+            "normalized_by_source": {"technology": 5},
+            "discount_sum": 50.0,
+            "discount_count": 5,
+        })
+        cache.loader = lambda: time.sleep(1) or make_aggregates()
+        stats = cache.get()
+
+        self.assertEqual(stats["executions"], 2)
+        self.assertEqual(stats["total_items"], 15)
+        self.assertEqual(stats["by_source"]["technology"], 5)
+        self.assertAlmostEqual(stats["avg_discount_percent"], 250.0 / 15)
+
+    def test_apply_run_with_duplicates_only_counts_totals(self):
+        """Testa que execuções com duplicados não somam valores incertos."""
+        cache = StatsCache(lambda: make_aggregates(), ttl=60, stale_ttl=60)
+        cache.get()
+
+        cache.apply_run({
+            "items_inserted": 3,
+            "items_deduplicated": 2,
+            "normalized_by_source": {"technology": 5},
+        })
+        cache.loader = lambda: time.sleep(1) or make_aggregates()
+        stats = cache.get()
+
+        self.assertEqual(stats["total_items"], 13)
+        self.assertEqual(stats["by_source"]["technology"], 0)
+
+    def test_apply_run_without_inserts_keeps_counts(self):
+        """Testa que uma execução sem inserções não conta como execução."""
+        cache = StatsCache(lambda: make_aggregates(), ttl=60, stale_ttl=60)
+        cache.get()
+
+        cache.apply_run({
+            "items_inserted": 0,
+            "items_deduplicated": 4,
+            "normalized_by_source": {"technology": 4},
+        })
+        cache.loader = lambda: time.sleep(1) or make_aggregates()
+        stats = cache.get()
+
+        self.assertEqual(stats["executions"], 1)
+        self.assertEqual(stats["total_items"], 10)
+        self.assertEqual(stats, format_stats(make_aggregates()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+"""
+Testes para o rollup horário de estatísticas.
+"""
+import unittest
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from google.api_core.exceptions import BadRequest, NotFound
+from app.config import Config
+from app.database import bigquery_client
+from app.database.bigquery_client import BigQueryClient
+
+
+class TestStatsRollup(unittest.TestCase):
+    """Testes para a manutenção e leitura do rollup."""
+
+    def setUp(self):
+        patcher = patch.object(bigquery_client.bigquery, "Client")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = BigQueryClient()
+        self.client.client = MagicMock()
+        self.client.known_keys = None
+
+    def _row(self):
+        return SimpleNamespace(
+            executions=2, total_items=10, unique_items=8,
+            daily_offers=4, technology=3, electronics=3,
+            discount_sum=50.0, discount_count=10,
+        )
+
+    def test_merge_updates_rollup_with_same_inserted_at(self):
+        """Testa que o rollup soma apenas as linhas do MERGE do lote."""
+        self.client.client.query.return_value.num_dml_affected_rows = 2
+        rows = [
+            {"marketplace": "mercadolivre", "item_id": "MLB1", "url": "u", "title": "t",
+             "price": 10, "dedupe_key": "k1"},
+            {"marketplace": "mercadolivre", "item_id": "MLB2", "url": "u", "title": "t",
+             "price": 10, "dedupe_key": "k2"},
+        ]
+
+        with patch.object(Config, "STATS_ROLLUP_ENABLED", True):
+            self.assertEqual(self.client.merge_promotions(rows, "exec-1"), (2, 0))
+
+        merge_call, rollup_call = self.client.client.query.call_args_list
+        self.assertIn("@inserted_at", merge_call.args[0])
+        self.assertIn(Config.BIGQUERY_ROLLUP_TABLE, rollup_call.args[0])
+        merge_params = {p.name: p.value for p in merge_call.kwargs["job_config"].query_parameters}
+        rollup_params = {p.name: p.value for p in rollup_call.kwargs["job_config"].query_parameters}
+        self.assertEqual(rollup_params["inserted_at"], merge_params["inserted_at"])
+        self.assertEqual(rollup_params["execution_id"], "exec-1")
+
+    def test_rollup_skipped_when_nothing_inserted(self):
+        """Testa que lotes totalmente duplicados não tocam o rollup."""
+        self.client.client.query.return_value.num_dml_affected_rows = 0
+        rows = [{"marketplace": "mercadolivre", "item_id": "MLB1", "url": "u",
+                 "title": "t", "price": 10, "dedupe_key": "k1"}]
+
+        self.assertEqual(self.client.merge_promotions(rows, "exec-1"), (0, 1))
+        self.assertEqual(self.client.client.query.call_count, 1)
+
+    def test_rollup_replaces_affected_hours(self):
+        """Testa que o rollup recalcula as horas do lote em vez de somar a elas."""
+        self.client.update_stats_rollup("exec-1", datetime.now(timezone.utc), "2024-01-02T03:00:00")
+
+        sql = self.client.client.query.call_args.args[0]
+        self.assertIn("item_count = S.item_count", sql)
+        self.assertNotIn("R.item_count +", sql)
+
+    @patch.object(bigquery_client.time, "sleep")
+    def test_rollup_retries_concurrent_update(self, sleep):
+        """Testa que conflitos de DML concorrente são tentados de novo."""
+        conflict = BadRequest(
+            "Could not serialize access to table promotions_hourly due to concurrent update"
+        )
+        self.client.client.query.side_effect = [conflict, conflict, MagicMock()]
+
+        self.client.update_stats_rollup("exec-1", datetime.now(timezone.utc), "2024-01-02T03:00:00")
+
+        self.assertEqual(self.client.client.query.call_count, 3)
+        self.assertEqual(sleep.call_count, 2)
+
+    @patch.object(bigquery_client.time, "sleep")
+    def test_rollup_failure_is_logged_without_raising(self, sleep):
+        """Testa que outras falhas não são repetidas nem propagadas."""
+        self.client.client.query.side_effect = BadRequest("Syntax error")
+
+        with self.assertLogs(bigquery_client.logger, "ERROR"):
+            self.client.update_stats_rollup("exec-1", datetime.now(timezone.utc), "2024-01-02T03:00:00")
+
+        self.assertEqual(self.client.client.query.call_count, 1)
+        sleep.assert_not_called()
+
+    @patch.object(bigquery_client.time, "sleep")
+    def test_rollup_gives_up_after_max_attempts(self, sleep):
+        """Testa que o conflito persistente desiste após o limite de tentativas."""
+        self.client.client.query.side_effect = BadRequest("concurrent update")
+
+        with self.assertLogs(bigquery_client.logger, "ERROR"):
+            self.client.update_stats_rollup("exec-1", datetime.now(timezone.utc), "2024-01-02T03:00:00")
+
+        self.assertEqual(self.client.client.query.call_count, bigquery_client.ROLLUP_MAX_ATTEMPTS)
+
+    def test_query_stats_reads_rollup(self):
+        """Testa que /stats consulta o rollup por padrão."""
+        self.client.client.query.return_value.result.return_value = [self._row()]
+
+        with patch.object(Config, "STATS_SOURCE", "rollup"):
+            stats = self.client.query_stats()
+
+        self.assertIn(Config.BIGQUERY_ROLLUP_TABLE, self.client.client.query.call_args.args[0])
+        self.assertEqual(stats["by_source"]["technology"], 3)
+        self.assertEqual(stats["discount_count"], 10)
+
+    def test_query_stats_falls_back_to_raw(self):
+        """Testa que a ausência do rollup cai para a tabela de promoções."""
+        raw = MagicMock()
+        raw.result.return_value = [self._row()]
+        self.client.client.query.side_effect = [NotFound("rollup"), raw]
+
+        with patch.object(Config, "STATS_SOURCE", "rollup"):
+            stats = self.client.query_stats()
+
+        self.assertEqual(stats["total_items"], 10)
+        self.assertNotIn(Config.BIGQUERY_ROLLUP_TABLE, self.client.client.query.call_args.args[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+"""
+Testes para a gravação pela Storage Write API.
+"""
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+from app.config import Config
+from app.database import bigquery_client
+from app.database.bigquery_client import BigQueryClient
+from app.database.storage_write import StorageWriteSink, build_message_class
+
+
+class FakeWriteStream:
+    """Write stream local que guarda as linhas até o commit."""
+
+    def __init__(self, store, fail_on_append=False):
+        self.store = store
+        self.fail_on_append = fail_on_append
+        self.pending = []
+        self.closed = False
+
+    def append(self, serialized_rows):
+        if self.fail_on_append:
+            raise RuntimeError("stream indisponível")
+        self.pending.extend(serialized_rows)
+
+    def commit(self):
+        self.store["committed"].extend(self.pending)
+        self.pending = []
+
+    def close(self):
+        self.closed = True
+
+
+def make_row(key, price=10.0):
+    return {"marketplace": "mercadolivre", "item_id": key, "url": "u", "title": "t",
+            "price": price, "original_price": None, "source": "technology",
+            "dedupe_key": f"mercadolivre#{key}#{price}"}
+
+
+class TestStorageWriteSink(unittest.TestCase):
+    """Testes para o StorageWriteSink com um stream falso."""
+
+    def setUp(self):
+        self.store = {"committed": [], "streams": []}
+
+    def _sink(self, **stream_kwargs):
+        def factory(table_path, mode, descriptor):
+            stream = FakeWriteStream(self.store, **stream_kwargs)
+            self.store["streams"].append((table_path, mode, stream))
+            return stream
+
+        return StorageWriteSink("projects/p/datasets/d/tables/promotions", "pending", factory)
+
+    def test_rows_round_trip_through_descriptor(self):
+        """Testa que as linhas serializadas decodificam com o mesmo descritor."""
+        sink = self._sink()
+        inserted_at = datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+        rows = [dict(make_row("MLB1", 19.9), execution_id="exec-1",
+                     collected_at="2024-01-02T03:00:00")]
+
+        self.assertEqual(sink.write(rows, inserted_at), 1)
+
+        message = build_message_class(sink.descriptor).FromString(self.store["committed"][0])
+        self.assertEqual(message.item_id, "MLB1")
+        self.assertEqual(message.price, "19.900000000")
+        self.assertFalse(message.HasField("original_price"))
+        self.assertEqual(message.inserted_at, int(inserted_at.timestamp() * 1_000_000))
+        self.assertEqual(message.collected_at, 1704164400 * 1_000_000)
+
+    def test_failed_append_commits_nothing(self):
+        """Testa que um erro no append não efetiva o lote e fecha o stream."""
+        sink = self._sink(fail_on_append=True)
+
+        with self.assertRaises(RuntimeError):
+            sink.write([make_row("MLB1")], datetime.now(timezone.utc))
+
+        self.assertEqual(self.store["committed"], [])
+        self.assertTrue(self.store["streams"][0][2].closed)
+
+
+class TestWritePromotions(unittest.TestCase):
+    """Testes para a escolha do backend de gravação."""
+
+    def setUp(self):
+        patcher = patch.object(bigquery_client.bigquery, "Client")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = BigQueryClient()
+        self.client.client = MagicMock()
+        self.client.known_keys = None
+        self.store = {"committed": []}
+        self.client.storage_sink = StorageWriteSink(
+            "projects/p/datasets/d/tables/promotions", "committed",
+            lambda table_path, mode, descriptor: FakeWriteStream(self.store),
+        )
+
+    def test_storage_write_skips_load_and_merge_jobs(self):
+        """Testa que o backend storage_write não cria jobs no BigQuery."""
+        with patch.object(Config, "BIGQUERY_SINK", "storage_write"):
+            result = self.client.write_promotions([make_row("MLB1"), make_row("MLB2")], "exec-1")
+
+        self.assertEqual(result, (2, 0))
+        self.assertEqual(len(self.store["committed"]), 2)
+        self.client.client.load_table_from_json.assert_not_called()
+        self.client.client.query.assert_not_called()
+
+    def test_merge_is_default_sink(self):
+        """Testa que o backend padrão continua sendo o MERGE."""
+        self.client.client.query.return_value.num_dml_affected_rows = 1
+
+        with patch.object(Config, "BIGQUERY_SINK", "merge"), \
+                patch.object(Config, "STATS_ROLLUP_ENABLED", False):
+            self.assertEqual(self.client.write_promotions([make_row("MLB1")], "exec-1"), (1, 0))
+
+        self.assertEqual(self.store["committed"], [])
+        self.client.client.load_table_from_file.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()